@@ -0,0 +1,84 @@
+"""
+Concurrent price fetching through `load_prices`, fully offline.
+
+An in-process `FakeSource` stands in for Yahoo/Stooq: every request sleeps
+for a fixed latency and, optionally, answers "Too Many Requests" at a given
+rate. The table shows wall time for a 200-ticker universe at several worker
+counts and the request rate actually observed behind the shared token
+bucket.
+
+    python benchmarks/bench_fetch.py [--tickers 200] [--latency 0.05] [--rate 100]
+"""
+from __future__ import annotations
+import argparse
+import random
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from quant_backtest.data import load_prices
+from quant_backtest.sources import PriceSource, TokenBucket
+
+
+class FakeSource(PriceSource):
+    name = "fake"
+
+    def __init__(self, latency: float, reject_rate: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.reject_rate = reject_rate
+        self.calls = []
+        self._lock = threading.Lock()
+        self._rng = random.Random(0)
+
+    def fetch(self, ticker, start, end):
+        with self._lock:
+            self.calls.append(time.monotonic())
+            reject = self._rng.random() < self.reject_rate
+        time.sleep(self.latency)
+        if reject:
+            raise RuntimeError("Too Many Requests")
+        idx = pd.bdate_range(start, end or "2020-12-31")
+        return pd.Series(np.linspace(100.0, 200.0, len(idx)), index=idx, name=ticker)
+
+
+def observed_rate(calls) -> float:
+    if len(calls) < 2:
+        return float("nan")
+    return (len(calls) - 1) / (max(calls) - min(calls))
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--tickers", type=int, default=200)
+    p.add_argument("--latency", type=float, default=0.05)
+    p.add_argument("--rate", type=float, default=100.0, help="Token-bucket requests per second")
+    p.add_argument("--reject-rate", type=float, default=0.02, help="Share of requests answered 429")
+    args = p.parse_args()
+
+    tickers = [f"T{i:04d}" for i in range(args.tickers)]
+    rows = []
+    for workers in [1, 4, 16, 64]:
+        src = FakeSource(
+            args.latency, args.reject_rate,
+            limiter=TokenBucket(rate=args.rate, capacity=args.rate / 10), backoff=0.1,
+        )
+        t0 = time.perf_counter()
+        prices = load_prices(tickers, "2018-01-01", "2020-12-31", source=src, max_workers=workers)
+        elapsed = time.perf_counter() - t0
+        assert prices.shape[1] == len(tickers)
+        rows.append({
+            "workers": workers,
+            "requests": len(src.calls),
+            "wall_s": elapsed,
+            "observed_req_per_s": observed_rate(src.calls),
+        })
+
+    print(f"limit {args.rate:.0f} req/s, latency {args.latency * 1000:.0f} ms, 429 rate {args.reject_rate:.0%}")
+    print(pd.DataFrame(rows).to_string(index=False, float_format="{:.2f}".format))
+
+
+if __name__ == "__main__":
+    main()
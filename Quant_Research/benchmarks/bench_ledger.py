@@ -0,0 +1,159 @@
+"""
+Trade ledger: list-of-dataclass portfolio vs. columnar `BuyOnlyPortfolio`.
+
+Runs a daily DCA over a synthetic 10-year, 500-ticker universe and reports,
+for both ledgers, memory per trade, the time spent in ledger work (fills,
+`daily_units`, `daily_value`, `daily_cashflows`, `trades_df`), the
+`compute_backtest` time (ledger work plus metrics and output frames) and the
+`run_backtest` wall time, which adds writing the CSV outputs.
+
+    python benchmarks/bench_ledger.py [--years 10] [--tickers 500]
+"""
+from __future__ import annotations
+import argparse
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from quant_backtest.engine import compute_backtest, run_backtest
+from quant_backtest.portfolio import BuyOnlyPortfolio, Trade
+from quant_backtest.strategies.base import Strategy, StrategyResult
+
+from bench_orders import synthetic_prices
+
+
+class LegacyPortfolio:
+    """The previous list-of-`Trade` ledger, kept here as the baseline."""
+
+    def __init__(self, tickers: list[str]):
+        self.tickers = tickers
+        self.trades: List[Trade] = []
+
+    @property
+    def num_trades(self) -> int:
+        return len(self.trades)
+
+    def buy(self, date, ticker, cash, price):
+        units = cash / price if price > 0 else 0.0
+        self.trades.append(Trade(date=date, ticker=ticker, cash=-cash, units=units, price=price))
+
+    def trades_df(self) -> pd.DataFrame:
+        return pd.DataFrame([t.__dict__ for t in self.trades]).sort_values("date").reset_index(drop=True)
+
+    def daily_units(self, index):
+        df = pd.DataFrame(0.0, index=index, columns=self.tickers)
+        if not self.trades:
+            return df
+        tdf = self.trades_df()
+        for t in self.tickers:
+            buys = pd.Series(0.0, index=index)
+            sub = tdf[tdf["ticker"] == t]
+            if not sub.empty:
+                grouped = sub.groupby("date")["units"].sum()
+                buys.loc[grouped.index] = grouped.values
+            df[t] = buys.cumsum()
+        return df
+
+    def daily_value(self, prices):
+        units = self.daily_units(prices.index)
+        return (units * prices[self.tickers]).sum(axis=1)
+
+    def daily_cashflows(self, index):
+        cf = pd.Series(0.0, index=index)
+        if not self.trades:
+            return cf
+        grouped = self.trades_df().groupby("date")["cash"].sum()
+        cf.loc[grouped.index] = grouped.values
+        return cf
+
+
+def fill_legacy(prices, weights, amount):
+    pf = LegacyPortfolio(list(weights))
+    for dt, row in zip(prices.index, prices[list(weights)].to_numpy()):
+        for (tkr, w), px in zip(weights.items(), row):
+            pf.buy(dt, tkr, cash=amount * w, price=float(px))
+    return pf
+
+
+def fill_columnar(prices, weights, amount):
+    pf = BuyOnlyPortfolio(list(weights))
+    pf.buy_weighted(prices, np.ones(len(prices), dtype=bool), amount, weights)
+    return pf
+
+
+class DailyBuy(Strategy):
+    name = "bench_daily_dca"
+
+    def __init__(self, fill, amount: float = 100.0):
+        self.fill = fill
+        self.amount = amount
+
+    def run(self, prices, portfolio_weights):
+        return self.fill(prices, portfolio_weights, self.amount), StrategyResult(extra_series={})
+
+
+def bytes_per_trade(fill, prices, weights) -> float:
+    tracemalloc.start()
+    pf = fill(prices, weights, 100.0)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / pf.num_trades
+
+
+def time_ledger(fill, prices, weights) -> float:
+    t0 = time.perf_counter()
+    pf = fill(prices, weights, 100.0)
+    pf.daily_value(prices)
+    pf.daily_cashflows(prices.index)
+    pf.daily_units(prices.index)
+    pf.trades_df()
+    return time.perf_counter() - t0
+
+
+def time_compute(fill, prices, weights) -> float:
+    t0 = time.perf_counter()
+    compute_backtest(prices, weights, DailyBuy(fill))
+    return time.perf_counter() - t0
+
+
+def time_backtest(fill, prices, weights) -> float:
+    with tempfile.TemporaryDirectory() as out_dir:
+        t0 = time.perf_counter()
+        run_backtest(prices, weights, DailyBuy(fill), out_dir, "bench")
+        return time.perf_counter() - t0
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--years", type=int, default=10)
+    p.add_argument("--tickers", type=int, default=500)
+    args = p.parse_args()
+
+    prices = synthetic_prices(args.years, args.tickers)
+    weights = {c: 1.0 / args.tickers for c in prices.columns}
+
+    rows = []
+    for name, fill in [("legacy", fill_legacy), ("columnar", fill_columnar)]:
+        rows.append({
+            "ledger": name,
+            "trades": len(prices) * args.tickers,
+            "bytes_per_trade": bytes_per_trade(fill, prices, weights),
+            "ledger_s": time_ledger(fill, prices, weights),
+            "compute_s": time_compute(fill, prices, weights),
+            "run_backtest_s": time_backtest(fill, prices, weights),
+        })
+
+    df = pd.DataFrame(rows).set_index("ledger")
+    print(df.to_string(float_format="{:.2f}".format))
+    print(f"\nmemory ratio: {df.bytes_per_trade.iloc[0] / df.bytes_per_trade.iloc[1]:.1f}x, "
+          f"ledger time ratio: {df.ledger_s.iloc[0] / df.ledger_s.iloc[1]:.1f}x, "
+          f"compute time ratio: {df.compute_s.iloc[0] / df.compute_s.iloc[1]:.1f}x, "
+          f"run_backtest time ratio: {df.run_backtest_s.iloc[0] / df.run_backtest_s.iloc[1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
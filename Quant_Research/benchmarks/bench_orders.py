@@ -0,0 +1,116 @@
+"""
+Order generation: per-date loop vs. vectorized `BuyOnlyPortfolio.buy_weighted`.
+
+Times `strategy.run` on synthetic prices for a grid of history lengths and
+universe sizes and prints the speedup of the vectorized path over the
+previous per-date/per-ticker loop.
+
+    python benchmarks/bench_orders.py
+"""
+from __future__ import annotations
+import time
+
+import numpy as np
+import pandas as pd
+
+from quant_backtest.portfolio import BuyOnlyPortfolio
+from quant_backtest.strategies.base import synthetic_index_level
+from quant_backtest.strategies.dca.simple_dca import MonthlyFixedBuy, first_trading_day_each_month
+from quant_backtest.strategies.dca.rolling_drawdown import RollingDrawdownBuy
+from quant_backtest.strategies.dca.peak_drawdown import PeakDrawdownBuy
+
+YEARS = [5, 10, 20]
+UNIVERSE = [2, 10, 50]
+
+
+def synthetic_prices(years: int, n_tickers: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = years * 252
+    idx = pd.bdate_range("2000-01-03", periods=n)
+    market = rng.normal(0.0003, 0.010, size=(n, 1))          # common factor so the index still draws down
+    rets = market + rng.normal(0.0, 0.008, size=(n, n_tickers))
+    cols = [f"T{i:04d}" for i in range(n_tickers)]
+    return pd.DataFrame(100.0 * np.cumprod(1.0 + rets, axis=0), index=idx, columns=cols)
+
+
+def _loop_buys(pf, prices, dates, amount_at, weights):
+    for dt in dates:
+        amount = amount_at(dt)
+        for tkr, w in weights.items():
+            px = float(prices.loc[dt, tkr])
+            pf.buy(dt, tkr, cash=amount * w, price=px)
+
+
+def loop_monthly(prices, weights, amount=100.0):
+    pf = BuyOnlyPortfolio(list(weights))
+    _loop_buys(pf, prices, first_trading_day_each_month(prices.index), lambda dt: amount, weights)
+    return pf
+
+
+def loop_rolling(prices, weights, window=21, threshold=0.02, k=1000.0):
+    pf = BuyOnlyPortfolio(list(weights))
+    level = synthetic_index_level(prices, weights)
+    roll_ret = (level / level.shift(window) - 1.0).fillna(0.0)
+    trigger = roll_ret <= -threshold
+    dates = [dt for dt in prices.index if bool(trigger.loc[dt])]
+    _loop_buys(pf, prices, dates, lambda dt: k * float(-roll_ret.loc[dt]), weights)
+    return pf
+
+
+def loop_peak(prices, weights, threshold=0.05, k=1000.0):
+    pf = BuyOnlyPortfolio(list(weights))
+    level = synthetic_index_level(prices, weights)
+    dd = level / level.cummax() - 1.0
+    trigger = dd <= -threshold
+    dates = [dt for dt in prices.index if bool(trigger.loc[dt])]
+    _loop_buys(pf, prices, dates, lambda dt: k * float(-dd.loc[dt]), weights)
+    return pf
+
+
+CASES = {
+    "strat1": (loop_monthly, lambda: MonthlyFixedBuy(100.0)),
+    "strat2": (loop_rolling, lambda: RollingDrawdownBuy(21, 0.02, "proportional", 50.0, 1000.0)),
+    "strat3": (loop_peak, lambda: PeakDrawdownBuy(0.05, "proportional", 50.0, 1000.0)),
+}
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    rows = []
+    for years in YEARS:
+        for n_tickers in UNIVERSE:
+            prices = synthetic_prices(years, n_tickers)
+            weights = {c: 1.0 / n_tickers for c in prices.columns}
+            for name, (loop_fn, make) in CASES.items():
+                strat = make()
+                pf_vec, _ = strat.run(prices, weights)
+                pf_loop = loop_fn(prices, weights)
+                assert pf_vec.trades_df().equals(pf_loop.trades_df()), f"{name}: trades differ"
+
+                t_loop = best_of(lambda: loop_fn(prices, weights))
+                t_vec = best_of(lambda: strat.run(prices, weights))
+                rows.append({
+                    "strategy": name,
+                    "years": years,
+                    "tickers": n_tickers,
+                    "trades": pf_vec.num_trades,
+                    "loop_s": t_loop,
+                    "vectorized_s": t_vec,
+                    "speedup": t_loop / t_vec,
+                })
+
+    df = pd.DataFrame(rows)
+    with pd.option_context("display.float_format", "{:.4f}".format, "display.width", 120):
+        print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+CLI startup: wall time of importing the run_strategy CLI and of `--help`,
+each in a fresh interpreter, plus a check that startup leaves the heavy
+optional modules (download libraries, numba, strategy modules) unimported.
+
+Fails (exit 1) when a lazy module is imported eagerly, or when a timing is
+more than --threshold slower than a baseline saved with --save.
+
+    python benchmarks/bench_startup.py [--repeats 7] [--save startup.json] [--baseline startup.json]
+"""
+from __future__ import annotations
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+# Imported only on demand: a download, or selecting a strategy
+LAZY_MODULES = [
+    "yfinance",
+    "pandas_datareader",
+    "numba",
+    "pandas",
+    "quant_backtest.strategies.dca.simple_dca",
+    "quant_backtest.strategies.dca.rolling_drawdown",
+    "quant_backtest.strategies.dca.peak_drawdown",
+    "quant_backtest.strategies.dca.budgeted_drawdown",
+]
+
+CASES = {
+    "python": [sys.executable, "-c", "pass"],
+    "import run_strategy": [sys.executable, "-c", "import quant_backtest.cli.run_strategy"],
+    "run_strategy --help": [sys.executable, "-m", "quant_backtest.cli.run_strategy", "--help"],
+}
+
+
+def best_time(cmd, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def eager_imports() -> list:
+    code = ("import sys, quant_backtest.cli.run_strategy as m; m.build_parser({}); "
+            f"print('\\n'.join(n for n in {LAZY_MODULES!r} if n in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return out.split()
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--repeats", type=int, default=7)
+    p.add_argument("--save", help="Write the timings to this JSON file (a baseline for later runs)")
+    p.add_argument("--baseline", help="JSON file from --save to compare against")
+    p.add_argument("--threshold", type=float, default=0.25, help="Relative slowdown counted as a regression")
+    args = p.parse_args()
+
+    timings = {name: best_time(cmd, args.repeats) for name, cmd in CASES.items()}
+    failed = False
+    for name, t in timings.items():
+        print(f"{name:<22} {t * 1000:8.1f} ms")
+
+    eager = eager_imports()
+    if eager:
+        failed = True
+        print(f"FAIL: imported at startup: {', '.join(eager)}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            base = json.load(f)
+        for name, t in timings.items():
+            if name in base and t > base[name] * (1.0 + args.threshold):
+                failed = True
+                print(f"FAIL: {name} {t * 1000:.1f} ms vs baseline {base[name] * 1000:.1f} ms")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(timings, f, indent=2)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Benchmark suite: backtester and simulator on offline synthetic GBM prices.
+
+`run` times, for every (years, tickers) case of the grid:
+
+    gbm                      gbm_price_paths for the case
+    simulator.<step>         the GBM simulator (Simulating_Data_GBM/gbm.py):
+                             GBMAssetSimulator / CorrelatedGBMSimulator
+                             generate_batch, GBMPaths.save and load_paths
+    strategy.<name>.run      each strategy's `run`
+    portfolio.daily_units    / portfolio.daily_value
+    metrics.<function>      every function in metrics.py (on the strat1 run)
+    run_backtest             end to end, CSV output, no result cache
+
+and appends one JSON line (environment, git commit, per-case timings) to
+the history file. `compare` matches two history entries case by case and
+flags benchmarks whose best time grew by more than the threshold; it exits
+with status 1 when there are regressions.
+
+    python benchmarks/suite.py run [--quick] [--label NAME] [--history benchmarks/history.jsonl]
+    python benchmarks/suite.py compare [--baseline LABEL|COMMIT|INDEX] [--current ...] [--threshold 0.2]
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from quant_backtest import metrics
+from quant_backtest.engine import run_backtest
+from quant_backtest.event_engine import HAVE_NUMBA
+from quant_backtest.montecarlo import gbm_price_paths
+from quant_backtest.strategies.dca.budgeted_drawdown import BudgetedDrawdownBuy
+from quant_backtest.strategies.dca.peak_drawdown import PeakDrawdownBuy
+from quant_backtest.strategies.dca.rolling_drawdown import RollingDrawdownBuy
+from quant_backtest.strategies.dca.simple_dca import MonthlyFixedBuy
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HISTORY = os.path.join(HERE, "history.jsonl")
+sys.path.insert(0, os.path.join(HERE, "..", "..", "Simulating_Data_GBM"))
+
+from gbm import CorrelatedGBMSimulator, GBMAssetSimulator, load_paths  # noqa: E402
+
+YEARS = [1, 10, 50]
+UNIVERSE = [2, 100, 1000]
+QUICK_YEARS = [1, 10]
+QUICK_UNIVERSE = [2, 100]
+
+STRATEGIES = [
+    MonthlyFixedBuy(100.0),
+    RollingDrawdownBuy(21, 0.05, "proportional", 50.0, 1000.0),
+    PeakDrawdownBuy(0.10, "fixed", 50.0, 1000.0),
+    BudgetedDrawdownBuy(100.0, 0.05, 50.0, 5),
+]
+
+
+def _universe(n_tickers: int):
+    """Drifts and vols spread across the universe, pairwise correlation 0.3."""
+    mu = np.linspace(0.04, 0.10, n_tickers)
+    sigma = np.linspace(0.12, 0.30, n_tickers)
+    corr = np.full((n_tickers, n_tickers), 0.3)
+    np.fill_diagonal(corr, 1.0)
+    return mu, sigma, corr
+
+
+def gbm_prices(years: int, n_tickers: int, seed: int = 0) -> pd.DataFrame:
+    """One GBM path per ticker over the `_universe` parameters."""
+    n_days = 252 * years
+    mu, sigma, corr = _universe(n_tickers)
+    px = gbm_price_paths(1, n_days, mu, sigma, corr, seed=seed)[0]
+    cols = [f"T{i:04d}" for i in range(n_tickers)]
+    return pd.DataFrame(px, index=pd.bdate_range("2000-01-03", periods=n_days), columns=cols)
+
+
+def _simulator_calls(years: int, n_tickers: int, directory: str) -> Dict[str, Callable]:
+    """The simulator's batch generators and its on-disk store, for `years` of business days."""
+    dates = pd.bdate_range("2000-01-03", periods=252 * years)
+    start, end = str(dates[0].date()), str(dates[-1].date())
+    mu, sigma, corr = _universe(n_tickers)
+    single = GBMAssetSimulator(start, end, directory, 5, 100.0, 0.08, 0.20, 1.5)
+    correlated = CorrelatedGBMSimulator(start, end, directory, 5, 100.0, mu, sigma, corr, 1.5)
+    paths = single.generate_batch(n_tickers, seed=0)
+    store = os.path.join(directory, "paths")
+    paths.save(store)
+    return {
+        "generate_batch": lambda: single.generate_batch(n_tickers, seed=0),
+        "correlated.generate_batch": lambda: correlated.generate_batch(seed=0),
+        "save": lambda: paths.save(store),
+        "load_paths": lambda: np.array(load_paths(store).close),
+    }
+
+
+def best_of(fn: Callable, min_time: float = 0.2, min_repeats: int = 3, max_repeats: int = 1000) -> List[float]:
+    """Wall times of repeated calls: at least `min_repeats` (one if a call takes over 2s) until `min_time` has passed."""
+    times: List[float] = []
+    while True:
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        total = sum(times)
+        if len(times) >= max_repeats or total >= 2.0 or (total >= min_time and len(times) >= min_repeats):
+            return times
+
+
+def _metric_calls(value: pd.Series, cashflows: pd.Series) -> Dict[str, Callable]:
+    v, cf = value.to_numpy(), cashflows.to_numpy()
+    total = float(-cf.sum())
+    flows = np.flatnonzero(cf)
+    cf_terminal = cf.copy()
+    cf_terminal[-1] += v[-1]
+    return {
+        "simple_return_pct": lambda: metrics.simple_return_pct(v[-1], total),
+        "max_drawdown": lambda: metrics.max_drawdown(value[value > 0]),
+        "drawdown_series": lambda: metrics.drawdown_series(value),
+        "twr_annualized": lambda: metrics.twr_annualized(value),
+        "cagr": lambda: metrics.cagr(value[value > 0]),
+        "xirr": lambda: metrics.xirr(cf_terminal[flows], flows / 252.0),
+        "xirr_batch": lambda: metrics.xirr_batch(cf_terminal[None, flows], flows / 252.0),
+        "try_irr": lambda: metrics.try_irr(cf_terminal),
+        "irr_annualized": lambda: metrics.irr_annualized(cashflows, v[-1]),
+        "irr_annualized_batch": lambda: metrics.irr_annualized_batch(cf[None, :], v[-1:]),
+        "compute_metrics": lambda: metrics.compute_metrics(v, cf),
+    }
+
+
+def run_case(years: int, n_tickers: int, min_time: float, with_metrics: bool = True) -> List[dict]:
+    out = []
+
+    def record(bench: str, fn: Callable):
+        times = best_of(fn, min_time=min_time)
+        out.append({"bench": bench, "years": years, "tickers": n_tickers, "best_s": min(times),
+                    "median_s": statistics.median(times), "repeats": len(times)})
+
+    record("gbm", lambda: gbm_prices(years, n_tickers))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, fn in _simulator_calls(years, n_tickers, tmp).items():
+            record(f"simulator.{name}", fn)
+    prices = gbm_prices(years, n_tickers)
+    weights = dict.fromkeys(prices.columns, 1.0 / n_tickers)
+
+    for s in STRATEGIES:
+        record(f"strategy.{s.name}.run", lambda s=s: s.run(prices, weights))
+
+    pf, _ = STRATEGIES[0].run(prices, weights)
+    record("portfolio.daily_units", lambda: pf.daily_units(prices.index))
+    record("portfolio.daily_value", lambda: pf.daily_value(prices))
+
+    if with_metrics:
+        value, cashflows = pf.daily_value(prices), pf.daily_cashflows(prices.index)
+        for name, fn in _metric_calls(value, cashflows).items():
+            record(f"metrics.{name}", fn)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        record("run_backtest", lambda: run_backtest(prices, weights, STRATEGIES[0], tmp, "bench"))
+    return out
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=HERE).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cmd_run(args):
+    years = args.years or (QUICK_YEARS if args.quick else YEARS)
+    universe = args.tickers or (QUICK_UNIVERSE if args.quick else UNIVERSE)
+    results = []
+    for y in years:
+        for n in universe:
+            t0 = time.perf_counter()
+            # metric inputs depend on the history length only, so they run on the smallest universe
+            results.extend(run_case(y, n, args.min_time, with_metrics=(n == min(universe))))
+            print(f"  {y:>3}y x {n:>4} tickers  {time.perf_counter() - t0:6.1f}s", file=sys.stderr)
+
+    entry = {
+        "timestamp": pd.Timestamp.now(tz="UTC").isoformat(timespec="seconds"),
+        "label": args.label,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "numba": HAVE_NUMBA,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+    with open(args.history, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+    table = pd.DataFrame(results).set_index(["bench", "years", "tickers"])["best_s"].unstack(["years", "tickers"])
+    print(table.to_string(float_format="{:.4g}".format))
+    print(f"Appended to {args.history}")
+
+
+def load_history(path: str) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def select(history: List[dict], ref: str) -> dict:
+    """History entry by index (e.g. -1), else the latest with that label or commit prefix."""
+    try:
+        return history[int(ref)]
+    except (ValueError, IndexError):
+        pass
+    for entry in reversed(history):
+        if entry.get("label") == ref or (entry.get("commit") or "").startswith(ref):
+            return entry
+    raise SystemExit(f"No history entry matches {ref!r}")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> pd.DataFrame:
+    key = ["bench", "years", "tickers"]
+    base = pd.DataFrame(baseline["results"]).set_index(key)["best_s"]
+    cur = pd.DataFrame(current["results"]).set_index(key)["best_s"]
+    table = pd.concat({"baseline_s": base, "current_s": cur}, axis=1, join="inner")
+    table["ratio"] = table["current_s"] / table["baseline_s"]
+    table["status"] = np.select(
+        [table["ratio"] > 1.0 + threshold, table["ratio"] < 1.0 / (1.0 + threshold)],
+        ["REGRESSION", "faster"], "",
+    )
+    return table
+
+
+def cmd_compare(args):
+    history = load_history(args.history)
+    if len(history) < 2 and args.baseline == "-2":
+        raise SystemExit("Need at least two runs in the history to compare.")
+    baseline, current = select(history, args.baseline), select(history, args.current)
+    table = compare(baseline, current, args.threshold)
+
+    def describe(e):
+        return f"{e['timestamp']} {e.get('label') or ''} {e.get('commit') or ''}".strip()
+
+    print(f"baseline: {describe(baseline)}")
+    print(f"current:  {describe(current)}")
+    print(table.to_string(float_format="{:.4g}".format))
+    regressions = table[table["status"] == "REGRESSION"]
+    print(f"{len(regressions)} regression(s) above {args.threshold:.0%} out of {len(table)} benchmarks")
+    return 1 if len(regressions) else 0
+
+
+def main():
+    p = argparse.ArgumentParser(description="Backtester / simulator benchmark suite.")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    r = sub.add_parser("run", help="Run the suite and append the timings to the history")
+    r.add_argument("--quick", action="store_true", help=f"Small grid: {QUICK_YEARS} years x {QUICK_UNIVERSE} tickers")
+    r.add_argument("--years", type=int, nargs="+", help=f"History lengths (default {YEARS})")
+    r.add_argument("--tickers", type=int, nargs="+", help=f"Universe sizes (default {UNIVERSE})")
+    r.add_argument("--min-time", type=float, default=0.2, help="Seconds to spend repeating each benchmark")
+    r.add_argument("--label", default=None, help="Name for this run, e.g. 'baseline'")
+    r.add_argument("--history", default=HISTORY)
+
+    c = sub.add_parser("compare", help="Flag regressions between two history entries")
+    c.add_argument("--baseline", default="-2", help="Index, label or commit prefix (default: previous run)")
+    c.add_argument("--current", default="-1", help="Index, label or commit prefix (default: latest run)")
+    c.add_argument("--threshold", type=float, default=0.20, help="Relative slowdown counted as a regression")
+    c.add_argument("--history", default=HISTORY)
+
+    args = p.parse_args()
+    if args.command == "run":
+        cmd_run(args)
+    else:
+        sys.exit(cmd_compare(args))
+
+
+if __name__ == "__main__":
+    main()
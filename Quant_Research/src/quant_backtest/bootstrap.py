@@ -0,0 +1,90 @@
+from __future__ import annotations
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .data import compute_returns
+
+METHODS = ("stationary", "circular")
+
+
+class BlockBootstrap:
+    """
+    Scenario generator resampling blocks of historical daily returns.
+
+    A scenario is an array of row indices into the (days x tickers) return
+    matrix, so every ticker is resampled on the same days and the cross-asset
+    structure is kept. Blocks wrap around the end of the history.
+
+        'stationary': a new block starts on each day with probability
+                      1 / block (geometric block lengths, Politis-Romano)
+        'circular':   fixed blocks of `block` days
+
+    Scenario i is drawn from its own child seed SeedSequence(seed,
+    spawn_key=(i,)), so scenarios are regenerated on demand, one id at a time
+    or in any batch, rather than stored.
+    """
+
+    def __init__(self, returns: pd.DataFrame, n_days: int, method: str = "stationary",
+                 block: float = 21.0, seed: int = 0):
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+        if block < 1:
+            raise ValueError("block must be at least 1 day")
+        if len(returns) < 2:
+            raise ValueError("need at least two return observations")
+        self.returns = returns
+        self.values = np.ascontiguousarray(returns.to_numpy(dtype=float))
+        self.n_days = int(n_days)
+        self.method = method
+        self.block = float(block)
+        self.seed = seed
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, n_days: int, **kwargs) -> "BlockBootstrap":
+        """
+        Returns of `prices` (e.g. `load_prices(...)`) over the dates where every
+        ticker has a price, dropping the leading zero row of `compute_returns`.
+        """
+        rets = compute_returns(prices.dropna(how="any")).iloc[1:]
+        return cls(rets, n_days, **kwargs)
+
+    @property
+    def tickers(self):
+        return list(self.returns.columns)
+
+    def _draw(self, scenario: int) -> np.ndarray:
+        rng = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(int(scenario),)))
+        n_obs, steps = len(self.values), self.n_days - 1
+        t = np.arange(steps)
+        if self.method == "stationary":
+            new_block = rng.random(steps) < 1.0 / self.block
+            new_block[0] = True
+        else:
+            new_block = t % int(self.block) == 0
+        starts = rng.integers(0, n_obs, size=steps)
+        block_start = np.maximum.accumulate(np.where(new_block, t, 0))
+        return ((starts[block_start] + t - block_start) % n_obs).astype(np.int32)
+
+    def indices(self, scenarios: Iterable[int]) -> np.ndarray:
+        """Return-row indices, shape (len(scenarios), n_days - 1), int32."""
+        ids = list(scenarios)
+        out = np.empty((len(ids), self.n_days - 1), dtype=np.int32)
+        for row, i in enumerate(ids):
+            out[row] = self._draw(i)
+        return out
+
+    def paths(self, scenarios: Iterable[int], init_price: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Price paths (len(scenarios), n_days, tickers) for `run_monte_carlo`;
+        day 0 is `init_price` (default 100 for every ticker).
+        """
+        idx = self.indices(scenarios)
+        init = np.broadcast_to(np.asarray(100.0 if init_price is None else init_price, dtype=float),
+                               (self.values.shape[1],))
+        out = np.empty((len(idx), self.n_days, self.values.shape[1]))
+        out[:, 0, :] = init
+        np.cumprod(1.0 + self.values[idx], axis=1, out=out[:, 1:, :])
+        out[:, 1:, :] *= init
+        return out
@@ -0,0 +1,43 @@
+from __future__ import annotations
+import argparse
+
+from ..data import load_prices
+from ..price_store import PriceStore
+from .run_strategy import load_yaml_config, source_arg
+
+def main():
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("--config", default=None, help="YAML config for the universe (tickers, start, end, source, cache)")
+    pre_args, remaining = pre.parse_known_args()
+    cfg = load_yaml_config(pre_args.config) if pre_args.config else {}
+
+    p = argparse.ArgumentParser(parents=[pre], description="Create or refresh a memory-mapped price store.")
+    p.add_argument("--store", default=cfg.get("price_store", "price_store"), help="Store directory")
+    p.add_argument("--tickers", nargs="+", default=cfg.get("tickers", ["SPY", "ACWI"]))
+    p.add_argument("--start", default=cfg.get("start", "2005-01-01"), help="History start for tickers new to the store")
+    p.add_argument("--end", default=cfg.get("end", None))
+    p.add_argument("--source", default=cfg.get("source", "auto"), type=source_arg)
+    p.add_argument("--cache", default=cfg.get("cache", "price_cache.parquet"))
+    p.add_argument("--capacity", type=int, default=None, help="Ticker columns to reserve when creating the store")
+    args = p.parse_args(remaining)
+
+    def fetch(tickers, start):
+        return load_prices(tickers, start=start, end=args.end, source=args.source, cache_path=args.cache)
+
+    if not PriceStore.exists(args.store):
+        store = PriceStore.create(args.store, fetch(args.tickers, args.start), capacity=args.capacity)
+    else:
+        store = PriceStore(args.store)
+        held = [t for t in args.tickers if t in store.tickers]
+        new = [t for t in args.tickers if t not in store.tickers]
+        if held and store.n_dates:
+            # refresh from the last stored day: a revised close there rewrites the store, later days are appended
+            store.append(fetch(held, str(store.index[-1].date())))
+        if new:
+            store.append(fetch(new, args.start))
+
+    print(f"{args.store}: {len(store.tickers)} tickers x {store.n_dates} dates "
+          f"({store.index.min().date()} .. {store.index.max().date()})")
+
+if __name__ == "__main__":
+    main()
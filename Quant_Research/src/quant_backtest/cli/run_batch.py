@@ -0,0 +1,152 @@
+from __future__ import annotations
+import argparse
+import glob
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from ..data import load_prices
+from ..engine import compute_backtest, write_outputs
+from ..profiling import Profiler, span
+from ..shared_prices import SharedPrices
+from .run_strategy import (
+    load_yaml_config, build_parser, build_weights, build_strategy, build_result_cache, build_profiler, make_run_name,
+)
+
+# Per-worker view of the shared price blocks, keyed by (source, cache, store)
+_SHARED: Dict[Tuple[str, str, str], SharedPrices] = {}
+
+def expand_configs(patterns: List[str]) -> List[str]:
+    paths = []
+    for pat in patterns:
+        matches = sorted(glob.glob(pat)) if glob.has_magic(pat) else [pat]
+        if not matches:
+            print(f"No configs match {pat!r}")
+        paths.extend(m for m in matches if m not in paths)
+    return paths
+
+def resolve_run(config_path: str):
+    """Resolve a YAML config into the same args `run_strategy` would use."""
+    cfg = load_yaml_config(config_path)
+    if "grid" in cfg:
+        return None  # sweep config, see cli/run_sweep.py
+    args = build_parser(cfg).parse_args([])
+    if not args.strategy:
+        raise SystemExit(f"{config_path}: missing 'strategy:'")
+    build_weights(args)  # validate early, before any worker starts
+    return args
+
+def run_names(runs: List[tuple], ts: str) -> List[str]:
+    """Run name of every (config, args); two runs writing the same outputs is an error."""
+    names = [make_run_name(args, path, ts) for path, args in runs]
+    targets: Dict[Tuple[str, str], List[str]] = {}
+    for (path, args), name in zip(runs, names):
+        targets.setdefault((os.path.abspath(args.out), name), []).append(path)
+    clashes = [f"{name} in {out}: {', '.join(paths)}" for (out, name), paths in targets.items() if len(paths) > 1]
+    if clashes:
+        raise SystemExit("Runs would write the same outputs (give them distinct run_name: or out:):\n  "
+                         + "\n  ".join(clashes))
+    return names
+
+def _price_key(args) -> Tuple[str, str, str]:
+    return (args.source, args.cache, args.price_store)
+
+def load_shared_prices(runs: List[tuple]) -> Dict[Tuple[str, str, str], SharedPrices]:
+    """Load the union of tickers once per (source, cache, store) and publish it in shared memory."""
+    groups: Dict[Tuple[str, str, str], list] = {}
+    for _, args in runs:
+        groups.setdefault(_price_key(args), []).append(args)
+
+    shared = {}
+    for (source, cache, store), group in groups.items():
+        tickers = list(dict.fromkeys(t for a in group for t in a.tickers))
+        start = min(str(a.start) for a in group)
+        ends = [a.end for a in group]
+        end = None if any(e is None for e in ends) else max(str(e) for e in ends)
+        prices = load_prices(tickers, start=start, end=end, source=source, cache_path=cache, store_path=store)
+        shared[(source, cache, store)] = SharedPrices.create(prices)
+    return shared
+
+def _init_worker(shared: Dict[Tuple[str, str, str], SharedPrices]):
+    _SHARED.clear()
+    _SHARED.update(shared)
+
+def _run_one(config_path: str, args, run_name: str) -> dict:
+    with build_profiler(args, run_name) as prof, span("total"):
+        frame = _SHARED[_price_key(args)].frame()
+        prices = frame.loc[str(args.start): (str(args.end) if args.end else None), list(args.tickers)].dropna(how="all")
+
+        result = compute_backtest(
+            prices=prices,
+            weights=build_weights(args),
+            strategy=build_strategy(args),
+            cache=build_result_cache(args),
+        )
+        csv_path, trades_path, metrics_path = write_outputs(result, args.out, run_name, args.format)
+    shutil.copyfile(config_path, os.path.join(args.out, f"{run_name}.config.yml"))
+
+    row = {"run_name": run_name, "config": config_path, **result.metrics,
+           "timeseries_path": csv_path, "trades_path": trades_path, "metrics_path": metrics_path}
+    if prof is not None:
+        prof.write_json(os.path.join(args.out, f"{run_name}.profile.json"))
+        row["profile"] = prof.report()
+    return row
+
+def main():
+    p = argparse.ArgumentParser(description="Run many YAML run configs across a process pool.")
+    p.add_argument("configs", nargs="+", help="Config paths or globs, e.g. 'runs/*.yml'")
+    p.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    p.add_argument("--out", default="outputs", help="Directory for the combined batch summary")
+    p.add_argument("--profile", action="store_true",
+                   help="Profile every run and write a batch_profile__<ts>.json summed over runs")
+    p.add_argument("--profile-memory", action="store_true", help="With --profile, also track peak memory per stage")
+    args = p.parse_args()
+
+    runs = []
+    for path in expand_configs(args.configs):
+        run_args = resolve_run(path)
+        if run_args is None:
+            print(f"Skipping sweep config: {path}")
+            continue
+        if args.profile:
+            run_args.profile = True
+            run_args.profile_memory = run_args.profile_memory or args.profile_memory
+        runs.append((path, run_args))
+    if not runs:
+        raise SystemExit("No runnable configs.")
+
+    ts = pd.Timestamp.today().strftime("%Y%m%d_%H%M%S")
+    names = run_names(runs, ts)
+    batch_profile = Profiler()
+    with batch_profile.span("load_prices"):
+        shared = load_shared_prices(runs)
+    rows = []
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(shared,)) as pool:
+            futures = {
+                pool.submit(_run_one, path, run_args, name): path
+                for (path, run_args), name in zip(runs, names)
+            }
+            for fut in as_completed(futures):
+                row = fut.result()
+                batch_profile.merge(row.pop("profile", {}))
+                rows.append(row)
+                print(f"[{len(rows)}/{len(runs)}] {row['run_name']}")
+    finally:
+        for handle in shared.values():
+            handle.unlink()
+
+    os.makedirs(args.out, exist_ok=True)
+    summary = pd.DataFrame(rows).sort_values("config").reset_index(drop=True)
+    summary_path = os.path.join(args.out, f"batch_summary__{ts}.csv")
+    summary.to_csv(summary_path, index=False)
+    print("Wrote:")
+    print(" ", summary_path)
+    if args.profile:
+        print(" ", batch_profile.write_json(os.path.join(args.out, f"batch_profile__{ts}.json")))
+
+if __name__ == "__main__":
+    main()
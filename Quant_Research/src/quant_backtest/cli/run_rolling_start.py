@@ -0,0 +1,57 @@
+from __future__ import annotations
+import argparse
+import os
+import shutil
+
+import pandas as pd
+
+from ..data import load_prices
+from ..rolling_start import rolling_start
+from ..strategies.dca.simple_dca import first_trading_day_each_month
+from .run_strategy import build_parser, build_strategy, build_weights, load_yaml_config, make_run_name
+
+def main():
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("--config", default=None, help="Path to YAML run config")
+    pre_args, remaining = pre.parse_known_args()
+
+    cfg = {}
+    if pre_args.config:
+        cfg = load_yaml_config(pre_args.config)
+
+    p = build_parser(cfg, parents=[pre])
+    p.description = "Results of a run started on every date (or month) of the history."
+    p.add_argument("--every", choices=["bar", "month"], default=cfg.get("every", "month"),
+                   help="Start on every bar, or on the first trading day of every month")
+    p.add_argument("--horizon", type=int, default=cfg.get("horizon", None),
+                   help="Bars held from each start (default: to the end of the history)")
+    args = p.parse_args(remaining)
+
+    if not args.strategy:
+        raise SystemExit("Missing strategy. Provide positional strategy or set 'strategy:' in the config file.")
+    weights = build_weights(args)
+
+    ts = pd.Timestamp.today().strftime("%Y%m%d_%H%M%S")
+    run_name = make_run_name(args, pre_args.config, ts)
+
+    prices = load_prices(args.tickers, start=args.start, end=args.end, source=args.source, cache_path=args.cache,
+                         store_path=args.price_store)
+    starts = first_trading_day_each_month(prices.index) if args.every == "month" else None
+
+    try:
+        table = rolling_start(prices, weights, build_strategy(args), starts=starts, horizon=args.horizon)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    os.makedirs(args.out, exist_ok=True)
+    table_path = os.path.join(args.out, f"{run_name}.rolling_start.csv")
+    table.to_csv(table_path, index=False)
+    if pre_args.config:
+        shutil.copyfile(pre_args.config, os.path.join(args.out, f"{run_name}.config.yml"))
+
+    print(f"Evaluated {len(table)} start dates")
+    print("Wrote:")
+    print(" ", table_path)
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,21 @@
 from __future__ import annotations
 import argparse
+import contextlib
 import os
 import shutil
 import hashlib
+from datetime import datetime
 from pathlib import Path
-import pandas as pd
 try:
     import yaml
 except ImportError:
     yaml = None
 
-from ..data import load_prices
-from ..engine import run_backtest
-from ..strategies.dca.simple_dca import MonthlyFixedBuy
-from ..strategies.dca.rolling_drawdown import RollingDrawdownBuy
-from ..strategies.dca.peak_drawdown import PeakDrawdownBuy
+from ..profiling import profiling, span
+from ..strategies import registry
+
+# pandas, the engine and the strategy modules are imported inside the
+# functions that need them, so --help and argument errors stay fast.
 
 def load_yaml_config(path: str) -> dict:
     if yaml is None:
@@ -32,21 +33,23 @@ def file_sha256(path: str) -> str:
 def basename_no_ext(path: str) -> str:
     return Path(path).stem
 
-def main():
-    # 1) Minimal parser to grab --config early
-    pre = argparse.ArgumentParser(add_help=False)
-    pre.add_argument("--config", default=None, help="Path to YAML run config")
-    pre_args, remaining = pre.parse_known_args()
+def source_arg(value: str) -> str:
+    if value.lower() in ("auto", "yahoo", "stooq") or value.lower().startswith("csv:"):
+        return value
+    raise argparse.ArgumentTypeError(f"invalid source {value!r}")
 
-    cfg = {}
-    if pre_args.config:
-        cfg = load_yaml_config(pre_args.config)
+def param_arg(value: str) -> tuple:
+    key, sep, raw = value.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {value!r}")
+    return key, (yaml.safe_load(raw) if yaml is not None else raw)
 
-    # 2) Full parser, using config values as defaults
-    p = argparse.ArgumentParser(parents=[pre])
+def build_parser(cfg: dict, parents=(), parser_class=argparse.ArgumentParser) -> argparse.ArgumentParser:
+    """Full run parser, using config values as defaults."""
+    p = parser_class(parents=list(parents))
     p.add_argument(
         "strategy",
-        choices=["strat1", "strat2", "strat3"],
+        choices=registry.names(),
         default=cfg.get("strategy", None),
         nargs="?",
         help="Strategy to run (or set in config file).",
@@ -54,14 +57,35 @@ def main():
 
     p.add_argument("--start", default=cfg.get("start", "2005-01-01"))
     p.add_argument("--end", default=cfg.get("end", None))
-    p.add_argument("--source", default=cfg.get("source", "auto"), choices=["auto", "yahoo", "stooq"])
+    p.add_argument("--source", default=cfg.get("source", "auto"), type=source_arg,
+                   help="auto | yahoo | stooq | csv:<directory of TICKER.csv files>")
     p.add_argument("--cache", default=cfg.get("cache", "price_cache.parquet"))
+    p.add_argument("--price-store", default=cfg.get("price_store", None),
+                   help="Memory-mapped price store to read prices from instead of --source/--cache "
+                        "(see cli/build_store.py)")
     p.add_argument("--out", default=cfg.get("out", "outputs"))
+    p.add_argument("--format", choices=["csv", "parquet"], default=cfg.get("format", "csv"),
+                   help="csv: per-run files; parquet: append to the <out>/results dataset")
     p.add_argument("--run-name", default=cfg.get("run_name", None))
+    p.add_argument("--result-cache", default=cfg.get("result_cache", ".result_cache"),
+                   help="Directory of cached backtest results")
+    p.add_argument("--result-cache-mb", type=float, default=cfg.get("result_cache_mb", 1024),
+                   help="Size cap of the result cache; least recently used entries are evicted")
+    p.add_argument("--no-result-cache", action="store_true", default=cfg.get("no_result_cache", False),
+                   help="Bypass the result cache and always recompute")
+    p.add_argument("--profile", action="store_true", default=cfg.get("profile", False),
+                   help="Write a <run_name>.profile.json stage timing report to --out")
+    p.add_argument("--profile-memory", action="store_true", default=cfg.get("profile_memory", False),
+                   help="With --profile, also record peak traced memory per stage (slower)")
+    p.add_argument("--profile-pstats", action="store_true", default=cfg.get("profile_pstats", False),
+                   help="With --profile, also dump cProfile stats to <run_name>.pstats")
 
     # universe/weights
     p.add_argument("--tickers", nargs="+", default=cfg.get("tickers", ["SPY", "ACWI"]))
     p.add_argument("--weights", nargs="+", type=float, default=cfg.get("weights", [0.7, 0.3]))
+    p.add_argument("--weights-file", default=cfg.get("weights_file"),
+                   help="Time-varying weights (.csv/.parquet with date, ticker, weight columns); "
+                        "replaces --tickers/--weights")
 
     # strat1 params
     p.add_argument("--amount", type=float, default=cfg.get("amount", 100.0))
@@ -73,58 +97,123 @@ def main():
     p.add_argument("--fixed", type=float, default=cfg.get("fixed", 50.0))
     p.add_argument("--k", type=float, default=cfg.get("k", 1000.0))
 
+    # strat4 params (threshold and --fixed as the per-buy amount are shared with strat3)
+    p.add_argument("--budget", type=float, default=cfg.get("budget", 100.0),
+                   help="Cash added to the drawdown budget each month")
+    p.add_argument("--cooldown", type=int, default=cfg.get("cooldown", 5),
+                   help="Minimum bars between drawdown buys")
+    p.add_argument("--max-position", type=float, default=cfg.get("max_position", float("inf")),
+                   help="No buys beyond this market value of holdings")
+    p.add_argument("--no-rollover", action="store_true", default=cfg.get("no_rollover", False),
+                   help="Reset the budget each month instead of carrying it over")
+
+    # plugin strategy params, passed to the constructor by the default Strategy.from_args
+    p.add_argument("--param", dest="params", type=param_arg, action="append",
+                   default=list((cfg.get("params") or {}).items()), metavar="KEY=VALUE",
+                   help="Strategy keyword argument (repeatable); values are parsed as YAML")
+    return p
+
+def build_weights(args):
+    """Weights dict from --tickers/--weights, or a `WeightSchedule` from --weights-file."""
+    if args.weights_file:
+        from ..weights import WeightSchedule
+        schedule = WeightSchedule.read(args.weights_file)
+        args.tickers = schedule.tickers   # load prices for every ticker the schedule ever holds
+        return schedule
+    if len(args.tickers) != len(args.weights):
+        raise SystemExit("--tickers and --weights must have the same length.")
+    return dict(zip(args.tickers, args.weights))
+
+def build_strategy(args):
+    return registry.create(args.strategy, args)
+
+def build_result_cache(args):
+    if args.no_result_cache:
+        return None
+    from ..result_cache import ResultCache
+    return ResultCache(args.result_cache, max_bytes=int(args.result_cache_mb * 1024 * 1024))
+
+def build_profiler(args, run_name: str):
+    """`profiling()` context for --profile runs, a no-op context otherwise."""
+    if not args.profile:
+        return contextlib.nullcontext()
+    pstats_path = os.path.join(args.out, f"{run_name}.pstats") if args.profile_pstats else None
+    return profiling(memory=args.profile_memory, pstats_path=pstats_path)
+
+def make_run_name(args, config_path: str | None, ts: str | None) -> str:
+    # run_name: CLI overrides config; else derive from config filename; append timestamp
+    # (ts None: a fixed name, for --incremental runs that are updated in place)
+    if args.run_name:
+        name = args.run_name
+    elif config_path:
+        name = basename_no_ext(config_path)
+    else:
+        name = args.strategy
+    return name if ts is None else f"{name}__{ts}"
+
+def main():
+    # 1) Minimal parser to grab --config early
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("--config", default=None, help="Path to YAML run config")
+    pre_args, remaining = pre.parse_known_args()
+
+    cfg = {}
+    if pre_args.config:
+        cfg = load_yaml_config(pre_args.config)
+
+    # 2) Full parser, using config values as defaults
+    p = build_parser(cfg, parents=[pre])
+    p.add_argument("--incremental", action="store_true", default=cfg.get("incremental", False),
+                   help="Keep the run under a fixed name (no timestamp) with a state checkpoint, and on "
+                        "later invocations only compute and append the bars added since")
     args = p.parse_args(remaining)
 
     # If strategy omitted on CLI, require it from config
     if not args.strategy:
         raise SystemExit("Missing strategy. Provide positional strategy or set 'strategy:' in the config file.")
 
-    # Build weights dict (and sanity-check)
-    if len(args.tickers) != len(args.weights):
-        raise SystemExit("--tickers and --weights must have the same length.")
-    weights = dict(zip(args.tickers, args.weights))
+    # Build weights (and sanity-check)
+    weights = build_weights(args)
 
-    # Build a timestamp once
-    ts = pd.Timestamp.today().strftime("%Y%m%d_%H%M%S")
+    from ..data import load_prices
+    from ..engine import run_backtest
 
-    # run_name: CLI overrides config; else derive from config filename; always append timestamp
-    if args.run_name:
-        run_name = f"{args.run_name}__{ts}"
-    elif pre_args.config:
-        run_name = f"{basename_no_ext(pre_args.config)}__{ts}"
-    else:
-        run_name = f"{args.strategy}__{ts}"
-
-    # Load prices
-    prices = load_prices(args.tickers, start=args.start, end=args.end, source=args.source, cache_path=args.cache)
-
-    # Instantiate strategy
-    if args.strategy == "strat1":
-        strat = MonthlyFixedBuy(amount_per_month=args.amount)
-    elif args.strategy == "strat2":
-        strat = RollingDrawdownBuy(
-            window_days=args.window,
-            threshold=args.threshold,
-            mode=args.mode,
-            fixed_amount=args.fixed,
-            k=args.k,
-        )
-    else:
-        strat = PeakDrawdownBuy(
-            threshold=args.threshold,
-            mode=args.mode,
-            fixed_amount=args.fixed,
-            k=args.k,
-        )
-
-    # Run
-    csv_path, trades_path, metrics_path = run_backtest(
-        prices=prices,
-        weights=weights,
-        strategy=strat,
-        out_dir=args.out,
-        run_name=run_name,
-    )
+    # Build a timestamp once
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_name = make_run_name(args, pre_args.config, None if args.incremental else ts)
+    appended = None
+
+    with build_profiler(args, run_name) as prof, span("total"):
+        # Load prices
+        with span("load_prices"):
+            prices = load_prices(args.tickers, start=args.start, end=args.end, source=args.source, cache_path=args.cache,
+                                 store_path=args.price_store)
+
+        # Instantiate strategy
+        strat = build_strategy(args)
+
+        # Run
+        if args.incremental:
+            from ..incremental import run_incremental
+            (csv_path, trades_path, metrics_path), appended = run_incremental(
+                prices=prices,
+                weights=weights,
+                strategy=strat,
+                out_dir=args.out,
+                run_name=run_name,
+                fmt=args.format,
+                cache=build_result_cache(args),
+            )
+        else:
+            csv_path, trades_path, metrics_path = run_backtest(
+                prices=prices,
+                weights=weights,
+                strategy=strat,
+                out_dir=args.out,
+                run_name=run_name,
+                fmt=args.format,
+                cache=build_result_cache(args),
+            )
 
     # If config was used, copy it next to outputs with matching prefix
     if pre_args.config:
@@ -132,10 +221,14 @@ def main():
         shutil.copyfile(pre_args.config, config_copy_path)
         print("Config saved:", config_copy_path)
 
+    if args.incremental:
+        print("Full run, checkpointed" if appended is None else f"Appended {appended} new bars")
     print("Wrote:")
     print(" ", csv_path)
     print(" ", trades_path)
     print(" ", metrics_path)
+    if prof is not None:
+        print(" ", prof.write_json(os.path.join(args.out, f"{run_name}.profile.json")))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
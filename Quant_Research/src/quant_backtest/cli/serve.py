@@ -0,0 +1,324 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..data import load_prices
+from ..engine import compute_backtest
+from ..shared_prices import SharedPrices
+from ..strategies import registry
+from ..strategies.base import synthetic_index_level
+from ..sweep import SWEEP_DEFAULTS, run_sweep
+from .run_strategy import load_yaml_config, build_parser, build_weights, build_strategy, source_arg
+
+MAX_BODY = 1 << 20
+
+# Per-worker state: the shared price block and the memo of derived series
+_SHARED: Optional[SharedPrices] = None
+_DERIVED: Optional["LRU"] = None
+
+class LRU:
+    """Least-recently-used memo with hit / miss counters."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+def _init_worker(shared: SharedPrices, memo_size: int):
+    global _SHARED, _DERIVED
+    _SHARED = shared
+    _DERIVED = LRU(memo_size)
+
+def _init_process(shared: SharedPrices, memo_size: int):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)   # Ctrl-C stops the server, which shuts the pool down
+    _init_worker(shared, memo_size)
+
+def _ping() -> int:
+    return os.getpid()
+
+# Run config keys a request may set; the rest (paths, sources, outputs, profiling) are the server's
+REQUEST_FIELDS = frozenset({
+    "strategy", "tickers", "weights", "start", "end",
+    "amount", "window", "threshold", "mode", "fixed", "k",
+    "budget", "cooldown", "max_position", "no_rollover", "params",
+})
+
+class _RequestParser(argparse.ArgumentParser):
+    """Run parser that reports bad values as ValueError instead of printing usage and exiting."""
+
+    def error(self, message):
+        raise ValueError(message)
+
+def _resolve(payload: dict, extra: Tuple[str, ...] = ()):
+    """Run arguments for a request body, resolved like a YAML run config."""
+    unknown = set(payload) - REQUEST_FIELDS - set(extra)
+    if unknown:
+        raise ValueError(f"unknown request fields: {sorted(unknown)}")
+    if payload.get("strategy") not in registry.names():
+        raise ValueError(f"unknown strategy {payload.get('strategy')!r}; available: {registry.names()}")
+    args = build_parser(payload, parser_class=_RequestParser).parse_args([])
+    try:
+        weights = build_weights(args)
+    except SystemExit as e:
+        raise ValueError(str(e)) from None
+    return args, weights
+
+def _derived(args, weights) -> Tuple[pd.DataFrame, pd.Series]:
+    """Price slice and synthetic index level of a request, memoized per (tickers, weights, dates)."""
+    if isinstance(weights, dict):
+        weights_key = tuple(weights.items())
+    else:
+        weights_key = (args.weights_file, os.stat(args.weights_file).st_mtime_ns)
+    key = (tuple(args.tickers), weights_key, str(args.start), str(args.end) if args.end else None)
+    hit = _DERIVED.get(key)
+    if hit is None:
+        frame = _SHARED.frame()
+        missing = [t for t in args.tickers if t not in frame.columns]
+        if missing:
+            raise ValueError(f"tickers not loaded by the server: {missing}")
+        prices = frame.loc[str(args.start): (str(args.end) if args.end else None), list(args.tickers)].dropna(how="all")
+        if prices.empty:
+            raise ValueError("no prices in the requested date range")
+        hit = (prices, synthetic_index_level(prices, weights))
+        _DERIVED.put(key, hit)
+    return hit
+
+def _finite(metrics: dict) -> dict:
+    return {k: (None if isinstance(v, float) and not math.isfinite(v) else v) for k, v in metrics.items()}
+
+def _plain(frame: pd.DataFrame) -> pd.DataFrame:
+    """Python scalars with None for NaN / inf, ready for json.dumps."""
+    frame = frame.replace([np.inf, -np.inf], np.nan)
+    return frame.astype(object).where(frame.notna(), None)
+
+def run_backtest_request(payload: dict) -> bytes:
+    """POST /backtest: a `run_strategy` run; `series` / `trades` add the output tables."""
+    args, weights = _resolve(payload, extra=("series", "trades"))
+    prices, _ = _derived(args, weights)
+    result = compute_backtest(prices, weights, build_strategy(args))
+    out = {"metrics": _finite(result.metrics)}
+    if payload.get("series"):
+        ts = result.timeseries
+        out["timeseries"] = {"index": ts.index.strftime("%Y-%m-%d").tolist(), "columns": list(ts.columns),
+                             "data": _plain(ts).to_numpy().tolist()}
+    if payload.get("trades"):
+        trades = result.trades.assign(date=result.trades["date"].dt.strftime("%Y-%m-%d"))
+        out["trades"] = _plain(trades).to_dict(orient="records")
+    return json.dumps(out).encode()
+
+def run_sweep_request(payload: dict) -> bytes:
+    """POST /sweep: a `run_sweep` grid; scalar parameters act as fixed axes, as in sweep configs."""
+    args, weights = _resolve(payload, extra=("grid", "chunk_size"))
+    if args.strategy not in SWEEP_DEFAULTS:
+        raise ValueError(f"sweep supports {sorted(SWEEP_DEFAULTS)}, got {args.strategy!r}")
+    if not isinstance(weights, dict):
+        raise ValueError("sweeps take static weights")
+    grid = dict(payload.get("grid") or {})
+    for key in SWEEP_DEFAULTS[args.strategy]:
+        if key in payload and key not in grid:
+            grid[key] = [payload[key]]
+    prices, level = _derived(args, weights)
+    table = run_sweep(prices, weights, args.strategy, grid,
+                      chunk_size=int(payload.get("chunk_size", 256)), level=level.to_numpy())
+    return json.dumps({"rows": _plain(table).to_dict(orient="records")}).encode()
+
+ROUTES = {"/backtest": run_backtest_request, "/sweep": run_sweep_request}
+
+class BacktestServer:
+    """
+    HTTP/JSON front end over prices loaded once into shared memory.
+
+    Runs execute in a pool of `workers` processes (in one background thread
+    when `workers` is 0). At most `workers + queue_size` runs are admitted at
+    a time; further requests get 503 with Retry-After instead of queueing
+    without bound. Responses are memoized by request body, and each worker
+    memoizes price slices and index levels per (tickers, weights, dates).
+    """
+
+    def __init__(self, shared: SharedPrices, workers: int = 1, queue_size: int = 32, memo_size: int = 256):
+        self.shared = shared
+        self.workers = workers
+        self.max_pending = max(workers, 1) + queue_size
+        self.pending = 0
+        self.responses = LRU(memo_size)
+        self.counts: Dict[str, int] = {"requests": 0, "rejected": 0, "errors": 0}
+        if workers > 0:
+            self.pool = ProcessPoolExecutor(workers, initializer=_init_process, initargs=(shared, memo_size))
+            for f in [self.pool.submit(_ping) for _ in range(workers)]:
+                f.result()  # start the workers now, not on the first request
+        else:
+            _init_worker(shared, memo_size)
+            self.pool = ThreadPoolExecutor(1)
+
+    def stats(self) -> dict:
+        frame = self.shared.frame()
+        return {**self.counts, "pending": self.pending, "max_pending": self.max_pending, "workers": self.workers,
+                "memo_hits": self.responses.hits, "memo_misses": self.responses.misses,
+                "tickers": list(frame.columns), "start": str(frame.index.min().date()),
+                "end": str(frame.index.max().date())}
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, bytes, dict]:
+        """(status, JSON body, extra headers) for one request."""
+        if method == "GET" and path in ("/health", "/stats"):
+            return 200, json.dumps(self.stats() if path == "/stats" else {"ok": True}).encode(), {}
+        fn = ROUTES.get(path)
+        if fn is None:
+            return 404, _error(f"no route {path}"), {}
+        if method != "POST":
+            return 405, _error(f"{path} takes POST"), {"Allow": "POST"}
+
+        self.counts["requests"] += 1
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError as e:
+            return 400, _error(f"invalid JSON: {e}"), {}
+        if not isinstance(payload, dict):
+            return 400, _error("request body must be a JSON object"), {}
+
+        key = (path, json.dumps(payload, sort_keys=True))
+        cached = self.responses.get(key)
+        if cached is not None:
+            return 200, cached, {"X-Cache": "hit"}
+        if self.pending >= self.max_pending:
+            self.counts["rejected"] += 1
+            return 503, _error("server busy"), {"Retry-After": "1"}
+
+        self.pending += 1
+        try:
+            out = await asyncio.get_running_loop().run_in_executor(self.pool, fn, payload)
+        except (ValueError, KeyError, TypeError) as e:
+            self.counts["errors"] += 1
+            return 400, _error(str(e)), {}
+        except Exception as e:
+            self.counts["errors"] += 1
+            return 500, _error(f"{type(e).__name__}: {e}"), {}
+        finally:
+            self.pending -= 1
+        self.responses.put(key, out)
+        return 200, out, {"X-Cache": "miss"}
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                t0 = time.perf_counter()
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                    headers = {}
+                    while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        name, _, value = h.decode("latin-1").partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                    length = int(headers.get("content-length") or 0)
+                    if not 0 <= length <= MAX_BODY:
+                        raise ValueError(f"body of {length} bytes")
+                except ValueError as e:
+                    _write(writer, 400, _error(f"bad request: {e}"), {}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, out, extra = await self.handle(method, target.partition("?")[0], body)
+                extra["X-Elapsed-Ms"] = f"{(time.perf_counter() - t0) * 1000:.1f}"
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                _write(writer, status, out, extra, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix: Optional[str] = None):
+        if unix:
+            server = await asyncio.start_unix_server(self._connection, path=unix)
+        else:
+            server = await asyncio.start_server(self._connection, host, port)
+        where = unix or f"http://{host}:{port}"
+        print(f"Serving {len(self.shared.columns)} tickers x {self.shared.shape[0]} dates on {where}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+def _error(message: str) -> bytes:
+    return json.dumps({"error": message}).encode()
+
+def _write(writer: asyncio.StreamWriter, status: int, body: bytes, extra: dict, keep_alive: bool):
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+              500: "Internal Server Error", 503: "Service Unavailable"}[status]
+    headers = {"Content-Type": "application/json", "Content-Length": str(len(body)),
+               "Connection": "keep-alive" if keep_alive else "close", **extra}
+    head = f"HTTP/1.1 {status} {reason}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+    writer.write(head.encode("latin-1") + body)
+
+def main():
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("--config", default=None, help="YAML config for the price universe (tickers, start, end, source, cache)")
+    pre_args, remaining = pre.parse_known_args()
+    cfg = load_yaml_config(pre_args.config) if pre_args.config else {}
+
+    p = argparse.ArgumentParser(parents=[pre], description="Serve backtests and sweeps over HTTP/JSON from prices loaded once.")
+    p.add_argument("--tickers", nargs="+", default=cfg.get("tickers", ["SPY", "ACWI"]),
+                   help="Universe to load; requests may use any subset")
+    p.add_argument("--start", default=cfg.get("start", "2005-01-01"))
+    p.add_argument("--end", default=cfg.get("end", None))
+    p.add_argument("--source", default=cfg.get("source", "auto"), type=source_arg)
+    p.add_argument("--cache", default=cfg.get("cache", "price_cache.parquet"))
+    p.add_argument("--price-store", default=cfg.get("price_store", None),
+                   help="Memory-mapped price store to read prices from instead of --source/--cache")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--unix", default=None, help="Listen on this Unix socket instead of TCP")
+    p.add_argument("--workers", type=int, default=os.cpu_count(),
+                   help="Worker processes for runs (0: one background thread in the server process)")
+    p.add_argument("--queue-size", type=int, default=32,
+                   help="Runs that may wait for a worker; beyond that requests get 503")
+    p.add_argument("--memo-size", type=int, default=256, help="Memoized responses (and derived series per worker)")
+    args = p.parse_args(remaining)
+
+    prices = load_prices(args.tickers, start=args.start, end=args.end, source=args.source, cache_path=args.cache,
+                         store_path=args.price_store)
+    shared = SharedPrices.create(prices)
+    server = None
+    try:
+        server = BacktestServer(shared, workers=args.workers, queue_size=args.queue_size, memo_size=args.memo_size)
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.close()
+        shared.unlink()
+
+if __name__ == "__main__":
+    main()
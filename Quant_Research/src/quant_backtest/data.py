@@ -1,112 +1,90 @@
 from __future__ import annotations
-import time
-from typing import List, Optional, Dict
+import warnings
+from typing import List, Optional, Union
 
 import numpy as np
 import pandas as pd
 
-try:
-    import yfinance as yf
-except Exception:
-    yf = None
-
-try:
-    from pandas_datareader import data as pdr
-except Exception:
-    pdr = None
-
-
-def _download_yahoo(ticker: str, start: str, end: Optional[str], session=None, tries=4, sleep_base=3) -> pd.Series:
-    if yf is None:
-        raise RuntimeError("yfinance not installed/available.")
-    last_err = None
-    for attempt in range(tries):
-        try:
-            df = yf.download(
-                ticker, start=start, end=end,
-                auto_adjust=True, progress=False,
-                threads=False, session=session
-            )
-            if df is None or df.empty:
-                raise RuntimeError(f"Empty Yahoo frame for {ticker}")
-            return df["Close"].rename(ticker)
-        except Exception as e:
-            last_err = e
-            msg = str(e)
-            if "Too Many Requests" in msg and attempt < tries - 1:
-                time.sleep(sleep_base * (attempt + 1))
+from .price_cache import PriceCache
+from .price_store import PriceStore
+from .sources import PriceSource, fetch_many, resolve_source
+from .weights import WeightSchedule, Weights
+
+
+def _fill_cache(cache: PriceCache, tickers: List[str], start: str, end: Optional[str], source: PriceSource, max_workers: int):
+    """Fetch only the date ranges the cache does not hold yet and append them."""
+    today = pd.Timestamp.today().normalize()
+    gaps = [(t, lo, hi) for t in tickers for lo, hi in cache.missing(t, start, end)]
+    trailing = [hi >= today for _, _, hi in gaps]
+    requests = [
+        (t, str(lo.date()), None if trail else str((hi + pd.Timedelta(days=1)).date()))
+        for (t, lo, hi), trail in zip(gaps, trailing)
+    ]
+    results = fetch_many(requests, source, max_workers=max_workers)
+
+    for (t, lo, hi), trail, closes in zip(gaps, trailing, results):
+        if isinstance(closes, Exception):
+            if not cache.ranges(t):
+                raise closes
+            if not (trail and "Empty" in str(closes)):  # no new bars yet is not worth a warning
+                warnings.warn(f"Could not refresh {t} for {lo.date()}..{hi.date()}, using cached data: {closes}")
+            continue
+        closes = closes[(closes.index >= lo) & (closes.index < hi + pd.Timedelta(days=1))]
+        if trail:
+            # Ranges reaching today are only held up to the last bar actually published
+            if not len(closes):
                 continue
-            raise RuntimeError(f"Yahoo failed for {ticker}: {e}") from e
-    raise RuntimeError(f"Yahoo failed for {ticker}: {last_err}")
+            hi = closes.index.max().normalize()
+        cache.append(t, closes, lo, hi)
 
 
-def _download_stooq(ticker: str, start: str, end: Optional[str]) -> pd.Series:
-    if pdr is None:
-        raise RuntimeError("pandas-datareader not installed/available.")
-    sym = f"{ticker}.US"
-    df = pdr.DataReader(sym, "stooq", start=start, end=end)
-    if df is None or df.empty:
-        raise RuntimeError(f"Empty Stooq frame for {ticker}")
-    df = df.sort_index()
-    return df["Close"].rename(ticker)
+def _drop_empty_rows(prices: pd.DataFrame) -> pd.DataFrame:
+    """`dropna(how="all")` that slices (keeping a view) unless an all-NaN row sits between held days."""
+    held = np.flatnonzero(prices.notna().to_numpy().any(axis=1))
+    if not len(held):
+        return prices.iloc[:0]
+    trimmed = prices.iloc[held[0]: held[-1] + 1]
+    if len(held) == len(trimmed):
+        return trimmed
+    return trimmed.iloc[held - held[0]]
 
 
 def load_prices(
     tickers: List[str],
     start: str,
     end: Optional[str],
-    source: str = "auto",
+    source: Union[str, PriceSource] = "auto",
     cache_path: Optional[str] = None,
+    max_workers: int = 8,
+    store_path: Optional[str] = None,
 ) -> pd.DataFrame:
     """
     Returns a DataFrame of close prices (columns=tickers, index=trading dates).
-    Uses optional parquet cache.
+    With `cache_path`, prices come from a per-ticker range-aware parquet store
+    (see PriceCache); only missing tickers / date ranges are downloaded.
+    Downloads run concurrently on `max_workers` threads behind each source's
+    shared rate limiter (see sources.py); `source` may be a PriceSource.
+    With `store_path`, prices are served straight from that memory-mapped
+    PriceStore (no downloads or parquet reads); the frame is a view of the
+    map when the tickers are contiguous in the store and no day inside the
+    range is missing for all of them (leading / trailing ones are sliced off).
     """
-    if cache_path:
-        try:
-            cached = pd.read_parquet(cache_path)
-            if set(tickers).issubset(set(cached.columns)):
-                return cached.loc[:, tickers].dropna(how="all")
-        except Exception:
-            pass
-
-    chosen = source.lower()
-    session = None
-    if yf is not None:
-        try:
-            session = yf.utils.get_yf_session()
-        except Exception:
-            session = None
-
-    out = []
-    used: Dict[str, str] = {}
-
-    for t in tickers:
-        if chosen in ("yahoo", "auto"):
-            try:
-                out.append(_download_yahoo(t, start, end, session=session))
-                used[t] = "yahoo"
-                continue
-            except Exception:
-                if chosen == "yahoo":
-                    raise
+    if store_path:
+        return _drop_empty_rows(PriceStore(store_path).frame(tickers, start, end))
 
-        if chosen in ("stooq", "auto"):
-            out.append(_download_stooq(t, start, end))
-            used[t] = "stooq"
-            continue
-
-        raise RuntimeError(f"Failed all sources for {t}")
-
-    prices = pd.concat(out, axis=1).dropna(how="all")
+    src = resolve_source(source)
 
     if cache_path:
-        try:
-            prices.to_parquet(cache_path)
-        except Exception:
-            pass
+        cache = PriceCache(cache_path)
+        _fill_cache(cache, tickers, start, end, src, max_workers)
+        return cache.read(tickers, start, end).dropna(how="all")
+
+    out = fetch_many([(t, start, end) for t in tickers], src, max_workers=max_workers)
+    for series in out:
+        if isinstance(series, Exception):
+            raise series
 
-    return prices
+    return pd.concat(out, axis=1).dropna(how="all")
 
 
 def compute_returns(prices: pd.DataFrame) -> pd.DataFrame:
@@ -114,6 +92,8 @@ def compute_returns(prices: pd.DataFrame) -> pd.DataFrame:
     return prices.pct_change().fillna(0.0)
 
 
-def weighted_portfolio_return(asset_rets: pd.DataFrame, weights: dict[str, float]) -> pd.Series:
+def weighted_portfolio_return(asset_rets: pd.DataFrame, weights: Weights) -> pd.Series:
+    if isinstance(weights, WeightSchedule):
+        return weights.weighted_return(asset_rets)
     w = pd.Series(weights)
     return (asset_rets * w).sum(axis=1)
\ No newline at end of file
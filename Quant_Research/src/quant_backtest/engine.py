@@ -1,84 +1,159 @@
 from __future__ import annotations
 import os
 import json
+from dataclasses import dataclass
 import pandas as pd
 
 from .portfolio import BuyOnlyPortfolio
-from .metrics import (
-    drawdown_series, max_drawdown, simple_return_pct, twr_annualized, irr_annualized
-)
+from .metrics import compute_metrics
+from .profiling import span
+from .results import append_run
 from quant_backtest.strategies.base import Strategy
+from .weights import Weights
 
-def run_backtest(
+OUTPUT_FORMATS = ("csv", "parquet")
+
+@dataclass
+class BacktestResult:
+    timeseries: pd.DataFrame   # indexed by date
+    trades: pd.DataFrame
+    metrics: dict
+
+def compute_backtest(
     prices: pd.DataFrame,
-    weights: dict[str, float],
+    weights: Weights,
     strategy: Strategy,
-    out_dir: str,
-    run_name: str,
-):
-    os.makedirs(out_dir, exist_ok=True)
+    cache=None,
+) -> BacktestResult:
+    """
+    Run `strategy` and build the output tables and metrics. With a
+    `ResultCache`, a stored result for the same prices / weights / strategy /
+    package version is returned without recomputing, and misses are stored.
+    """
+    if cache is None:
+        return _compute_backtest(prices, weights, strategy)
+    with span("cache.get"):
+        key = cache.key(prices, weights, strategy)
+        result = cache.get(key)
+    if result is None:
+        result = _compute_backtest(prices, weights, strategy)
+        with span("cache.put"):
+            cache.put(key, result)
+    return result
 
-    pf, result = strategy.run(prices=prices, portfolio_weights=weights)
+def _compute_backtest(prices: pd.DataFrame, weights: Weights, strategy: Strategy) -> BacktestResult:
+    with span("strategy.run"):
+        pf, result = strategy.run(prices=prices, portfolio_weights=weights)
 
     # Core series
-    value = pf.daily_value(prices)
-    cashflows = pf.daily_cashflows(prices.index)          # negative on buy days
-    contrib = (-cashflows).clip(lower=0.0)                # positive contributions
-    cum_contrib = contrib.cumsum()
+    with span("portfolio.daily_value"):
+        value = pf.daily_value(prices)
+        cashflows = pf.daily_cashflows(prices.index)      # negative on buy days
+        contrib = (-cashflows).clip(lower=0.0)            # positive contributions
+    with span("metrics"):
+        m = compute_metrics(value.to_numpy(), cashflows.to_numpy())
 
     # Positions (units per ticker)
-    units = pf.daily_units(prices.index)
-    total_units = units.sum(axis=1)  # not super meaningful across tickers, but useful; keep per-ticker too
+    with span("portfolio.daily_units"):
+        units = pf.daily_units(prices.index)
+
+    with span("build_outputs"):
+        out = build_timeseries(value, contrib, m, units, result.extra_series)
+        trades = pf.trades_df()
 
-    # Performance series
-    dd_portfolio = drawdown_series(value)
+    metrics = build_metrics(strategy.name, out.index, m, pf.num_trades)
+    return BacktestResult(timeseries=out, trades=trades, metrics=metrics)
 
-    # Build output frame
+def build_timeseries(value: pd.Series, contrib: pd.Series, m: dict, units: pd.DataFrame, extra_series: dict) -> pd.DataFrame:
+    """Timeseries table of a run: value, flows, drawdown, units per ticker and the strategy's extra series."""
     out = pd.DataFrame({
         "portfolio_value": value,
         "contribution": contrib,
-        "cumulative_contributions": cum_contrib,
-        "portfolio_drawdown": dd_portfolio,
-    }, index=prices.index)
+        "cumulative_contributions": m["cumulative_contributions"],
+        "portfolio_drawdown": m["drawdown"],
+    }, index=value.index)
 
-    # Add units columns
-    for tkr in units.columns:
-        out[f"units_{tkr}"] = units[tkr]
-    out["units_total"] = total_units
+    # Add units columns (in one concat; per-column inserts fragment wide universes)
+    out = pd.concat([out, units.add_prefix("units_")], axis=1)
+    out["units_total"] = units.sum(axis=1)  # not super meaningful across tickers, but useful; keep per-ticker too
 
     # Add any extra diagnostic series from strategy
-    for k, s in result.extra_series.items():
+    for k, s in extra_series.items():
         out[k] = s.reindex(out.index).astype(float)
+    return out
 
-    # Metrics (end-of-period)
-    total_contrib = float(contrib.sum())
-    final_value = float(value.iloc[-1])
-    md, md_peak, md_trough = max_drawdown(value)
-
-    metrics = {
-        "strategy": strategy.name,
-        "start": str(out.index.min().date()),
-        "end": str(out.index.max().date()),
-        "total_contributions": total_contrib,
-        "terminal_value": final_value,
-        "simple_return_pct": simple_return_pct(final_value, total_contrib),
-        "twr_annualized": twr_annualized(value),
-        "irr_annualized": irr_annualized(cashflows, terminal_value=final_value),
-        "max_drawdown_pct": md * 100.0,
-        "max_dd_peak": str(md_peak.date()),
-        "max_dd_trough": str(md_trough.date()),
-        "num_trades": int(len(pf.trades)),
+def build_metrics(strategy_name: str, index: pd.DatetimeIndex, m: dict, num_trades: int) -> dict:
+    """End-of-period metrics of a run; `m` as from `compute_metrics` (peak / trough as positions in `index`)."""
+    return {
+        "strategy": strategy_name,
+        "start": str(index.min().date()),
+        "end": str(index.max().date()),
+        "total_contributions": float(m["total_contributions"]),
+        "terminal_value": float(m["terminal_value"]),
+        "simple_return_pct": float(m["simple_return_pct"]),
+        "twr_annualized": float(m["twr_annualized"]),
+        "irr_annualized": float(m["irr_annualized"]),
+        "max_drawdown_pct": float(m["max_drawdown"]) * 100.0,
+        "max_dd_peak": str(index[m["max_dd_peak"]].date()),
+        "max_dd_trough": str(index[m["max_dd_trough"]].date()),
+        "volatility_annualized": float(m["volatility_annualized"]),
+        "sortino": float(m["sortino"]),
+        "calmar": float(m["calmar"]),
+        "num_trades": int(num_trades),
     }
 
-    # Write outputs
+def write_csv_outputs(result: BacktestResult, out_dir: str, run_name: str):
+    os.makedirs(out_dir, exist_ok=True)
+
     csv_path = os.path.join(out_dir, f"{run_name}.timeseries.csv")
-    out.to_csv(csv_path, index=True)
+    result.timeseries.to_csv(csv_path, index=True)
 
     trades_path = os.path.join(out_dir, f"{run_name}.trades.csv")
-    pf.trades_df().to_csv(trades_path, index=False)
+    result.trades.to_csv(trades_path, index=False)
 
     metrics_path = os.path.join(out_dir, f"{run_name}.metrics.json")
     with open(metrics_path, "w") as f:
-        json.dump(metrics, f, indent=2)
+        json.dump(result.metrics, f, indent=2)
+
+    return csv_path, trades_path, metrics_path
+
+def write_outputs(result: BacktestResult, out_dir: str, run_name: str, fmt: str = "csv"):
+    """
+    'csv': <run_name>.timeseries.csv / .trades.csv / .metrics.json in out_dir.
+    'parquet': append the run to the dataset under out_dir (see results.py).
+    Returns the (timeseries, trades, metrics) paths written.
+    """
+    if fmt == "csv":
+        with span("write_outputs"):
+            return write_csv_outputs(result, out_dir, run_name)
+    if fmt == "parquet":
+        with span("write_outputs"):
+            return append_run(out_dir, run_name, result)
+    raise ValueError(f"format must be one of {OUTPUT_FORMATS}, got {fmt!r}")
+
+def run_backtest(
+    prices: pd.DataFrame,
+    weights: Weights,
+    strategy: Strategy,
+    out_dir: str,
+    run_name: str,
+    fmt: str = "csv",
+    cache=None,
+):
+    """
+    Compute (or fetch from `cache`) and write one run. With a cache and CSV
+    output, a hit copies the stored CSV trio instead of re-rendering it.
+    """
+    if cache is None or fmt != "csv":
+        result = compute_backtest(prices, weights, strategy, cache=cache)
+        return write_outputs(result, out_dir, run_name, fmt)
 
-    return csv_path, trades_path, metrics_path
\ No newline at end of file
+    with span("cache.restore_csv"):
+        key = cache.key(prices, weights, strategy)
+        paths = cache.restore_csv(key, out_dir, run_name)
+    if paths is None:
+        result = compute_backtest(prices, weights, strategy, cache=cache)
+        paths = write_outputs(result, out_dir, run_name, fmt)
+        with span("cache.store_csv"):
+            cache.store_csv(key, paths)
+    return paths
\ No newline at end of file
@@ -0,0 +1,143 @@
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+from .portfolio import BuyOnlyPortfolio
+from .strategies.base import Strategy, StrategyResult, synthetic_index_level
+from .strategies.dca.simple_dca import first_trading_day_each_month, new_month_flags
+
+HAVE_NUMBA = njit is not None
+
+
+def jit(fn):
+    """Compile `fn` with numba when it is installed; otherwise run it as plain Python."""
+    return njit(fn) if HAVE_NUMBA else fn
+
+
+@jit
+def _event_loop(kernel, level, px, weights, new_month, state, params, units, t0):
+    n, m = px.shape
+    spend = np.zeros(n)
+    for t in range(n):
+        value = 0.0
+        for j in range(m):
+            if px[t, j] > 0:
+                value += units[j] * px[t, j]
+        cash = kernel(t0 + t, level[t], new_month[t], value, state, params)
+        if cash > 0:
+            spend[t] = cash
+            for j in range(m):
+                if px[t, j] > 0:
+                    units[j] += cash * weights[j] / px[t, j]
+    return spend
+
+
+def run_events(kernel, level: np.ndarray, px: np.ndarray, weights: np.ndarray, new_month: np.ndarray,
+               state: np.ndarray, params: np.ndarray, units: Optional[np.ndarray] = None, t0: int = 0) -> np.ndarray:
+    """
+    Drive a per-bar `kernel` over one history and return the cash spent on
+    each bar. On bar t the engine calls
+
+        kernel(t, level[t], new_month[t], value, state, params) -> cash
+
+    where `value` is the market value of the fills so far at bar t's prices,
+    `state` is a float array the kernel updates in place (budgets, cooldown
+    clocks, ...) and `params` its read-only parameters. A positive return is
+    bought at bar t's close, split by `weights` as in `buy_weighted`.
+    With numba both the loop and a `jit`-decorated kernel are compiled.
+
+    To continue a history, pass the `units` held so far (updated in place
+    with the new fills) and `t0`, the bar number of level[0].
+    """
+    if units is None:
+        units = np.zeros(np.shape(px)[1])
+    return _event_loop(
+        kernel,
+        np.ascontiguousarray(level, dtype=np.float64),
+        np.ascontiguousarray(px, dtype=np.float64),
+        np.ascontiguousarray(weights, dtype=np.float64),
+        np.ascontiguousarray(new_month, dtype=np.bool_),
+        state,
+        params,
+        units,
+        int(t0),
+    )
+
+
+class EventStrategy(Strategy):
+    """
+    Strategy whose buys depend on its own earlier fills. Subclasses provide a
+    `jit`-decorated `kernel` (see `run_events`), `params()` and the initial
+    `state()`; `run` drives the kernel over the synthetic index and books the
+    resulting spend into a `BuyOnlyPortfolio`.
+    """
+    kernel = None
+
+    def params(self) -> np.ndarray:
+        raise NotImplementedError
+
+    def state(self) -> np.ndarray:
+        raise NotImplementedError
+
+    def run(self, prices: pd.DataFrame, portfolio_weights: dict[str, float]):
+        if not isinstance(portfolio_weights, dict):
+            raise TypeError(f"{type(self).__name__} takes a static weights dict")
+        tickers = list(portfolio_weights.keys())
+        pf = BuyOnlyPortfolio(tickers)
+
+        index_level = synthetic_index_level(prices, portfolio_weights)
+        new_month = prices.index.isin(first_trading_day_each_month(prices.index))
+        spend = run_events(
+            self.kernel,
+            index_level.to_numpy(),
+            prices.loc[:, tickers].to_numpy(dtype=float),
+            np.array(list(portfolio_weights.values()), dtype=float),
+            new_month,
+            self.state(),
+            self.params(),
+        )
+
+        trigger = spend > 0
+        pf.buy_weighted(prices, trigger, spend, portfolio_weights)
+
+        extra = {
+            "spend": pd.Series(spend, index=prices.index),
+            "trigger": pd.Series(trigger.astype(int), index=prices.index),
+        }
+        return pf, StrategyResult(extra_series=extra)
+
+    def initial_state(self) -> dict:
+        return {"state": self.state().tolist(), "units": None, "t": 0, "last_date": None}
+
+    def extend(self, state, prices, portfolio_weights, level):
+        if not isinstance(portfolio_weights, dict):
+            raise TypeError(f"{type(self).__name__} takes a static weights dict")
+        tickers = list(portfolio_weights.keys())
+        kernel_state = np.array(state["state"], dtype=float)
+        units = np.zeros(len(tickers)) if state["units"] is None else np.array(state["units"], dtype=float)
+        spend = run_events(
+            self.kernel,
+            level,
+            prices.loc[:, tickers].to_numpy(dtype=float),
+            np.array(list(portfolio_weights.values()), dtype=float),
+            new_month_flags(prices.index, state["last_date"]),
+            kernel_state,
+            self.params(),
+            units=units,
+            t0=state["t"],
+        )
+        trigger = spend > 0
+        new_state = {
+            "state": kernel_state.tolist(),
+            "units": units.tolist(),
+            "t": state["t"] + len(prices),
+            "last_date": str(prices.index[-1]) if len(prices) else state["last_date"],
+        }
+        return trigger, spend, {"spend": spend, "trigger": trigger.astype(int)}, new_state
@@ -0,0 +1,250 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .data import compute_returns, weighted_portfolio_return
+from .engine import BacktestResult, build_metrics, build_timeseries, compute_backtest, write_outputs
+from .metrics import MetricState
+from .portfolio import BuyOnlyPortfolio
+from .profiling import span
+from .result_cache import _hash_run
+from .results import extend_run, run_paths
+from .strategies.base import Strategy, synthetic_index_level
+from .weights import WeightSchedule, Weights, weight_tickers
+
+STATE_VERSION = 1
+
+
+def state_path(out_dir: str, run_name: str) -> str:
+    return os.path.join(out_dir, f"{run_name}.state.json")
+
+
+def _csv_paths(out_dir: str, run_name: str) -> Tuple[str, str, str]:
+    return tuple(os.path.join(out_dir, f"{run_name}.{part}") for part in ("timeseries.csv", "trades.csv", "metrics.json"))
+
+
+def history_keys(prices: pd.DataFrame, weights: Weights, strategy: Strategy, n: int) -> Tuple[str, str]:
+    """
+    Checkpoint keys of prices.iloc[:n] and of all of `prices` for this weights
+    / strategy / package version. Dates and values are hashed row-major, so
+    the prefix key falls out of one pass over the history.
+    """
+    h = hashlib.sha256()
+    _hash_run(h, weights, strategy)
+    idx = pd.DatetimeIndex(prices.index)
+    h.update(str(idx.tz).encode())
+    h.update(json.dumps([str(c) for c in prices.columns]).encode())
+    run = h.hexdigest()
+
+    dates = idx.as_unit("ns").asi8
+    values = np.ascontiguousarray(prices.to_numpy(dtype=np.float64))
+    hd, hv = hashlib.sha256(), hashlib.sha256()
+    keys = []
+    for a, b in ((0, n), (n, len(prices))):
+        hd.update(dates[a:b].tobytes())
+        hv.update(values[a:b])
+        keys.append(hashlib.sha256(f"{run}{hd.hexdigest()}{hv.hexdigest()}".encode()).hexdigest())
+    return keys[0], keys[1]
+
+
+def _next_levels(prices: pd.DataFrame, weights: Weights, level: float) -> np.ndarray:
+    """Synthetic index levels of prices.iloc[1:], continuing from `level` on prices.index[0]."""
+    if isinstance(weights, WeightSchedule):
+        port_ret = weights.portfolio_return(prices)
+    else:
+        port_ret = weighted_portfolio_return(compute_returns(prices), weights)
+    return np.cumprod(np.r_[level, 1.0 + port_ret.to_numpy()[1:]])[1:]
+
+
+def checkpoint(prices: pd.DataFrame, weights: Weights, strategy: Strategy, result: BacktestResult) -> dict:
+    """
+    State needed to extend `result` (a full run over `prices`) by later bars:
+    the strategy's signal state, the last index level, units held, the
+    running metric totals and the key of the price history it covers.
+    """
+    level = synthetic_index_level(prices, weights).to_numpy()
+    _, _, _, strategy_state = strategy.extend(strategy.initial_state(), prices, weights, level)
+
+    ts, trades = result.timeseries, result.trades
+    pos = prices.index.get_indexer(pd.DatetimeIndex(trades["date"]))
+    cashflows = np.bincount(pos, weights=trades["cash"].to_numpy(dtype=float), minlength=len(prices))
+    metrics = MetricState()
+    metrics.extend(ts["portfolio_value"].to_numpy(dtype=float), cashflows)
+    held = ts[[f"units_{t}" for t in weight_tickers(weights)]].to_numpy(dtype=float)[-1]
+    return {
+        "version": STATE_VERSION,
+        "key": history_keys(prices, weights, strategy, len(prices))[0],
+        "n": len(prices),
+        "last_date": str(prices.index[-1]),
+        "level": float(level[-1]),
+        "strategy": strategy_state,
+        "held": held.tolist(),
+        "num_trades": int(result.metrics["num_trades"]),
+        "metrics": metrics.to_state(),
+        "columns": list(ts.columns),
+        "rows": [len(ts), len(trades)],
+    }
+
+
+def extend_backtest(
+    prices: pd.DataFrame,
+    weights: Weights,
+    strategy: Strategy,
+    state: dict,
+) -> Tuple[pd.DataFrame, pd.DataFrame, dict, dict]:
+    """
+    Bars prices.iloc[state["n"]:] of a run checkpointed over the earlier rows.
+    Returns their timeseries rows and trades, the metrics of the whole run
+    and the new state (whose "key" the caller sets, see `history_keys`); the
+    rows equal the tail of a full recompute over `prices`, and the metrics
+    its metrics.
+    """
+    n = state["n"]
+    new = prices.iloc[n:]
+    tickers = weight_tickers(weights)
+
+    with span("strategy.extend"):
+        level = _next_levels(prices.iloc[n - 1:], weights, state["level"])
+        trigger, amount, extra, strategy_state = strategy.extend(state["strategy"], new, weights, level)
+        pf = BuyOnlyPortfolio(tickers)
+        pf.buy_weighted(new, trigger, amount, weights)
+
+    with span("portfolio.daily_value"):
+        held = np.array(state["held"], dtype=float)
+        value = pf.daily_value(new, initial=held)
+        # flows and units are float once the run has any fill (integer zeros before), as in a full run
+        traded = state["num_trades"] + pf.num_trades > 0
+        cashflows = pf.daily_cashflows(new.index)
+        if traded:
+            cashflows = cashflows.astype(np.float64)
+        contrib = (-cashflows).clip(lower=0.0)
+        units = pd.DataFrame(pf.units_matrix(new.index, initial=held if traded else None),
+                             index=new.index, columns=tickers)
+
+    with span("metrics"):
+        running = MetricState.from_state(state["metrics"])
+        m = running.extend(value.to_numpy(), cashflows.to_numpy())
+
+    with span("build_outputs"):
+        extra_series = {k: pd.Series(v, index=new.index) for k, v in extra.items()}
+        rows = build_timeseries(value, contrib, m, units, extra_series)[state["columns"]]
+        # pandas sums a one-row frame differently, so sum with the carried holdings row in front
+        with_held = np.vstack([held.astype(units.dtypes.iloc[0]), units.to_numpy()])
+        rows["units_total"] = pd.DataFrame(with_held).sum(axis=1).to_numpy()[1:]
+        trades = pf.trades_df()
+        num_trades = state["num_trades"] + pf.num_trades
+        metrics = build_metrics(strategy.name, prices.index, running.metrics(), num_trades)
+
+    new_state = {
+        **state,
+        "n": len(prices),
+        "last_date": str(prices.index[-1]),
+        "level": float(level[-1]),
+        "strategy": strategy_state,
+        "held": units.to_numpy()[-1].tolist(),
+        "num_trades": num_trades,
+        "metrics": running.to_state(),
+        "rows": [state["rows"][0] + len(rows), state["rows"][1] + len(trades)],
+    }
+    return rows, trades, metrics, new_state
+
+
+def load_state(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_state(path: str, state: dict):
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+def _plausible(state: Optional[dict], prices: pd.DataFrame, fmt: str, paths) -> bool:
+    """Cheap checks that `state` may checkpoint a prefix of `prices` (the key check follows)."""
+    if state is None or state.get("version") != STATE_VERSION or state.get("format") != fmt:
+        return False
+    n = state["n"]
+    if not 0 < n <= len(prices) or str(prices.index[n - 1]) != state["last_date"]:
+        return False
+    return all(os.path.exists(p) for p in paths)
+
+
+def _append_csv(out_dir: str, run_name: str, rows: pd.DataFrame, trades: pd.DataFrame, metrics: dict, sizes):
+    ts_path, trades_path, metrics_path = paths = _csv_paths(out_dir, run_name)
+    # cut anything an interrupted update appended after the checkpoint, then append
+    for path, frame, size, index in ((ts_path, rows, sizes[0], True), (trades_path, trades, sizes[1], False)):
+        os.truncate(path, size)
+        if len(frame):
+            frame.to_csv(path, mode="a", header=False, index=index)
+    with open(metrics_path, "w") as f:
+        json.dump(metrics, f, indent=2)
+    return paths
+
+
+def run_incremental(
+    prices: pd.DataFrame,
+    weights: Weights,
+    strategy: Strategy,
+    out_dir: str,
+    run_name: str,
+    fmt: str = "csv",
+    cache=None,
+):
+    """
+    Bring run `run_name` in `out_dir` up to date with `prices`. When its
+    checkpoint (<run_name>.state.json) covers an unchanged prefix of `prices`
+    for the same weights, strategy and package version, only the later bars
+    are computed and appended to the outputs; otherwise the run is computed
+    in full and checkpointed. Strategies without `extend` always run in full.
+    Returns the output paths and the number of bars appended (None after a
+    full run).
+    """
+    path = state_path(out_dir, run_name)
+    out_paths = _csv_paths(out_dir, run_name) if fmt == "csv" else run_paths(out_dir, run_name)
+    state = load_state(path)
+
+    usable = _plausible(state, prices, fmt, out_paths)
+    if usable:
+        with span("incremental.check"):
+            prefix_key, key = history_keys(prices, weights, strategy, state["n"])
+        usable = prefix_key == state["key"]
+    if usable:
+        appended = len(prices) - state["n"]
+        if appended == 0:
+            return out_paths, 0
+        rows, trades, metrics, new_state = extend_backtest(prices, weights, strategy, state)
+        new_state["key"] = key
+        # a run's first fills turn the zeros of its earlier rows from int to float: rewrite it instead
+        usable = state["num_trades"] > 0 or len(trades) == 0
+
+    if usable:
+        with span("write_outputs"):
+            if fmt == "csv":
+                paths = _append_csv(out_dir, run_name, rows, trades, metrics, state["bytes"])
+            else:
+                paths = extend_run(out_dir, run_name, rows, trades, metrics, keep=state["rows"])
+        state = new_state
+    else:
+        if os.path.exists(path):
+            os.remove(path)   # the outputs are rewritten; the old checkpoint no longer describes them
+        result = compute_backtest(prices, weights, strategy, cache=cache)
+        paths = write_outputs(result, out_dir, run_name, fmt)
+        appended = None
+        try:
+            state = checkpoint(prices, weights, strategy, result)
+        except NotImplementedError:
+            return paths, None
+
+    state["format"] = fmt
+    if fmt == "csv":
+        state["bytes"] = [os.path.getsize(paths[0]), os.path.getsize(paths[1])]
+    save_state(path, state)
+    return paths, appended
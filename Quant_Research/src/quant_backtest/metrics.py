@@ -2,6 +2,8 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
+from .profiling import span
+
 def simple_return_pct(final_value: float, total_contrib: float) -> float:
     if total_contrib == 0:
         return np.nan
@@ -33,21 +35,370 @@ def cagr(portfolio_value: pd.Series, periods_per_year: int = 252) -> float:
     years = n / periods_per_year
     return float(total ** (1.0 / years) - 1.0)
 
+# Brackets for y = ln(1 + rate) * span, i.e. log growth over the whole flow span
+_IRR_BRACKETS = [(-20.0, 20.0), (-200.0, 200.0), (-700.0, 700.0)]
+
+def _npv_and_slope(x: np.ndarray, cf: np.ndarray, tau: np.ndarray):
+    disc = np.exp(-x[:, None] * tau)
+    npv = (cf * disc).sum(axis=1)
+    slope = -(tau * cf * disc).sum(axis=1)
+    return npv, slope
+
+def _irr_guess(cf: np.ndarray, tau: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """
+    Starting point: treat the outflows and the inflows as single flows at their
+    amount-weighted mean times, which solves in closed form. Falls back to the
+    bracket midpoint when that is undefined or outside the bracket.
+    """
+    out_amt = np.clip(-cf, 0.0, None).sum(axis=1)
+    in_amt = np.clip(cf, 0.0, None).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_out = (np.clip(-cf, 0.0, None) * tau).sum(axis=1) / out_amt
+        t_in = (np.clip(cf, 0.0, None) * tau).sum(axis=1) / in_amt
+        guess = np.log(in_amt / out_amt) / (t_in - t_out)
+    ok = np.isfinite(guess) & (guess > lo) & (guess < hi)
+    return np.where(ok, guess, 0.5 * (lo + hi))
+
+def _irr_newton(cf: np.ndarray, tau: np.ndarray, tol: float, maxiter: int) -> np.ndarray:
+    """
+    Bracketed (safeguarded) Newton on y = ln(1 + rate) * span for every row of
+    (runs x flows) arrays with times scaled to [0, 1]; steps that leave the
+    bracket fall back to bisection.
+    Rows with no sign change over the widest bracket come back NaN.
+    """
+    n = cf.shape[0]
+    lo = np.full(n, np.nan)
+    hi = np.full(n, np.nan)
+    f_lo = np.full(n, np.nan)
+    for a, b in _IRR_BRACKETS:
+        todo = np.flatnonzero(np.isnan(lo))
+        if not len(todo):
+            break
+        fa, _ = _npv_and_slope(np.full(len(todo), a), cf[todo], tau[todo])
+        fb, _ = _npv_and_slope(np.full(len(todo), b), cf[todo], tau[todo])
+        ok = np.sign(fa) * np.sign(fb) < 0
+        lo[todo[ok]], hi[todo[ok]], f_lo[todo[ok]] = a, b, fa[ok]
+
+    active = ~np.isnan(lo)
+    x = np.where(active, _irr_guess(cf, tau, lo, hi), np.nan)
+    for _ in range(maxiter):
+        rows = np.flatnonzero(active)
+        if not len(rows):
+            break
+        # only rows still iterating are evaluated
+        xa, lo_a, hi_a, f_lo_a = x[rows], lo[rows], hi[rows], f_lo[rows]
+        f, df = _npv_and_slope(xa, cf[rows], tau[rows])
+        # shrink the bracket around the root
+        same = np.sign(f) == np.sign(f_lo_a)
+        lo_a = np.where(same, xa, lo_a)
+        f_lo[rows] = np.where(same, f, f_lo_a)
+        hi_a = np.where(same, hi_a, xa)
+        lo[rows], hi[rows] = lo_a, hi_a
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = xa - f / df
+        bad = ~np.isfinite(step) | (step < lo_a) | (step > hi_a)
+        x_new = np.where(f == 0.0, xa, np.where(bad, 0.5 * (lo_a + hi_a), step))
+        done = (np.abs(x_new - xa) <= tol * (1.0 + np.abs(xa))) | (f == 0.0)
+        x[rows] = x_new
+        active[rows[done]] = False
+    return x
+
+def xirr_batch(
+    cashflows: np.ndarray,
+    times: np.ndarray,
+    tol: float = 1e-13,
+    maxiter: int = 100,
+    block_rows: int = 256,
+) -> np.ndarray:
+    """
+    Rate r per row solving sum_i cashflows[i] * (1 + r) ** -times[i] = 0.
+    `times` (same shape as `cashflows`, or one row shared by all rows) are in
+    the unit the rate is quoted in: years for an annual rate, periods for a
+    per-period rate. Only the nonzero flows matter; zeros are ignored.
+    Rows are solved together in blocks of `block_rows` to bound memory.
+    """
+    cf = np.atleast_2d(np.asarray(cashflows, dtype=float))
+    tau = np.broadcast_to(np.asarray(times, dtype=float), cf.shape)
+    if cf.size == 0:
+        return np.full(cf.shape[0], np.nan)
+    if cf.shape[0] > block_rows:
+        return np.concatenate([
+            _xirr_block(cf[i: i + block_rows], tau[i: i + block_rows], tol, maxiter)
+            for i in range(0, cf.shape[0], block_rows)
+        ])
+    return _xirr_block(cf, tau, tol, maxiter)
+
+def _xirr_block(cf: np.ndarray, tau: np.ndarray, tol: float, maxiter: int) -> np.ndarray:
+    nz = cf != 0.0
+
+    # measure time from each row's first flow, scale times to [0, 1] and flows to O(1)
+    t0 = np.where(nz, tau, np.inf).min(axis=1, keepdims=True)
+    tau = np.where(nz, tau - np.where(np.isfinite(t0), t0, 0.0), 0.0)
+    span = tau.max(axis=1, keepdims=True)
+    tau = np.divide(tau, span, out=np.zeros_like(tau), where=span > 0)
+    scale = np.abs(cf).max(axis=1, keepdims=True)
+    cf = np.divide(cf, scale, out=np.zeros_like(cf), where=scale > 0)
+
+    y = _irr_newton(cf, tau, tol, maxiter)
+    return np.where(span[:, 0] > 0, np.expm1(y / np.where(span[:, 0] > 0, span[:, 0], 1.0)), np.nan)
+
+def xirr(cashflows: np.ndarray, times: np.ndarray, tol: float = 1e-13, maxiter: int = 100) -> float:
+    """Single-run form of `xirr_batch`."""
+    return float(xirr_batch(np.asarray(cashflows, dtype=float)[None, :], np.asarray(times, dtype=float)[None, :], tol, maxiter)[0])
+
 def try_irr(cashflows: np.ndarray) -> float:
     """
     Equally spaced IRR; returns per-period rate.
     """
-    try:
-        import numpy_financial as npf
-        r = npf.irr(cashflows)
-        return float(r) if np.isfinite(r) else np.nan
-    except Exception:
-        return np.nan
+    cf = np.asarray(cashflows, dtype=float)
+    pos = np.flatnonzero(cf)
+    r = xirr(cf[pos], pos.astype(float)) if len(pos) else np.nan
+    return float(r) if np.isfinite(r) else np.nan
 
 def irr_annualized(cashflows: pd.Series, terminal_value: float, periods_per_year: int = 252) -> float:
-    cf = cashflows.copy()
-    cf.iloc[-1] += float(terminal_value)
-    r = try_irr(cf.values.astype(float))
-    if not np.isfinite(r):
+    cf = np.asarray(cashflows, dtype=float).copy()
+    if len(cf) == 0:
         return np.nan
-    return float((1.0 + r) ** periods_per_year - 1.0)
\ No newline at end of file
+    cf[-1] += float(terminal_value)
+    pos = np.flatnonzero(cf)
+    if len(pos) == 0:
+        return np.nan
+    r = xirr(cf[pos], pos / periods_per_year)
+    return float(r) if np.isfinite(r) else np.nan
+
+def irr_annualized_batch(cashflows: np.ndarray, terminal_values: np.ndarray, periods_per_year: int = 252) -> np.ndarray:
+    """
+    `irr_annualized` for every row of a (runs x time) cashflow matrix at once.
+    Only columns holding a flow in some row are solved over.
+    """
+    cf = np.array(cashflows, dtype=float, ndmin=2)
+    cf[:, -1] += np.asarray(terminal_values, dtype=float)
+    cols = np.flatnonzero((cf != 0.0).any(axis=0))
+    if len(cols) == 0:
+        return np.full(cf.shape[0], np.nan)
+    return xirr_batch(cf[:, cols], cols / periods_per_year)
+
+def _ratios(terminal, total_contrib, growth, n, mdd, k, s1, s2, down, log_growth, periods_per_year) -> dict:
+    """The ratio metrics from the running totals of `compute_metrics` (arrays, one entry per run)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        simple = np.where(total_contrib == 0, np.nan, (terminal - total_contrib) / total_contrib * 100.0)
+        twr = growth ** (periods_per_year / n) - 1.0 if n > 1 else np.full(np.shape(terminal), np.nan)
+        mean = s1 / k
+        var = np.maximum(s2 - s1 * mean, 0.0) / (k - 1)
+        vol = np.where(k > 1, np.sqrt(var * periods_per_year), np.nan)
+        down_dev = np.sqrt(down / k)
+        sortino = np.where((k > 1) & (down_dev > 0), mean / down_dev * np.sqrt(periods_per_year), np.nan)
+        ann = np.where(k > 0, np.expm1(log_growth * periods_per_year / k), np.nan)
+        calmar = np.where(mdd < 0, ann / -mdd, np.nan)
+    return {
+        "simple_return_pct": simple,
+        "twr_annualized": twr,
+        "volatility_annualized": vol,
+        "sortino": sortino,
+        "calmar": calmar,
+    }
+
+def compute_metrics(value: np.ndarray, cashflows: np.ndarray, periods_per_year: int = 252) -> dict:
+    """
+    Every end-of-period metric of a (runs x time) value / cashflow pair, plus
+    the drawdown and cumulative-contribution series, from one set of shared
+    intermediates. A 1-D input is treated as a single run and gives scalars.
+
+    Totals and products are sequential (cumulative) accumulations, so a run
+    extended one bar at a time can reproduce them exactly.
+
+    Returns (fractions, not percent):
+        total_contributions, terminal_value, simple_return_pct, twr_annualized,
+        irr_annualized, max_drawdown, max_dd_peak / max_dd_trough (positions),
+        volatility_annualized, sortino, calmar, drawdown, cumulative_contributions
+
+    volatility / sortino / calmar use flow-adjusted returns
+    (V[t] + cashflows[t]) / V[t-1] - 1 over periods with capital invested,
+    so contributions are not counted as gains.
+    """
+    single = np.ndim(value) == 1
+    v = np.array(value, dtype=float, ndmin=2)
+    cf = np.array(cashflows, dtype=float, ndmin=2)
+    runs, n = v.shape
+    rows = np.arange(runs)
+
+    cum_contrib = np.clip(-cf, 0.0, None).cumsum(axis=1)
+    total_contrib = cum_contrib[:, -1]
+    terminal = v[:, -1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # time-weighted return, as pct_change().fillna(0) on the value series
+        r = np.zeros_like(v)
+        r[:, 1:] = v[:, 1:] / v[:, :-1] - 1.0
+        r = np.where(np.isnan(r), 0.0, r)
+        growth = (1.0 + r).cumprod(axis=1)[:, -1]
+
+        # drawdown; the peak of the worst drawdown is the first bar at the running high
+        high = np.maximum.accumulate(v, axis=1)
+        dd = v / high - 1.0
+        new_high = np.ones_like(v, dtype=bool)
+        new_high[:, 1:] = v[:, 1:] > high[:, :-1]
+        peak_at = np.maximum.accumulate(np.where(new_high, np.arange(n), 0), axis=1)
+        has_dd = ~np.isnan(dd).all(axis=1)
+        trough = np.where(np.isnan(dd), np.inf, dd).argmin(axis=1)
+        peak = peak_at[rows, trough]
+        mdd = np.where(has_dd, dd[rows, trough], np.nan)
+
+        # flow-adjusted returns over invested periods
+        invested = np.zeros_like(v, dtype=bool)
+        invested[:, 1:] = v[:, :-1] > 0
+        fa = np.zeros_like(v)
+        fa[:, 1:] = (v[:, 1:] + cf[:, 1:]) / v[:, :-1] - 1.0
+        fa = np.where(invested & np.isfinite(fa), fa, 0.0)
+        k = invested.sum(axis=1)
+        s1 = fa.cumsum(axis=1)[:, -1]
+        s2 = (fa * fa).cumsum(axis=1)[:, -1]
+        down = (np.minimum(fa, 0.0) ** 2).cumsum(axis=1)[:, -1]
+        log_growth = np.log1p(fa).cumsum(axis=1)[:, -1]
+
+    with span("metrics.irr"):
+        irr = irr_annualized_batch(cf, terminal, periods_per_year)
+
+    ratios = _ratios(terminal, total_contrib, growth, n, mdd, k, s1, s2, down, log_growth, periods_per_year)
+    out = {
+        "total_contributions": total_contrib,
+        "terminal_value": terminal,
+        "simple_return_pct": ratios["simple_return_pct"],
+        "twr_annualized": ratios["twr_annualized"],
+        "irr_annualized": irr,
+        "max_drawdown": mdd,
+        "max_dd_peak": peak,
+        "max_dd_trough": trough,
+        "volatility_annualized": ratios["volatility_annualized"],
+        "sortino": ratios["sortino"],
+        "calmar": ratios["calmar"],
+        "drawdown": dd,
+        "cumulative_contributions": cum_contrib,
+    }
+    if single:
+        out = {key: (val[0] if val.ndim == 1 else val[0, :]) for key, val in out.items()}
+    return out
+
+def _accumulate(ufunc, carry, x: np.ndarray) -> np.ndarray:
+    """`ufunc.accumulate(x)` continued from `carry`, the last value of the accumulation so far (None: none)."""
+    if carry is None:
+        return ufunc.accumulate(x)
+    return ufunc.accumulate(np.r_[carry, x])[1:]
+
+class MetricState:
+    """
+    The running totals behind `compute_metrics` for one run, extended a block
+    of bars at a time. Every total is carried as the last value of the same
+    cumulative sum / product / maximum, and the IRR from the nonzero
+    cashflows, so after any sequence of `extend` calls `metrics()` equals
+    `compute_metrics` over the whole history bit for bit.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.last_value = np.nan
+        self.cum_contrib = None     # None until the first bar
+        self.growth = None
+        self.high = None
+        self.peak_at = None
+        self.trough, self.trough_dd, self.peak, self.has_dd = 0, np.inf, 0, False
+        self.k = 0
+        self.s1 = self.s2 = self.down = self.log_growth = None
+        self.flow_pos: list = []
+        self.flow_cash: list = []
+
+    def extend(self, value: np.ndarray, cashflows: np.ndarray) -> dict:
+        """Fold in the next bars; returns their `drawdown` and `cumulative_contributions` rows."""
+        v = np.asarray(value, dtype=float)
+        cf = np.asarray(cashflows, dtype=float)
+        m = len(v)
+        if m == 0:
+            return {"drawdown": np.empty(0), "cumulative_contributions": np.empty(0)}
+        pos = self.n + np.arange(m)
+        first = self.n == 0
+        prev = np.r_[self.last_value, v[:-1]]
+
+        cum_contrib = _accumulate(np.add, self.cum_contrib, np.clip(-cf, 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = v / prev - 1.0
+            if first:
+                r[0] = 0.0
+            r = np.where(np.isnan(r), 0.0, r)
+            growth = _accumulate(np.multiply, self.growth, 1.0 + r)
+
+            high = _accumulate(np.maximum, self.high, v)
+            dd = v / high - 1.0
+            new_high = v > np.r_[np.nan if first else self.high, high[:-1]]
+            if first:
+                new_high[0] = True
+            peak_at = _accumulate(np.maximum, self.peak_at, np.where(new_high, pos, 0))
+            vals = np.where(np.isnan(dd), np.inf, dd)
+            i = int(vals.argmin())
+            if vals[i] < self.trough_dd:
+                self.trough, self.trough_dd, self.peak = int(pos[i]), float(vals[i]), int(peak_at[i])
+            self.has_dd = self.has_dd or bool((~np.isnan(dd)).any())
+
+            invested = prev > 0
+            fa = (v + cf) / prev - 1.0
+            if first:
+                invested[0], fa[0] = False, 0.0
+            fa = np.where(invested & np.isfinite(fa), fa, 0.0)
+            self.k += int(invested.sum())
+            self.s1 = _accumulate(np.add, self.s1, fa)[-1]
+            self.s2 = _accumulate(np.add, self.s2, fa * fa)[-1]
+            self.down = _accumulate(np.add, self.down, np.minimum(fa, 0.0) ** 2)[-1]
+            self.log_growth = _accumulate(np.add, self.log_growth, np.log1p(fa))[-1]
+
+        flows = np.flatnonzero(cf != 0.0)
+        self.flow_pos.extend(pos[flows].tolist())
+        self.flow_cash.extend(cf[flows].tolist())
+        self.cum_contrib, self.growth, self.high = cum_contrib[-1], growth[-1], high[-1]
+        self.peak_at = int(peak_at[-1])
+        self.last_value = v[-1]
+        self.n += m
+        return {"drawdown": dd, "cumulative_contributions": cum_contrib}
+
+    def metrics(self, periods_per_year: int = 252) -> dict:
+        """The scalar metrics of `compute_metrics` for the bars seen so far."""
+        terminal = np.array([self.last_value])
+        mdd = np.array([self.trough_dd if self.has_dd else np.nan])
+        ratios = _ratios(terminal, np.array([self.cum_contrib]), np.array([self.growth]), self.n, mdd,
+                         np.array([self.k]), np.array([self.s1]), np.array([self.s2]), np.array([self.down]),
+                         np.array([self.log_growth]), periods_per_year)
+        return {
+            "total_contributions": self.cum_contrib,
+            "terminal_value": self.last_value,
+            "simple_return_pct": ratios["simple_return_pct"][0],
+            "twr_annualized": ratios["twr_annualized"][0],
+            "irr_annualized": self._irr(periods_per_year),
+            "max_drawdown": mdd[0],
+            "max_dd_peak": self.peak,
+            "max_dd_trough": self.trough,
+            "volatility_annualized": ratios["volatility_annualized"][0],
+            "sortino": ratios["sortino"][0],
+            "calmar": ratios["calmar"][0],
+        }
+
+    def _irr(self, periods_per_year: int) -> float:
+        # as irr_annualized_batch: the terminal value is added to the last bar's flow
+        pos = np.array(self.flow_pos, dtype=np.int64)
+        cf = np.array(self.flow_cash, dtype=float)
+        if len(pos) and pos[-1] == self.n - 1:
+            cf[-1] += self.last_value
+        else:
+            pos, cf = np.r_[pos, self.n - 1], np.r_[cf, 0.0 + self.last_value]
+        keep = cf != 0.0
+        if not keep.any():
+            return np.nan
+        return xirr_batch(cf[keep][None, :], pos[keep] / periods_per_year)[0]
+
+    def to_state(self) -> dict:
+        return {key: (val.item() if isinstance(val, np.generic) else val) for key, val in vars(self).items()}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "MetricState":
+        out = cls()
+        for key, val in state.items():
+            setattr(out, key, val)
+        return out
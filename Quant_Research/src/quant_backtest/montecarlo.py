@@ -0,0 +1,270 @@
+from __future__ import annotations
+import json
+import os
+from typing import Dict, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .metrics import compute_metrics
+from .online import OnlineMoments, TDigest
+from .portfolio import weighted_buy_paths
+from .strategies.base import Strategy, synthetic_index_paths
+
+# Per-path metrics reported by `run_monte_carlo`
+MC_METRICS = (
+    "total_contributions", "terminal_value", "simple_return_pct", "irr_annualized",
+    "max_drawdown_pct", "twr_annualized", "volatility_annualized", "sortino", "calmar", "num_trades",
+)
+
+Strategies = Union[Mapping[str, Strategy], Sequence[Strategy]]
+
+
+def gbm_price_paths(
+    n_paths: int,
+    n_days: int,
+    mu,
+    sigma,
+    corr: Optional[np.ndarray] = None,
+    init_price=100.0,
+    seed=None,
+    periods_per_year: int = 252,
+) -> np.ndarray:
+    """
+    Daily close paths of correlated GBM assets, shape (paths, days, assets).
+    `mu`, `sigma` and `init_price` are per asset (or scalars for one asset);
+    `corr` defaults to independent assets. Day 0 is `init_price`. `seed` may
+    also be a `np.random.Generator`.
+    """
+    mu = np.atleast_1d(np.asarray(mu, dtype=float))
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=float), mu.shape)
+    n_assets = len(mu)
+    chol = np.linalg.cholesky(np.eye(n_assets) if corr is None else np.asarray(corr, dtype=float))
+    dt = 1.0 / periods_per_year
+
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    shocks = rng.standard_normal((n_paths, n_days - 1, n_assets)) @ chol.T
+    log_steps = (mu - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * shocks
+    log_px = np.zeros((n_paths, n_days, n_assets))
+    np.cumsum(log_steps, axis=1, out=log_px[:, 1:, :])
+    return np.broadcast_to(np.asarray(init_price, dtype=float), (n_assets,)) * np.exp(log_px)
+
+
+def _labelled(strategies: Strategies) -> Dict[str, Strategy]:
+    if isinstance(strategies, Mapping):
+        return dict(strategies)
+    out: Dict[str, Strategy] = {}
+    for s in strategies:
+        label, n = s.name, 2
+        while label in out:
+            label, n = f"{s.name}_{n}", n + 1
+        out[label] = s
+    return out
+
+
+def run_monte_carlo(
+    prices: np.ndarray,
+    weights: dict[str, float],
+    strategies: Strategies,
+    index: Optional[pd.DatetimeIndex] = None,
+    chunk_paths: int = 1000,
+    periods_per_year: int = 252,
+) -> pd.DataFrame:
+    """
+    Run each strategy on every simulated path at once.
+
+    `prices` is (paths, time, tickers) with tickers in `weights` order;
+    `index` gives the dates of the time axis (business days from 2000-01-03
+    by default; only the monthly strategy looks at them). Each strategy's
+    vectorized `signals` is applied to all paths of a chunk, the buys are
+    replayed with `weighted_buy_paths` and the metrics come from the batched
+    kernel (IRR included), so there is no per-path Python loop.
+
+    Returns one row per (strategy, path) with the metrics in `MC_METRICS`.
+    """
+    prices = np.asarray(prices, dtype=float)
+    if prices.ndim != 3 or prices.shape[2] != len(weights):
+        raise ValueError("prices must be (paths, time, tickers) with one ticker per weight")
+    n_paths, n_days, _ = prices.shape
+    if index is None:
+        index = pd.bdate_range("2000-01-03", periods=n_days)
+    if len(index) != n_days:
+        raise ValueError("index must have one date per time step")
+    w = np.array(list(weights.values()), dtype=float)
+    labelled = _labelled(strategies)
+
+    frames = []
+    for lo in range(0, n_paths, chunk_paths):
+        px = prices[lo: lo + chunk_paths]
+        level = synthetic_index_paths(px, w)
+        for label, strategy in labelled.items():
+            trigger, amount = strategy.signals(level, index)
+            spend = np.where(trigger, amount, 0.0)
+            value, cashflows = weighted_buy_paths(px, spend, w)
+            m = compute_metrics(value, cashflows, periods_per_year)
+            frames.append(pd.DataFrame({
+                "strategy": label,
+                "path": np.arange(lo, lo + len(px)),
+                "total_contributions": m["total_contributions"],
+                "terminal_value": m["terminal_value"],
+                "simple_return_pct": m["simple_return_pct"],
+                "irr_annualized": m["irr_annualized"],
+                "max_drawdown_pct": m["max_drawdown"] * 100.0,
+                "twr_annualized": m["twr_annualized"],
+                "volatility_annualized": m["volatility_annualized"],
+                "sortino": m["sortino"],
+                "calmar": m["calmar"],
+                "num_trades": np.broadcast_to(trigger, spend.shape).sum(axis=-1) * len(w),
+            }))
+    out = pd.concat(frames, ignore_index=True)
+    return out.sort_values(["strategy", "path"], kind="stable", ignore_index=True)
+
+
+def summarize(
+    results: pd.DataFrame,
+    metrics: Sequence[str] = ("terminal_value", "irr_annualized", "max_drawdown_pct"),
+    quantiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95),
+) -> pd.DataFrame:
+    """Distribution of each metric per strategy: mean, std and the given quantiles."""
+    g = results.groupby("strategy", sort=False)[list(metrics)]
+    stats = {"mean": g.mean(), "std": g.std()}
+    for q in quantiles:
+        stats[f"q{q:g}"] = g.quantile(q)
+    return pd.concat(stats, axis=1).swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+
+
+STREAM_METRICS = ("terminal_value", "total_contributions", "simple_return_pct", "irr_annualized", "max_drawdown_pct")
+
+
+class MonteCarloAggregate:
+    """
+    Online per-(strategy, metric) aggregates of a streaming Monte Carlo run:
+    exact count / mean / std / min / max and a t-digest for quantiles. The
+    state is small and JSON-serializable, whatever the number of paths.
+    """
+
+    def __init__(self, labels: Sequence[str], metrics: Sequence[str], compression: float = 1000.0):
+        self.labels = list(labels)
+        self.metrics = list(metrics)
+        self.paths_done = 0
+        self.chunks_done = 0
+        self.moments = {(l, m): OnlineMoments() for l in self.labels for m in self.metrics}
+        self.digests = {(l, m): TDigest(compression) for l in self.labels for m in self.metrics}
+
+    def update(self, results: pd.DataFrame):
+        for label, group in results.groupby("strategy", sort=False):
+            for m in self.metrics:
+                values = group[m].to_numpy(dtype=float)
+                self.moments[(label, m)].update(values)
+                self.digests[(label, m)].update(values)
+
+    def summary(self, quantiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95)) -> pd.DataFrame:
+        """Same layout as `summarize`: one row per strategy, (metric, stat) columns."""
+        rows = {}
+        for label in self.labels:
+            row = {}
+            for m in self.metrics:
+                mom, dig = self.moments[(label, m)], self.digests[(label, m)]
+                row[(m, "mean")] = mom.mean if mom.n else np.nan
+                row[(m, "std")] = mom.std if mom.n > 1 else np.nan
+                for q, v in zip(quantiles, dig.quantile(list(quantiles))):
+                    row[(m, f"q{q:g}")] = v
+                row[(m, "min")] = mom.min if mom.n else np.nan
+                row[(m, "max")] = mom.max if mom.n else np.nan
+                row[(m, "n_skipped")] = mom.n_skipped
+            rows[label] = row
+        out = pd.DataFrame.from_dict(rows, orient="index")
+        out.index.name = "strategy"
+        return out
+
+    def to_state(self) -> dict:
+        return {
+            "labels": self.labels,
+            "metrics": self.metrics,
+            "paths_done": self.paths_done,
+            "chunks_done": self.chunks_done,
+            "moments": [[l, m, self.moments[(l, m)].to_state()] for l, m in self.moments],
+            "digests": [[l, m, self.digests[(l, m)].to_state()] for l, m in self.digests],
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "MonteCarloAggregate":
+        out = cls(state["labels"], state["metrics"])
+        out.paths_done = int(state["paths_done"])
+        out.chunks_done = int(state["chunks_done"])
+        out.moments = {(l, m): OnlineMoments.from_state(st) for l, m, st in state["moments"]}
+        out.digests = {(l, m): TDigest.from_state(st) for l, m, st in state["digests"]}
+        return out
+
+
+def _fingerprint(**params) -> dict:
+    """JSON-normalised run parameters; a checkpoint only resumes an identical run."""
+    return json.loads(json.dumps(params, default=lambda o: np.asarray(o).tolist()))
+
+
+def stream_monte_carlo(
+    n_paths: int,
+    n_days: int,
+    weights: dict[str, float],
+    strategies: Strategies,
+    mu,
+    sigma,
+    corr: Optional[np.ndarray] = None,
+    init_price=100.0,
+    seed: int = 0,
+    chunk_paths: int = 1000,
+    metrics: Sequence[str] = STREAM_METRICS,
+    compression: float = 1000.0,
+    checkpoint: Optional[str] = None,
+    checkpoint_every: int = 10,
+    periods_per_year: int = 252,
+) -> MonteCarloAggregate:
+    """
+    Memory-bounded Monte Carlo: GBM paths are generated `chunk_paths` at a
+    time, run through `run_monte_carlo`, folded into a `MonteCarloAggregate`
+    and discarded, so peak memory depends on the chunk size only.
+
+    Chunk i draws from its own child seed (SeedSequence(seed, spawn_key=(i,)))
+    so results do not depend on where a run was interrupted. With `checkpoint`
+    the aggregate state is written there (atomically) every
+    `checkpoint_every` chunks and at the end; an existing checkpoint for the
+    same parameters is resumed, and a larger `n_paths` extends it.
+    """
+    labelled = _labelled(strategies)
+    params = _fingerprint(
+        n_days=n_days, weights=weights, mu=mu, sigma=sigma, corr=corr, init_price=init_price, seed=seed,
+        chunk_paths=chunk_paths, metrics=list(metrics), compression=compression, periods_per_year=periods_per_year,
+        strategies={label: [type(s).__qualname__, sorted(vars(s).items())] for label, s in labelled.items()},
+    )
+
+    agg = None
+    if checkpoint is not None and os.path.exists(checkpoint):
+        with open(checkpoint, "r") as f:
+            saved = json.load(f)
+        if saved["params"] != params:
+            raise ValueError(f"checkpoint {checkpoint} was written for a different run")
+        agg = MonteCarloAggregate.from_state(saved["state"])
+    if agg is None:
+        agg = MonteCarloAggregate(list(labelled), metrics, compression)
+    if agg.paths_done != agg.chunks_done * chunk_paths and n_paths > agg.paths_done:
+        raise ValueError("cannot extend a run whose last chunk was partial; use an n_paths multiple of chunk_paths")
+
+    def save():
+        tmp = checkpoint + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"params": params, "state": agg.to_state()}, f)
+        os.replace(tmp, checkpoint)
+
+    index = pd.bdate_range("2000-01-03", periods=n_days)
+    n_chunks = -(-n_paths // chunk_paths)
+    while agg.chunks_done < n_chunks:
+        i = agg.chunks_done
+        size = min(chunk_paths, n_paths - i * chunk_paths)
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(i,)))
+        prices = gbm_price_paths(size, n_days, mu, sigma, corr, init_price, rng, periods_per_year)
+        agg.update(run_monte_carlo(prices, weights, labelled, index, chunk_paths, periods_per_year))
+        agg.paths_done += size
+        agg.chunks_done += 1
+        if checkpoint is not None and (agg.chunks_done % checkpoint_every == 0 or agg.chunks_done == n_chunks):
+            save()
+    return agg
@@ -0,0 +1,142 @@
+from __future__ import annotations
+import math
+
+import numpy as np
+
+
+class OnlineMoments:
+    """
+    Count, mean, variance, min and max of a stream, updated a batch at a time
+    (Chan et al. pairwise combination of per-batch moments). Non-finite
+    values are counted in `n_skipped` and otherwise ignored.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.n_skipped = 0
+
+    def update(self, values):
+        x = np.asarray(values, dtype=float).ravel()
+        finite = np.isfinite(x)
+        self.n_skipped += int((~finite).sum())
+        x = x[finite]
+        if not len(x):
+            return
+        n_b = len(x)
+        mean_b = float(x.mean())
+        m2_b = float(((x - mean_b) ** 2).sum())
+        self._combine(n_b, mean_b, m2_b, float(x.min()), float(x.max()))
+
+    def _combine(self, n_b: int, mean_b: float, m2_b: float, min_b: float, max_b: float):
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * self.n * n_b / n
+        self.n = n
+        self.min = min(self.min, min_b)
+        self.max = max(self.max, max_b)
+
+    def merge(self, other: "OnlineMoments"):
+        self.n_skipped += other.n_skipped
+        if other.n:
+            self._combine(other.n, other.mean, other.m2, other.min, other.max)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_state(self) -> dict:
+        return {"n": self.n, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max,
+                "n_skipped": self.n_skipped}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "OnlineMoments":
+        out = cls()
+        out.n, out.mean, out.m2 = int(state["n"]), float(state["mean"]), float(state["m2"])
+        out.min, out.max = float(state["min"]), float(state["max"])
+        out.n_skipped = int(state["n_skipped"])
+        return out
+
+
+class TDigest:
+    """
+    Merging t-digest quantile sketch. Each update sorts the new values in with
+    the current centroids and merges neighbours that fall in the same bucket
+    of the k1 scale function k(q) = compression / (2 pi) * asin(2q - 1),
+    so centroids stay small near the tails and the sketch holds
+    O(compression) centroids however many values have been added.
+    Exact min and max are kept for the extreme quantiles.
+    """
+
+    def __init__(self, compression: float = 200.0):
+        self.compression = float(compression)
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def _k(self, q: np.ndarray) -> np.ndarray:
+        return self.compression / (2.0 * math.pi) * np.arcsin(2.0 * np.clip(q, 0.0, 1.0) - 1.0)
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        cum = np.cumsum(weights)
+        # bucket of each point by the scale function at its centre
+        bucket = np.floor(self._k((cum - 0.5 * weights) / total)).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        w = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / w
+        self.weights = w
+
+    def update(self, values):
+        x = np.asarray(values, dtype=float).ravel()
+        x = x[np.isfinite(x)]
+        if not len(x):
+            return
+        self.min = min(self.min, float(x.min()))
+        self.max = max(self.max, float(x.max()))
+        self._compress(np.concatenate([self.means, x]), np.concatenate([self.weights, np.ones(len(x))]))
+
+    def merge(self, other: "TDigest"):
+        if not len(other.weights):
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+
+    def quantile(self, q) -> np.ndarray:
+        """Quantile estimates for q in [0, 1], interpolated between centroid centres."""
+        q = np.asarray(q, dtype=float)
+        if not len(self.weights):
+            return np.full(q.shape, np.nan)
+        total = self.weights.sum()
+        centres = (np.cumsum(self.weights) - 0.5 * self.weights) / total
+        xp = np.r_[0.0, centres, 1.0]
+        fp = np.r_[self.min, self.means, self.max]
+        return np.interp(q, xp, fp)
+
+    def to_state(self) -> dict:
+        return {"compression": self.compression, "means": self.means.tolist(),
+                "weights": self.weights.tolist(), "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "TDigest":
+        out = cls(state["compression"])
+        out.means = np.asarray(state["means"], dtype=float)
+        out.weights = np.asarray(state["weights"], dtype=float)
+        out.min, out.max = float(state["min"]), float(state["max"])
+        return out
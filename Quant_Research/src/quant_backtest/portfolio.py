@@ -2,8 +2,11 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 
+from .weights import WeightSchedule, Weights
+
 @dataclass
 class Trade:
     date: pd.Timestamp
@@ -12,49 +15,268 @@ class Trade:
     units: float
     price: float
 
+TRADE_COLUMNS = ["date", "ticker", "cash", "units", "price"]
+
+def _as_ns(dates) -> tuple[np.ndarray, pd.DatetimeIndex]:
+    """Naive datetime64[ns] values (UTC for tz-aware input) plus the parsed index."""
+    di = pd.DatetimeIndex(dates)
+    naive = di.tz_convert("UTC").tz_localize(None) if di.tz is not None else di
+    return naive.as_unit("ns").values, di
+
 class BuyOnlyPortfolio:
+    """
+    Buy-only ledger stored column-wise in growable NumPy arrays
+    (date code, ticker code, cash, price); date codes index a calendar of the
+    distinct fill dates and units are derived from cash / price. Fills are
+    appended in bulk; the DataFrame view is built on demand and cached until
+    the next fill.
+    """
+    _initial_capacity = 1024
+
     def __init__(self, tickers: list[str]):
         self.tickers = tickers
-        self.trades: List[Trade] = []
+        self._symbols: List[str] = list(tickers)          # code -> ticker
+        self._codes: Dict[str, int] = {t: i for i, t in enumerate(self._symbols)}
+        self._calendar = np.empty(0, dtype="datetime64[ns]")  # date code -> date
+        self._tz = None
+        self._unit = "ns"
+        self._n = 0
+        self._alloc(self._initial_capacity)
+        self._trades_df: Optional[pd.DataFrame] = None
+
+    def _alloc(self, capacity: int):
+        self._date = np.empty(capacity, dtype=np.int32)
+        self._ticker = np.empty(capacity, dtype=np.int32)
+        self._cash = np.empty(capacity, dtype=np.float64)
+        self._price = np.empty(capacity, dtype=np.float64)
+
+    def _reserve(self, extra: int):
+        needed = self._n + extra
+        capacity = len(self._date)
+        if needed <= capacity:
+            return
+        old = (self._date, self._ticker, self._cash, self._price)
+        self._alloc(max(needed, 2 * capacity))
+        for src, dst in zip(old, (self._date, self._ticker, self._cash, self._price)):
+            dst[: self._n] = src[: self._n]
+
+    def _code_of(self, ticker: str) -> int:
+        code = self._codes.get(ticker)
+        if code is None:
+            code = self._codes[ticker] = len(self._symbols)
+            self._symbols.append(ticker)
+        return code
+
+    def _date_codes(self, dates: np.ndarray) -> np.ndarray:
+        """Calendar codes of `dates`, adding the ones not seen before."""
+        uniq, inv = np.unique(dates, return_inverse=True)
+        found = pd.Index(self._calendar).get_indexer(uniq)
+        new = found < 0
+        found[new] = len(self._calendar) + np.arange(new.sum())
+        self._calendar = np.concatenate([self._calendar, uniq[new]])
+        return found.astype(np.int32)[inv]
+
+    def _fill_dates(self) -> np.ndarray:
+        return self._calendar[self._date[: self._n]]
+
+    def _fill_units(self) -> np.ndarray:
+        price = self._price[: self._n]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(price > 0, -self._cash[: self._n] / price, 0.0)
+
+    def _append(self, dates, codes: np.ndarray, cash: np.ndarray, prices: np.ndarray):
+        dates, di = _as_ns(dates)
+        if self._n == 0:
+            self._tz, self._unit = di.tz, di.unit
+        cash = np.asarray(cash, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+
+        n = len(cash)
+        self._reserve(n)
+        sl = slice(self._n, self._n + n)
+        self._date[sl] = self._date_codes(dates)
+        self._ticker[sl] = codes
+        self._cash[sl] = -cash
+        self._price[sl] = prices
+        self._n += n
+        self._trades_df = None
 
     def buy(self, date: pd.Timestamp, ticker: str, cash: float, price: float):
         # cash is positive input (how much to spend); we record negative cashflow
-        units = cash / price if price > 0 else 0.0
-        self.trades.append(Trade(date=date, ticker=ticker, cash=-cash, units=units, price=price))
+        self._append([date], np.array([self._code_of(ticker)]), [cash], [price])
+
+    def buy_many(self, dates, tickers, cash: np.ndarray, prices: np.ndarray):
+        """
+        Bulk version of `buy`: one fill per element of the aligned arrays,
+        recorded in array order.
+        """
+        uniq, inv = np.unique(np.asarray(tickers, dtype=object), return_inverse=True)
+        codes = np.array([self._code_of(t) for t in uniq], dtype=np.int32)[inv]
+        self._append(dates, codes, cash, prices)
+
+    def buy_weighted(self, prices: pd.DataFrame, trigger, amount, weights: Weights):
+        """
+        On every date where `trigger` is set, spend `amount` on that date split
+        across tickers by `weights`. Fills are ordered date-major, then in
+        weights order, matching a per-date loop over `weights.items()`.
+        With a `WeightSchedule` each date uses its active row, and only the
+        tickers held in that row get a fill.
+        """
+        if isinstance(weights, WeightSchedule):
+            return self._buy_schedule(prices, trigger, amount, weights)
+        mask = np.asarray(trigger, dtype=bool)
+        tickers = list(weights.keys())
+        w = np.array(list(weights.values()), dtype=float)
+
+        px = prices.loc[:, tickers].to_numpy(dtype=float)[mask]                # (dates, tickers)
+        amount = np.broadcast_to(np.asarray(amount, dtype=float), mask.shape)
+        cash = amount[mask][:, None] * w[None, :]                              # (dates, tickers)
+        dates = prices.index[mask]
+
+        n_dates, n_tickers = px.shape
+        codes = np.array([self._code_of(t) for t in tickers], dtype=np.int32)
+        self._append(dates.repeat(n_tickers), np.tile(codes, n_dates), cash.ravel(), px.ravel())
+
+    def _buy_schedule(self, prices: pd.DataFrame, trigger, amount, schedule: WeightSchedule):
+        mask = np.asarray(trigger, dtype=bool)
+        at = np.flatnonzero(mask)                                              # trigger positions
+        rows = schedule.rows(prices.index)[at]
+        indptr = schedule.matrix.indptr
+        counts = indptr[rows + 1] - indptr[rows]
+
+        # one fill per (trigger date, ticker held in that date's row)
+        fill_of = np.repeat(np.arange(len(at)), counts)
+        offset = np.arange(len(fill_of)) - np.repeat(np.cumsum(counts) - counts, counts)
+        k = indptr[rows][fill_of] + offset
+        cols = schedule.matrix.indices[k]
+
+        pos = schedule.column_positions(prices.columns)
+        px = prices.to_numpy(dtype=float)[at[fill_of], pos[cols]]
+        amount = np.broadcast_to(np.asarray(amount, dtype=float), mask.shape)
+        cash = amount[at][fill_of] * schedule.matrix.data[k]
+
+        codes = np.array([self._code_of(t) for t in schedule.tickers], dtype=np.int32)
+        self._append(prices.index[at][fill_of], codes[cols], cash, px)
+
+    @property
+    def num_trades(self) -> int:
+        return self._n
+
+    @property
+    def trades(self) -> List[Trade]:
+        """Row view of the ledger (materialized on each access)."""
+        return [Trade(**row) for row in self.trades_df().to_dict("records")]
 
     def trades_df(self) -> pd.DataFrame:
-        return pd.DataFrame([t.__dict__ for t in self.trades]).sort_values("date").reset_index(drop=True)
+        """Ledger as a DataFrame sorted by date; cached until the next fill."""
+        if self._trades_df is None:
+            n = self._n
+            fill_dates = self._fill_dates()
+            order = np.argsort(fill_dates, kind="stable")
+            dates = pd.DatetimeIndex(fill_dates[order]).as_unit(self._unit)
+            if self._tz is not None:
+                dates = dates.tz_localize("UTC").tz_convert(self._tz)
+            self._trades_df = pd.DataFrame({
+                "date": dates,
+                "ticker": np.array(self._symbols, dtype=object)[self._ticker[:n][order]],
+                "cash": self._cash[:n][order],
+                "units": self._fill_units()[order],
+                "price": self._price[:n][order],
+            }, columns=TRADE_COLUMNS)
+        return self._trades_df
+
+    def positions(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """Row position in `index` of every fill (-1 where the date is absent)."""
+        idx_ns, _ = _as_ns(index)
+        return pd.Index(idx_ns).get_indexer(self._calendar)[self._date[: self._n]]
+
+    def units_matrix(self, index: pd.DatetimeIndex, initial: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cumulative units as a (dates x tickers) array: one scatter-add of the
+        fills into their (date, ticker) cells followed by a cumsum over time,
+        starting from the `initial` units held before index[0] (default none).
+        """
+        n_dates, n_tickers = len(index), len(self.tickers)
+        pos = self.positions(index)
+        codes = self._ticker[: self._n]
+        keep = (pos >= 0) & (codes < n_tickers)
+        flat = pos[keep] * n_tickers + codes[keep]
+        buys = np.bincount(flat, weights=self._fill_units()[keep], minlength=n_dates * n_tickers)
+        buys = buys.reshape(n_dates, n_tickers)
+        if initial is not None and n_dates:
+            buys = buys.astype(np.float64, copy=False)
+            buys[0] += initial
+        return buys.cumsum(axis=0)
 
     def daily_units(self, index: pd.DatetimeIndex) -> pd.DataFrame:
         """
         Returns DataFrame of cumulative units held by date per ticker.
         """
-        df = pd.DataFrame(0.0, index=index, columns=self.tickers)
-        if not self.trades:
-            return df
+        return pd.DataFrame(self.units_matrix(index), index=index, columns=self.tickers)
 
-        tdf = self.trades_df()
-        for t in self.tickers:
-            buys = pd.Series(0.0, index=index)
-            sub = tdf[tdf["ticker"] == t]
-            if not sub.empty:
-                grouped = sub.groupby("date")["units"].sum()
-                buys.loc[grouped.index] = grouped.values
-            df[t] = buys.cumsum()
-        return df
+    def daily_value(self, prices: pd.DataFrame, block_rows: int = 1024,
+                    initial: Optional[np.ndarray] = None) -> pd.Series:
+        """
+        Market value of the holdings by date. Units are accumulated
+        `block_rows` dates at a time (carrying the previous block's holdings),
+        so memory is one block of the universe rather than dates x tickers;
+        the result equals the full units matrix times prices. `initial` are
+        units already held before the first date, as in `units_matrix`.
+        """
+        index = prices.index
+        n_dates, n_tickers = len(index), len(self.tickers)
+        pos = self.positions(index)
+        codes = self._ticker[: self._n]
+        keep = np.flatnonzero((pos >= 0) & (codes < n_tickers))
+        keep = keep[np.argsort(pos[keep], kind="stable")]
+        fill_pos, fill_code, fill_units = pos[keep], codes[keep], self._fill_units()[keep]
+        bounds = np.searchsorted(fill_pos, np.arange(0, n_dates + block_rows, block_rows))
 
-    def daily_value(self, prices: pd.DataFrame) -> pd.Series:
-        units = self.daily_units(prices.index)
-        return (units * prices[self.tickers]).sum(axis=1)
+        cols = prices.columns.get_indexer(self.tickers)
+        if (cols < 0).any():
+            raise KeyError(f"tickers not in prices: {[t for t, c in zip(self.tickers, cols) if c < 0]}")
+        px_all = prices.to_numpy(dtype=float)
+        held = np.zeros(n_tickers) if initial is None else np.array(initial, dtype=float)
+        value = np.empty(n_dates)
+        for i, a in enumerate(range(0, n_dates, block_rows)):
+            b = min(a + block_rows, n_dates)
+            lo, hi = bounds[i], bounds[i + 1]
+            flat = (fill_pos[lo:hi] - a) * n_tickers + fill_code[lo:hi]
+            units = np.bincount(flat, weights=fill_units[lo:hi], minlength=(b - a) * n_tickers).astype(np.float64, copy=False)
+            units = units.reshape(b - a, n_tickers)
+            units[0] += held
+            np.cumsum(units, axis=0, out=units)
+            held = units[-1].copy()
+            value[a:b] = np.nansum(units * px_all[a:b][:, cols], axis=1)
+        return pd.Series(value, index=index)
 
     def daily_cashflows(self, index: pd.DatetimeIndex) -> pd.Series:
         """
         Cashflows aligned to index: negative on buy dates, 0 otherwise.
         """
-        cf = pd.Series(0.0, index=index)
-        if not self.trades:
-            return cf
-        tdf = self.trades_df()
-        grouped = tdf.groupby("date")["cash"].sum()
-        cf.loc[grouped.index] = grouped.values
-        return cf
\ No newline at end of file
+        pos = self.positions(index)
+        keep = pos >= 0
+        cf = np.bincount(pos[keep], weights=self._cash[: self._n][keep], minlength=len(index))
+        return pd.Series(cf, index=index)
+
+def weighted_buy_paths(prices: np.ndarray, spend: np.ndarray, weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Value and cashflow series of buying `spend[..., t]` on bar t split by
+    `weights`, with no ledger: the array form of `buy_weighted` followed by
+    `daily_value` / `daily_cashflows`. `prices` (..., time, tickers) broadcasts
+    against `spend` (..., time), e.g. one history for many parameter rows or
+    one simulated path per row. Untradable prices (NaN / <= 0) buy nothing.
+    """
+    px = np.asarray(prices, dtype=float)
+    with np.errstate(invalid="ignore"):
+        tradable = px > 0
+    px_filled = np.nan_to_num(px)
+
+    value = np.zeros(np.broadcast_shapes(spend.shape, px.shape[:-1]))
+    cashflows = np.zeros_like(value)
+    for j, w in enumerate(np.asarray(weights, dtype=float)):
+        cash = np.broadcast_to(spend * w, value.shape)
+        units = np.divide(cash, px[..., j], out=np.zeros_like(value), where=tradable[..., j]).cumsum(axis=-1)
+        value += units * px_filled[..., j]
+        cashflows -= cash
+    return value, cashflows
@@ -0,0 +1,171 @@
+from __future__ import annotations
+import json
+import os
+import re
+from typing import Dict, List, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+MANIFEST = "_manifest.json"
+_PART_RE = re.compile(r"^part-(\d+)\.parquet$")
+
+Range = Tuple[pd.Timestamp, pd.Timestamp]   # inclusive calendar-day range
+
+
+def _day(x) -> pd.Timestamp:
+    return pd.Timestamp(x).normalize()
+
+
+def _merge(ranges: List[Range]) -> List[Range]:
+    """Union of inclusive day ranges (adjacent days are joined)."""
+    out: List[Range] = []
+    for a, b in sorted(ranges):
+        if out and a <= out[-1][1] + pd.Timedelta(days=1):
+            out[-1] = (out[-1][0], max(out[-1][1], b))
+        else:
+            out.append((a, b))
+    return out
+
+
+class PriceCache:
+    """
+    Per-ticker, date-range-aware close-price store.
+
+    Layout under `root`:
+        ticker=<TICKER>/part-000001.parquet   (date, close) rows, one file per fetch
+        _manifest.json                        {ticker: [[start, end], ...]} ranges held
+
+    New data is appended as a new part file rather than rewriting the store;
+    `compact` folds a ticker's parts into one file once they pile up. Reads
+    only touch the requested tickers and push the date slice down to parquet.
+    A legacy single-file wide cache at `root` is migrated on first use.
+    """
+
+    def __init__(self, root: str, compact_after: int = 32):
+        self.root = root
+        self.compact_after = compact_after
+        if os.path.isfile(root):
+            self._migrate_legacy_file()
+        os.makedirs(root, exist_ok=True)
+        self._ranges = self._load_manifest()
+
+    # --- manifest -----------------------------------------------------------------
+
+    def _load_manifest(self) -> Dict[str, List[Range]]:
+        path = os.path.join(self.root, MANIFEST)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r") as f:
+            raw = json.load(f)
+        return {t: [(_day(a), _day(b)) for a, b in rs] for t, rs in raw.items()}
+
+    def _save_manifest(self):
+        raw = {t: [[str(a.date()), str(b.date())] for a, b in rs] for t, rs in sorted(self._ranges.items())}
+        path = os.path.join(self.root, MANIFEST)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(raw, f, indent=2)
+        os.replace(tmp, path)
+
+    def ranges(self, ticker: str) -> List[Range]:
+        return list(self._ranges.get(ticker, []))
+
+    def missing(self, ticker: str, start, end) -> List[Range]:
+        """Sub-ranges of [start, end] (end=None or past today means today) not held for `ticker`."""
+        lo = _day(start)
+        today = pd.Timestamp.today().normalize()
+        hi = today if end is None else min(_day(end), today)
+        gaps, cursor = [], lo
+        for a, b in self._ranges.get(ticker, []):
+            if b < cursor or a > hi:
+                continue
+            if a > cursor:
+                gaps.append((cursor, a - pd.Timedelta(days=1)))
+            cursor = max(cursor, b + pd.Timedelta(days=1))
+        if cursor <= hi:
+            gaps.append((cursor, hi))
+        return gaps
+
+    # --- parts --------------------------------------------------------------------
+
+    def _ticker_dir(self, ticker: str) -> str:
+        return os.path.join(self.root, f"ticker={ticker}")
+
+    def _parts(self, ticker: str) -> List[str]:
+        d = self._ticker_dir(ticker)
+        if not os.path.isdir(d):
+            return []
+        names = sorted((int(m.group(1)), n) for n in os.listdir(d) if (m := _PART_RE.match(n)))
+        return [os.path.join(d, n) for _, n in names]
+
+    def _write_part(self, ticker: str, closes: pd.Series):
+        parts = self._parts(ticker)
+        seq = int(_PART_RE.match(os.path.basename(parts[-1])).group(1)) + 1 if parts else 1
+        d = self._ticker_dir(ticker)
+        os.makedirs(d, exist_ok=True)
+        closes = closes.dropna().sort_index()
+        table = pa.table({
+            "date": pa.array(pd.DatetimeIndex(closes.index).as_unit("ns").values, type=pa.timestamp("ns")),
+            "close": pa.array(closes.to_numpy(dtype="float64")),
+        })
+        pq.write_table(table, os.path.join(d, f"part-{seq:06d}.parquet"), compression="zstd")
+
+    def append(self, ticker: str, closes: pd.Series, start, end):
+        """Store `closes` for `ticker` and record [start, end] as held."""
+        if len(closes):
+            self._write_part(ticker, closes)
+        self._ranges[ticker] = _merge(self._ranges.get(ticker, []) + [(_day(start), _day(end))])
+        self._save_manifest()
+        if len(self._parts(ticker)) > self.compact_after:
+            self.compact(ticker)
+
+    def compact(self, ticker: str):
+        """Rewrite a ticker's parts as a single file."""
+        parts = self._parts(ticker)
+        if len(parts) <= 1:
+            return
+        closes = self._read_ticker(ticker, None, None)
+        self._write_part(ticker, closes)
+        for p in parts:
+            os.remove(p)
+
+    # --- reads --------------------------------------------------------------------
+
+    def _read_ticker(self, ticker: str, start, end) -> pd.Series:
+        parts = self._parts(ticker)
+        filters = []
+        if start is not None:
+            filters.append(("date", ">=", _day(start)))
+        if end is not None:
+            filters.append(("date", "<", _day(end) + pd.Timedelta(days=1)))
+        frames = [
+            pq.read_table(p, columns=["date", "close"], filters=filters or None).to_pandas()
+            for p in parts
+        ]
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return pd.Series(dtype="float64", name=ticker, index=pd.DatetimeIndex([], name="Date"))
+        df = pd.concat(frames, ignore_index=True)
+        s = df.drop_duplicates("date", keep="last").set_index("date")["close"].sort_index()
+        s.index.name = "Date"
+        return s.rename(ticker)
+
+    def read(self, tickers: List[str], start=None, end=None) -> pd.DataFrame:
+        """Close prices (columns=tickers) for the requested date slice only."""
+        return pd.concat([self._read_ticker(t, start, end) for t in tickers], axis=1)
+
+    # --- migration ----------------------------------------------------------------
+
+    def _migrate_legacy_file(self):
+        legacy = pd.read_parquet(self.root)
+        os.replace(self.root, self.root + ".legacy")
+        os.makedirs(self.root, exist_ok=True)
+        self._ranges = {}
+        for t in legacy.columns:
+            s = legacy[t].dropna()
+            if len(s):
+                self._write_part(t, s)
+                self._ranges[t] = [(_day(s.index.min()), _day(s.index.max()))]
+        self._save_manifest()
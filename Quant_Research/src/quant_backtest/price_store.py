@@ -0,0 +1,210 @@
+from __future__ import annotations
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+META = "store.json"
+DATES = "dates.i8"
+VALUES = "closes.f8"
+_ALIGN = 8   # columns per row are padded to a multiple of 8 float64s (64-byte rows)
+
+
+def _padded(n: int) -> int:
+    return max(_ALIGN, -(-n // _ALIGN) * _ALIGN)
+
+
+def _files(generation: int):
+    """(dates, values) file names of a store generation; generation 0 keeps the plain names."""
+    if generation == 0:
+        return DATES, VALUES
+    return f"dates.{generation}.i8", f"closes.{generation}.f8"
+
+
+def _ns(dates) -> np.ndarray:
+    di = pd.DatetimeIndex(dates)
+    if di.tz is not None:
+        di = di.tz_convert("UTC").tz_localize(None)
+    return di.as_unit("ns").asi8
+
+
+class PriceStore:
+    """
+    Close prices on disk as one float64 (dates x tickers) matrix aligned on
+    the union trading calendar of its tickers, opened by memory mapping.
+
+    Layout under `root`:
+        dates.i8     int64 ns dates, ascending (the calendar)
+        closes.f8    row-major float64, one row per date, `capacity` columns
+        store.json   {"tickers": [...], "capacity": C, "n_dates": T, "generation": G}
+
+    Rows are padded to `capacity` columns (NaN-filled), so new tickers usually
+    fit without a rewrite, and new days are appended to the end of both files;
+    neither touches bytes a reader of the current manifest can see. Anything
+    that changes stored prices is a rewrite, which writes generation G + 1 (dates.<G+1>.i8 / closes.<G+1>.f8) next
+    to the live files and switches to it by replacing store.json, so readers
+    see either the old store or the new one, never a mix.
+    Readers map the files read-only: every process shares one page-cache copy,
+    and date / contiguous-ticker slices are views rather than copies.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._load()
+
+    def _load(self):
+        for attempt in range(3):
+            with open(os.path.join(self.root, META), "r") as f:
+                meta = json.load(f)
+            try:
+                return self._open(meta)
+            except FileNotFoundError:
+                if attempt == 2:   # a rewrite retired the generation the manifest named; reread it
+                    raise
+
+    def _open(self, meta: dict):
+        self.tickers: List[str] = list(meta["tickers"])
+        self.capacity = int(meta["capacity"])
+        self.n_dates = int(meta["n_dates"])
+        self.generation = int(meta.get("generation", 0))
+        self._col = {t: i for i, t in enumerate(self.tickers)}
+        dates_file, values_file = _files(self.generation)
+        self._dates_path = os.path.join(self.root, dates_file)
+        self._values_path = os.path.join(self.root, values_file)
+        dates = np.fromfile(self._dates_path, dtype=np.int64, count=self.n_dates)
+        self.index = pd.DatetimeIndex(dates.view("datetime64[ns]"), name="Date")
+        # map now: an open map stays valid after a later rewrite retires these files
+        if self.n_dates == 0:
+            self._values = np.empty((0, self.capacity))
+        else:
+            self._values = np.memmap(self._values_path, dtype=np.float64, mode="r",
+                                     shape=(self.n_dates, self.capacity))
+
+    @staticmethod
+    def exists(root: str) -> bool:
+        return os.path.isfile(os.path.join(root, META))
+
+    @classmethod
+    def create(cls, root: str, prices: pd.DataFrame, capacity: Optional[int] = None) -> "PriceStore":
+        """New store at `root` holding `prices` (index=dates, columns=tickers)."""
+        prices = prices.sort_index()
+        tickers = [str(c) for c in prices.columns]
+        capacity = _padded(max(capacity or 0, len(tickers)))
+        values = np.full((len(prices), capacity), np.nan)
+        values[:, : len(tickers)] = prices.to_numpy(dtype=np.float64)
+        _write(root, _ns(prices.index), values, tickers, capacity, 0)
+        return cls(root)
+
+    @property
+    def values(self) -> np.ndarray:
+        """Read-only (dates x capacity) map of the matrix; columns past len(tickers) are padding."""
+        return self._values
+
+    def rows(self, start=None, end=None) -> slice:
+        """Rows of the dates in [start, end] (whole days, either bound optional)."""
+        lo = 0 if start is None else self.index.searchsorted(pd.Timestamp(start).normalize(), side="left")
+        hi = len(self.index) if end is None else self.index.searchsorted(
+            pd.Timestamp(end).normalize() + pd.Timedelta(days=1), side="left")
+        return slice(int(lo), int(hi))
+
+    def columns(self, tickers: List[str]) -> np.ndarray:
+        missing = [t for t in tickers if t not in self._col]
+        if missing:
+            raise KeyError(f"tickers not in price store {self.root}: {missing}")
+        return np.array([self._col[t] for t in tickers], dtype=np.intp)
+
+    def frame(self, tickers: Optional[List[str]] = None, start=None, end=None) -> pd.DataFrame:
+        """
+        Close prices (columns=tickers) for [start, end]. A view of the map
+        when the tickers are contiguous in store order (e.g. all of them);
+        other selections copy just the requested block.
+        """
+        tickers = list(self.tickers if tickers is None else tickers)
+        rows = self.rows(start, end)
+        cols = self.columns(tickers)
+        if len(cols) and (np.diff(cols) == 1).all():
+            block = self.values[rows, cols[0]: cols[-1] + 1]
+        else:
+            block = self.values[rows][:, cols]
+        return pd.DataFrame(block, index=self.index[rows], columns=tickers, copy=False)
+
+    def append(self, prices: pd.DataFrame):
+        """
+        Write `prices` into the store. Days after the last stored date are
+        appended and new tickers take free padding columns, in place. Anything
+        else (changed prices of stored tickers, days inside or before the
+        calendar, more tickers than the capacity) rewrites the store.
+        """
+        prices = prices[~prices.index.duplicated(keep="last")].sort_index()
+        tickers = self.tickers + [str(c) for c in prices.columns if str(c) not in self._col]
+        dates = _ns(prices.index)
+        pos = pd.Index(self.index.asi8).get_indexer(dates)
+        known = pos >= 0
+        last = self.index.asi8[-1] if self.n_dates else np.iinfo(np.int64).min
+        if len(tickers) > self.capacity or (~known & (dates <= last)).any():
+            return self._rewrite(prices, tickers)
+
+        col = {t: i for i, t in enumerate(tickers)}
+        cols = np.array([col[str(c)] for c in prices.columns], dtype=np.intp)
+        values = prices.to_numpy(dtype=np.float64)
+        stored = cols < len(self.tickers)
+        if known.any() and stored.any():
+            # readers map the stored columns: a changed price goes to a new generation
+            update = values[known][:, stored]
+            if (~np.isnan(update) & (update != self.values[pos[known]][:, cols[stored]])).any():
+                return self._rewrite(prices, tickers)
+        if known.any() and not stored.all():
+            mm = np.memmap(self._values_path, dtype=np.float64, mode="r+",
+                           shape=(self.n_dates, self.capacity))
+            cells = np.ix_(pos[known], cols[~stored])
+            mm[cells] = values[known][:, ~stored]   # padding columns: no reader sees them yet
+            mm.flush()
+            del mm
+        new = ~known
+        if new.any():
+            block = np.full((int(new.sum()), self.capacity), np.nan)
+            block[:, cols] = values[new]
+            # drop any tail left by an interrupted append before extending
+            for path, arr, width in ((self._dates_path, dates[new], 1), (self._values_path, block, self.capacity)):
+                os.truncate(path, self.n_dates * width * 8)
+                with open(path, "ab") as f:
+                    f.write(np.ascontiguousarray(arr).tobytes())
+        _write_meta(self.root, tickers, self.capacity, self.n_dates + int(new.sum()), self.generation)
+        self._load()
+
+    def _rewrite(self, prices: pd.DataFrame, tickers: List[str]):
+        dates = _ns(prices.index)
+        index = self.index.union(pd.DatetimeIndex(dates.view("datetime64[ns]")))
+        capacity = _padded(max(self.capacity, 2 * len(tickers) if len(tickers) > self.capacity else 0))
+        values = np.full((len(index), capacity), np.nan)
+        values[index.get_indexer(self.index), : len(self.tickers)] = self.values[:, : len(self.tickers)]
+        col = {t: i for i, t in enumerate(tickers)}
+        cols = [col[str(c)] for c in prices.columns]
+        cells = np.ix_(pd.Index(index.asi8).get_indexer(dates), cols)
+        update = prices.to_numpy(dtype=np.float64)
+        values[cells] = np.where(np.isnan(update), values[cells], update)
+        old = (self._dates_path, self._values_path)
+        _write(self.root, index.asi8, values, tickers, capacity, self.generation + 1)
+        for path in old:
+            os.remove(path)   # open maps of the old generation stay valid
+        self._load()
+
+
+def _write_meta(root: str, tickers: List[str], capacity: int, n_dates: int, generation: int):
+    path = os.path.join(root, META)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"tickers": tickers, "capacity": capacity, "n_dates": n_dates, "generation": generation}, f)
+    os.replace(path + ".tmp", path)
+
+
+def _write(root: str, dates: np.ndarray, values: np.ndarray, tickers: List[str], capacity: int, generation: int):
+    """
+    Whole-store write as `generation`'s files, made live only by the final
+    manifest replace (files of a generation that never went live are overwritten).
+    """
+    os.makedirs(root, exist_ok=True)
+    for name, arr in zip(_files(generation), (dates.astype(np.int64), values)):
+        np.ascontiguousarray(arr).tofile(os.path.join(root, name))
+    _write_meta(root, tickers, capacity, len(dates), generation)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+import contextlib
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+_NULL_SPAN = contextlib.nullcontext()
+_active: Optional["Profiler"] = None
+
+
+class Profiler:
+    """
+    Wall-clock timings of named spans, aggregated per name (count, total,
+    max), and with `memory=True` the peak traced allocation inside each span
+    above what was allocated when it opened. Spans nest; an outer span's time
+    and peak include its inner spans.
+    """
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.spans: Dict[str, dict] = {}
+        self._stack: List[list] = []       # [start current, running peak] per open span
+
+    def _sync_peak(self):
+        _, peak = tracemalloc.get_traced_memory()
+        for frame in self._stack:
+            frame[1] = max(frame[1], peak)
+        tracemalloc.reset_peak()
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        if self.memory:
+            self._sync_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            self._stack.append([current, current])
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            peak = None
+            if self.memory:
+                self._sync_peak()
+                start, high = self._stack.pop()
+                peak = high - start
+            self._record(name, 1, elapsed, elapsed, peak)
+
+    def _record(self, name: str, count: int, total: float, longest: float, peak: Optional[int]):
+        s = self.spans.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+        s["count"] += count
+        s["total_s"] += total
+        s["max_s"] = max(s["max_s"], longest)
+        if peak is not None:
+            s["peak_bytes"] = max(s.get("peak_bytes", 0), peak)
+
+    def merge(self, report: dict):
+        """Add the spans of another profiler's `report()` (e.g. from a worker process)."""
+        for name, s in report.get("spans", {}).items():
+            self._record(name, s["count"], s["total_s"], s["max_s"], s.get("peak_bytes"))
+
+    def report(self) -> dict:
+        return {
+            "memory": self.memory,
+            "spans": {
+                name: {**s, "mean_s": s["total_s"] / s["count"]}
+                for name, s in sorted(self.spans.items(), key=lambda kv: -kv[1]["total_s"])
+            },
+        }
+
+    def write_json(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+
+def span(name: str):
+    """Timing span on the active profiler; a shared no-op context when profiling is off."""
+    if _active is None:
+        return _NULL_SPAN
+    return _active.span(name)
+
+
+def active() -> Optional[Profiler]:
+    return _active
+
+
+@contextlib.contextmanager
+def profiling(memory: bool = False, pstats_path: Optional[str] = None):
+    """
+    Make a fresh `Profiler` the active one for the duration of the block and
+    yield it. `memory` turns on tracemalloc; `pstats_path` also runs cProfile
+    and dumps its stats there (readable with `pstats` / snakeviz).
+    """
+    global _active
+    prev, _active = _active, Profiler(memory=memory)
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    prof = cProfile.Profile() if pstats_path else None
+    if prof is not None:
+        prof.enable()
+    try:
+        yield _active
+    finally:
+        if prof is not None:
+            prof.disable()
+            os.makedirs(os.path.dirname(pstats_path) or ".", exist_ok=True)
+            prof.dump_stats(pstats_path)
+        if started_tracing:
+            tracemalloc.stop()
+        _active = prev
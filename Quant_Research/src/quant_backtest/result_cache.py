@@ -0,0 +1,206 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError, version
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .engine import BacktestResult
+from .strategies.base import Strategy
+from .weights import WeightSchedule, Weights
+
+_ENTRY_FILES = ("timeseries.parquet", "trades.parquet", "metrics.json")
+_CSV_FILES = ("timeseries.csv", "trades.csv", "metrics.json")
+
+
+def package_version() -> str:
+    try:
+        return version("quant_backtest")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+@lru_cache(maxsize=None)
+def _source_digest(path: str) -> str:
+    """sha256 of the .py files under `path` (a directory) or of the file `path`."""
+    h = hashlib.sha256()
+    if os.path.isdir(path):
+        files = sorted(os.path.join(d, f) for d, _, names in os.walk(path) for f in names if f.endswith(".py"))
+    else:
+        files = [path]
+    for file in files:
+        h.update(os.path.relpath(file, path).encode())
+        with open(file, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def code_version(strategy: Strategy) -> str:
+    """
+    Digest of the code a result depends on: this package's sources and the
+    module defining `strategy` (plugins live elsewhere). Unlike the package
+    version it changes with every edit, including in a source checkout.
+    """
+    digest = _source_digest(os.path.dirname(os.path.abspath(__file__)))
+    module_file = getattr(sys.modules.get(type(strategy).__module__), "__file__", None)
+    if module_file:
+        digest += _source_digest(os.path.abspath(module_file))
+    return digest
+
+
+def _hash_prices(h, prices: pd.DataFrame):
+    idx = pd.DatetimeIndex(prices.index)
+    h.update(idx.as_unit("ns").asi8.tobytes())
+    h.update(str(idx.tz).encode())
+    h.update(json.dumps([str(c) for c in prices.columns]).encode())
+    h.update(np.ascontiguousarray(prices.to_numpy(dtype=np.float64)).tobytes())
+
+
+def _hash_weights(h, weights: Weights):
+    if not isinstance(weights, WeightSchedule):
+        h.update(json.dumps([[str(t), float(w)] for t, w in weights.items()]).encode())
+        return
+    h.update(b"schedule")
+    h.update(weights.dates.as_unit("ns").asi8.tobytes())
+    h.update(json.dumps(weights.tickers).encode())
+    m = weights.matrix
+    for arr in (m.indptr.astype(np.int64), m.indices.astype(np.int64), m.data):
+        h.update(np.ascontiguousarray(arr).tobytes())
+
+
+def _hash_run(h, weights: Weights, strategy: Strategy):
+    """Everything but the prices: package version and sources, strategy class and parameters, weights."""
+    h.update(package_version().encode())
+    h.update(code_version(strategy).encode())
+    cls = type(strategy)
+    h.update(f"{cls.__module__}.{cls.__qualname__}".encode())
+    h.update(json.dumps(sorted(vars(strategy).items()), default=repr).encode())
+    _hash_weights(h, weights)
+
+
+def cache_key(prices: pd.DataFrame, weights: Weights, strategy: Strategy) -> str:
+    """
+    Content hash of everything a backtest result depends on: the exact price
+    slice (dates, columns, values), the weights (in order), the strategy class
+    and its parameters, and the package version and source code.
+    """
+    h = hashlib.sha256()
+    _hash_run(h, weights, strategy)
+    _hash_prices(h, prices)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed store of `BacktestResult`s under `root`, one directory
+    per key. Entries are touched on every hit and the least recently used ones
+    are evicted once the store grows past `max_bytes`. Writes go through a
+    temporary directory and a rename, so concurrent workers can share a root.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 1 << 30):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        os.makedirs(root, exist_ok=True)
+
+    key = staticmethod(cache_key)
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def get(self, key: str) -> Optional[BacktestResult]:
+        d = self._entry(key)
+        if not all(os.path.exists(os.path.join(d, f)) for f in _ENTRY_FILES):
+            return None
+        try:
+            with open(os.path.join(d, "metrics.json"), "r") as f:
+                metrics = json.load(f)
+            result = BacktestResult(
+                timeseries=pd.read_parquet(os.path.join(d, "timeseries.parquet")),
+                trades=pd.read_parquet(os.path.join(d, "trades.parquet")),
+                metrics=metrics,
+            )
+        except (OSError, ValueError):
+            return None     # evicted or replaced under us; treat as a miss
+        os.utime(d)
+        return result
+
+    def put(self, key: str, result: BacktestResult):
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            result.timeseries.to_parquet(os.path.join(tmp, "timeseries.parquet"), compression="zstd")
+            result.trades.to_parquet(os.path.join(tmp, "trades.parquet"), compression="zstd", index=False)
+            with open(os.path.join(tmp, "metrics.json"), "w") as f:
+                json.dump(result.metrics, f, indent=2)
+            try:
+                os.rename(tmp, self._entry(key))
+            except OSError:
+                pass        # another process stored the same key first
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    # Rendered CSV outputs are kept next to the result, so a CSV-format hit is
+    # a file copy rather than another round of CSV formatting.
+
+    def store_csv(self, key: str, paths):
+        d = os.path.join(self._entry(key), "csv")
+        if not os.path.isdir(self._entry(key)):
+            return
+        os.makedirs(d, exist_ok=True)
+        for src, name in zip(paths, _CSV_FILES):
+            tmp = os.path.join(d, f".{name}.tmp-{os.getpid()}")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, os.path.join(d, name))
+        self.evict()
+
+    def restore_csv(self, key: str, out_dir: str, run_name: str):
+        """Copy a stored CSV trio to out_dir as run_name; None on a miss."""
+        d = os.path.join(self._entry(key), "csv")
+        srcs = [os.path.join(d, name) for name in _CSV_FILES]
+        if not all(os.path.exists(p) for p in srcs):
+            return None
+        os.makedirs(out_dir, exist_ok=True)
+        dsts = [os.path.join(out_dir, f"{run_name}.{name}") for name in _CSV_FILES]
+        try:
+            for src, dst in zip(srcs, dsts):
+                shutil.copyfile(src, dst)
+        except OSError:
+            return None
+        os.utime(self._entry(key))
+        return tuple(dsts)
+
+    def _entries(self):
+        out = []
+        for e in os.scandir(self.root):
+            if e.is_dir() and not e.name.startswith("."):
+                size = sum(
+                    os.path.getsize(os.path.join(dirpath, f))
+                    for dirpath, _, files in os.walk(e.path) for f in files
+                )
+                out.append((e.stat().st_mtime, size, e.path))
+        return out
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Drop least recently used entries until the store fits in `max_bytes`."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            shutil.rmtree(path, ignore_errors=True)
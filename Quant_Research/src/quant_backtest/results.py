@@ -0,0 +1,132 @@
+from __future__ import annotations
+import os
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+if TYPE_CHECKING:
+    from .engine import BacktestResult
+
+DATASET_DIR = "results"
+TABLES = ("timeseries", "trades", "metrics")
+PART = "part-0.parquet"
+
+
+def _table_dir(out_dir: str, table: str) -> str:
+    if table not in TABLES:
+        raise ValueError(f"table must be one of {TABLES}, got {table!r}")
+    return os.path.join(out_dir, DATASET_DIR, table)
+
+
+def _part_path(out_dir: str, table: str, run_id: str) -> str:
+    if not run_id or os.sep in run_id or (os.altsep and os.altsep in run_id):
+        raise ValueError(f"invalid run id {run_id!r}")
+    return os.path.join(_table_dir(out_dir, table), f"run_id={run_id}", PART)
+
+
+def _write(table: pa.Table, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
+
+
+def append_run(out_dir: str, run_id: str, result: "BacktestResult"):
+    """
+    Add one run to the dataset under `out_dir/results/`:
+
+        timeseries/run_id=<id>/part-0.parquet   Date + every timeseries column
+        trades/run_id=<id>/part-0.parquet       the trade ledger
+        metrics/run_id=<id>/part-0.parquet      one row of end-of-period metrics
+
+    Each run is its own partition, so appending never rewrites earlier runs;
+    writing an existing run id replaces that run. Returns the three paths.
+    """
+    ts = result.timeseries.rename_axis("Date").reset_index()
+    paths = run_paths(out_dir, run_id)
+    _write(pa.Table.from_pandas(ts, preserve_index=False), paths[0])
+    _write(pa.Table.from_pandas(result.trades, preserve_index=False), paths[1])
+    _write(pa.Table.from_pylist([result.metrics]), paths[2])
+    return paths
+
+
+def extend_run(
+    out_dir: str,
+    run_id: str,
+    timeseries: pd.DataFrame,
+    trades: pd.DataFrame,
+    metrics: dict,
+    keep: Sequence[int],
+):
+    """
+    Add rows to the end of an existing run: its first keep[0] timeseries and
+    keep[1] trade rows are kept (dropping anything written after them), the
+    new rows follow, and the metrics row is replaced. Returns the three paths.
+    """
+    paths = run_paths(out_dir, run_id)
+    for path, frame, n in ((paths[0], timeseries.rename_axis("Date").reset_index(), keep[0]), (paths[1], trades, keep[1])):
+        old = pq.read_table(path).slice(0, n)
+        new = pa.Table.from_pandas(frame, schema=old.schema, preserve_index=False)
+        _write(pa.concat_tables([old, new]), path)
+    _write(pa.Table.from_pylist([metrics]), paths[2])
+    return paths
+
+
+def run_paths(out_dir: str, run_id: str) -> Tuple[str, str, str]:
+    """(timeseries, trades, metrics) partition files of a run."""
+    return tuple(_part_path(out_dir, table, run_id) for table in TABLES)
+
+
+def list_runs(out_dir: str, table: str = "metrics") -> List[str]:
+    """Run ids held in the dataset, sorted."""
+    d = _table_dir(out_dir, table)
+    if not os.path.isdir(d):
+        return []
+    return sorted(
+        name[len("run_id="):] for name in os.listdir(d)
+        if name.startswith("run_id=") and os.path.exists(os.path.join(d, name, PART))
+    )
+
+
+def _read(out_dir: str, table: str, run_ids: Optional[Sequence[str]], columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    """
+    Read the requested runs only; within each run file only `columns` are
+    decoded (columns a run does not have are skipped, e.g. another universe's
+    units_<ticker>).
+    """
+    run_ids = list_runs(out_dir, table) if run_ids is None else list(run_ids)
+    missing = [r for r in run_ids if not os.path.exists(_part_path(out_dir, table, r))]
+    if missing:
+        raise KeyError(f"runs not in {table} dataset: {missing}")
+
+    frames = []
+    for run_id in run_ids:
+        path = _part_path(out_dir, table, run_id)
+        cols = None
+        if columns is not None:
+            names = pq.read_schema(path).names
+            cols = [c for c in columns if c in names]
+        df = pq.read_table(path, columns=cols).to_pandas()
+        df.insert(0, "run_id", run_id)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["run_id", *(columns or [])])
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_metrics(out_dir: str, run_ids: Optional[Sequence[str]] = None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """One row per run, indexed by run_id."""
+    return _read(out_dir, "metrics", run_ids, columns).set_index("run_id")
+
+
+def read_timeseries(out_dir: str, run_ids: Sequence[str], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Timeseries rows of the given runs, indexed by (run_id, Date)."""
+    cols = None if columns is None else ["Date", *[c for c in columns if c != "Date"]]
+    return _read(out_dir, "timeseries", run_ids, cols).set_index(["run_id", "Date"])
+
+
+def read_trades(out_dir: str, run_ids: Sequence[str], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Trade ledgers of the given runs, with a run_id column."""
+    return _read(out_dir, "trades", run_ids, columns)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .metrics import xirr_batch
+from .strategies.base import Strategy
+
+ROLLING_COLUMNS = (
+    "start", "end", "total_contributions", "terminal_value", "simple_return_pct",
+    "irr_annualized", "num_trades",
+)
+
+
+def rolling_start(
+    prices: pd.DataFrame,
+    weights: dict[str, float],
+    strategy: Strategy,
+    starts=None,
+    horizon: Optional[int] = None,
+    periods_per_year: int = 252,
+    chunk_starts: int = 256,
+) -> pd.DataFrame:
+    """
+    Results of starting the strategy on every date in `starts` (default: every
+    bar of `prices`) and holding until `horizon` bars later (inclusive of the
+    start bar) or the end of the history. Starts whose horizon runs past the
+    end are dropped.
+
+    The strategy runs once over the whole history. A buy-only ledger is
+    additive, so the fills of a window are differences of the cumulative units
+    and contributions, and terminal value / contributions / simple return for
+    all starts come from those prefix sums; only the IRRs need each window's
+    flows, solved in blocks of `chunk_starts`.
+
+    This is only what a fresh `run_backtest` from each start produces when
+    the strategy buys the same from there on (`Strategy.restart_bars`, e.g.
+    monthly buys started on a first trading day of the month). Other starts,
+    including any start of a rolling-window or running-peak strategy, raise
+    ValueError.
+    """
+    index = prices.index
+    n = len(index)
+    s = np.arange(n) if starts is None else index.get_indexer(pd.DatetimeIndex(starts))
+    if (s < 0).any():
+        raise KeyError(f"start dates not in the price index: {list(pd.DatetimeIndex(starts)[s < 0])}")
+    clean = strategy.restart_bars(index)[s]
+    if not clean.all():
+        raise ValueError(f"{strategy.name} started on {index[s[~clean][0]].date()} does not buy as its full-history "
+                         f"run does; rolling_start needs starts where the schedule does not depend on the start date")
+
+    pf, _ = strategy.run(prices=prices, portfolio_weights=weights)
+
+    px = np.nan_to_num(prices.loc[:, pf.tickers].to_numpy(dtype=float))
+    units = np.zeros((n + 1, len(pf.tickers)))
+    units[1:] = pf.units_matrix(index)                               # units[t + 1]: held after bar t
+    cf = pf.daily_cashflows(index).to_numpy()
+    contrib = np.r_[0.0, np.clip(-cf, 0.0, None).cumsum()]
+    pos = pf.positions(index)
+    trades = np.r_[0, np.bincount(pos[pos >= 0], minlength=n).cumsum()]
+
+    if horizon is None:
+        e = np.full(len(s), n - 1)
+    else:
+        e = s + int(horizon) - 1
+        s, e = s[e < n], e[e < n]
+
+    terminal = np.einsum("ij,ij->i", units[e + 1] - units[s], px[e])
+    total = contrib[e + 1] - contrib[s]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        simple = np.where(total == 0, np.nan, (terminal - total) / total * 100.0)
+
+    irr = np.full(len(s), np.nan)
+    for lo in range(0, len(s), chunk_starts):
+        bs, be = s[lo: lo + chunk_starts], e[lo: lo + chunk_starts]
+        first, last = bs.min(), be.max()
+        t = np.arange(first, last + 1)
+        flows = np.where((t >= bs[:, None]) & (t <= be[:, None]), cf[first: last + 1], 0.0)
+        flows[np.arange(len(bs)), be - first] += terminal[lo: lo + chunk_starts]
+        cols = np.flatnonzero((flows != 0.0).any(axis=0))
+        if len(cols):
+            irr[lo: lo + len(bs)] = xirr_batch(flows[:, cols], (cols + first) / periods_per_year)
+
+    return pd.DataFrame({
+        "start": index[s],
+        "end": index[e],
+        "total_contributions": total,
+        "terminal_value": terminal,
+        "simple_return_pct": simple,
+        "irr_annualized": irr,
+        "num_trades": trades[e + 1] - trades[s],
+    }, columns=list(ROLLING_COLUMNS))
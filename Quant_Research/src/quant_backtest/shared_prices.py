@@ -0,0 +1,63 @@
+from __future__ import annotations
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class SharedPrices:
+    """
+    Close-price matrix held in a named shared-memory block.
+
+    The handle pickles as metadata only (block name, shape, dates, tickers),
+    so passing it to worker processes does not copy the prices; each process
+    attaches to the same physical pages and gets a zero-copy DataFrame view.
+    """
+
+    def __init__(self, name: str, shape: tuple[int, int], index: pd.DatetimeIndex, columns: List[str]):
+        self.name = name
+        self.shape = shape
+        self.index = index
+        self.columns = columns
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._frame: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def create(cls, prices: pd.DataFrame) -> "SharedPrices":
+        values = np.ascontiguousarray(prices.to_numpy(dtype=np.float64))
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+        handle = cls(shm.name, values.shape, prices.index, list(prices.columns))
+        handle._shm = shm
+        return handle
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shm"] = None
+        state["_frame"] = None
+        return state
+
+    def frame(self) -> pd.DataFrame:
+        """Zero-copy DataFrame over the shared block (attaches on first use)."""
+        if self._frame is None:
+            if self._shm is None:
+                self._shm = shared_memory.SharedMemory(name=self.name)
+            values = np.ndarray(self.shape, dtype=np.float64, buffer=self._shm.buf)
+            values.flags.writeable = False
+            self._frame = pd.DataFrame(values, index=self.index, columns=self.columns, copy=False)
+        return self._frame
+
+    def close(self):
+        self._frame = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+    def unlink(self):
+        """Release the block; call once, from the creating process."""
+        shm = self._shm or shared_memory.SharedMemory(name=self.name)
+        self._frame = None
+        shm.close()
+        shm.unlink()
+        self._shm = None
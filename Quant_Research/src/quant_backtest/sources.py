@@ -0,0 +1,250 @@
+from __future__ import annotations
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+
+# The download libraries take seconds to import, so they are loaded on the
+# first download rather than with this module; None when unavailable.
+
+@functools.lru_cache(maxsize=None)
+def _yfinance():
+    try:
+        import yfinance
+    except Exception:
+        return None
+    return yfinance
+
+
+@functools.lru_cache(maxsize=None)
+def _datareader():
+    try:
+        from pandas_datareader import data
+    except Exception:
+        return None
+    return data
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter shared by all workers of a source.
+    `acquire` blocks the calling thread only; `pause` holds every worker back
+    (used as a shared backoff after a rate-limit response).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)                     # tokens per second
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._not_before = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                wait = self._not_before - now
+                if wait <= 0:
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return
+                    wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._not_before = max(self._not_before, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+def _is_rate_limited(err: Exception) -> bool:
+    return "Too Many Requests" in str(err)
+
+
+class PriceSource:
+    """
+    One close-price backend. Subclasses implement `fetch` (a single request);
+    `get` adds the shared rate limiter and retry-with-backoff on rate limits.
+    """
+    name: str = "base"
+
+    def __init__(self, limiter: Optional[TokenBucket] = None, tries: int = 4, backoff: float = 3.0):
+        self.limiter = limiter
+        self.tries = tries
+        self.backoff = backoff
+
+    def fetch(self, ticker: str, start: str, end: Optional[str]) -> pd.Series:
+        raise NotImplementedError
+
+    def get(self, ticker: str, start: str, end: Optional[str]) -> pd.Series:
+        for attempt in range(self.tries):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                return self.fetch(ticker, start, end)
+            except Exception as e:
+                if _is_rate_limited(e) and attempt < self.tries - 1:
+                    delay = self.backoff * (attempt + 1)
+                    if self.limiter is not None:
+                        self.limiter.pause(delay)
+                    else:
+                        time.sleep(delay)
+                    continue
+                raise RuntimeError(f"{self.name} failed for {ticker}: {e}") from e
+        raise RuntimeError(f"{self.name} failed for {ticker}")
+
+
+class YahooSource(PriceSource):
+    name = "yahoo"
+
+    def __init__(self, limiter: Optional[TokenBucket] = None, **kwargs):
+        super().__init__(limiter if limiter is not None else TokenBucket(rate=2.0, capacity=4), **kwargs)
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def session(self):
+        with self._session_lock:
+            yf = _yfinance()
+            if self._session is None and yf is not None:
+                try:
+                    self._session = yf.utils.get_yf_session()
+                except Exception:
+                    self._session = None
+            return self._session
+
+    def fetch(self, ticker, start, end):
+        return _download_yahoo(ticker, start, end, session=self.session())
+
+
+class StooqSource(PriceSource):
+    name = "stooq"
+
+    def __init__(self, limiter: Optional[TokenBucket] = None, **kwargs):
+        super().__init__(limiter if limiter is not None else TokenBucket(rate=5.0, capacity=5), **kwargs)
+
+    def fetch(self, ticker, start, end):
+        return _download_stooq(ticker, start, end)
+
+
+class CSVDirSource(PriceSource):
+    """
+    Local stand-in: reads `<directory>/<TICKER>.csv` with a date column and a
+    close column (case-insensitive 'date'/'close').
+    """
+    name = "csv"
+
+    def __init__(self, directory: str, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+
+    def fetch(self, ticker, start, end):
+        path = os.path.join(self.directory, f"{ticker}.csv")
+        if not os.path.exists(path):
+            raise RuntimeError(f"No CSV for {ticker} in {self.directory}")
+        df = pd.read_csv(path)
+        cols = {c.lower(): c for c in df.columns}
+        if "date" not in cols or "close" not in cols:
+            raise RuntimeError(f"{path} needs 'date' and 'close' columns")
+        s = pd.Series(df[cols["close"]].to_numpy(dtype=float), index=pd.to_datetime(df[cols["date"]]), name=ticker)
+        s = s.sort_index()
+        s = s[s.index >= pd.Timestamp(start)]
+        if end is not None:
+            s = s[s.index <= pd.Timestamp(end)]
+        if s.empty:
+            raise RuntimeError(f"Empty CSV frame for {ticker}")
+        s.index.name = "Date"
+        return s
+
+
+class FallbackSource(PriceSource):
+    """Tries each source in order, as in the 'auto' mode (Yahoo, then Stooq)."""
+    name = "auto"
+
+    def __init__(self, sources: Sequence[PriceSource]):
+        super().__init__()
+        self.sources = list(sources)
+
+    def get(self, ticker, start, end):
+        errors = []
+        for src in self.sources:
+            try:
+                return src.get(ticker, start, end)
+            except Exception as e:
+                errors.append(str(e))
+        raise RuntimeError(f"Failed all sources for {ticker}: {'; '.join(errors)}")
+
+    fetch = get
+
+
+def resolve_source(source: Union[str, PriceSource]) -> PriceSource:
+    """'auto' | 'yahoo' | 'stooq' | 'csv:<directory>' | a PriceSource instance."""
+    if isinstance(source, PriceSource):
+        return source
+    chosen = source.lower()
+    if chosen == "auto":
+        return FallbackSource([YahooSource(), StooqSource()])
+    if chosen == "yahoo":
+        return YahooSource()
+    if chosen == "stooq":
+        return StooqSource()
+    if chosen.startswith("csv:"):
+        return CSVDirSource(source[len("csv:"):])
+    raise ValueError(f"Unknown price source {source!r}")
+
+
+Request = Tuple[str, str, Optional[str]]   # (ticker, start, end)
+
+
+def fetch_many(
+    requests: List[Request],
+    source: PriceSource,
+    max_workers: int = 8,
+) -> List[Union[pd.Series, Exception]]:
+    """
+    Fetch every request concurrently on a thread pool. Results come back in
+    request order; a failed request yields its exception instead of a series.
+    """
+    def one(req: Request):
+        try:
+            return source.get(*req)
+        except Exception as e:
+            return e
+
+    if max_workers <= 1 or len(requests) <= 1:
+        return [one(r) for r in requests]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(requests))) as pool:
+        return list(pool.map(one, requests))
+
+
+def _download_yahoo(ticker: str, start: str, end: Optional[str], session=None) -> pd.Series:
+    yf = _yfinance()
+    if yf is None:
+        raise RuntimeError("yfinance not installed/available.")
+    df = yf.download(
+        ticker, start=start, end=end,
+        auto_adjust=True, progress=False,
+        threads=False, session=session
+    )
+    if df is None or df.empty:
+        raise RuntimeError(f"Empty Yahoo frame for {ticker}")
+    return df["Close"].rename(ticker)
+
+
+def _download_stooq(ticker: str, start: str, end: Optional[str]) -> pd.Series:
+    pdr = _datareader()
+    if pdr is None:
+        raise RuntimeError("pandas-datareader not installed/available.")
+    sym = f"{ticker}.US"
+    df = pdr.DataReader(sym, "stooq", start=start, end=end)
+    if df is None or df.empty:
+        raise RuntimeError(f"Empty Stooq frame for {ticker}")
+    df = df.sort_index()
+    return df["Close"].rename(ticker)
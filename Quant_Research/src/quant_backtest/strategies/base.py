@@ -1,18 +1,87 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, Optional
+import numpy as np
 import pandas as pd
 
+from ..data import compute_returns, weighted_portfolio_return
+from ..weights import WeightSchedule, Weights
+
 @dataclass(frozen=True)
 class StrategyResult:
     extra_series: Dict[str, pd.Series]   # any additional columns to export
 
+def synthetic_index_level(prices: pd.DataFrame, portfolio_weights: Weights) -> pd.Series:
+    """Level of the weighted portfolio index, starting at 1.0."""
+    if isinstance(portfolio_weights, WeightSchedule):
+        port_ret = portfolio_weights.portfolio_return(prices)
+    else:
+        port_ret = weighted_portfolio_return(compute_returns(prices), portfolio_weights)
+    return (1.0 + port_ret).cumprod()
+
+def synthetic_index_paths(prices: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """`synthetic_index_level` for price arrays of shape (..., time, tickers); returns (..., time)."""
+    px = np.asarray(prices, dtype=float)
+    rets = np.zeros_like(px)
+    rets[..., 1:, :] = px[..., 1:, :] / px[..., :-1, :] - 1.0
+    rets = np.where(np.isnan(rets), 0.0, rets)
+    port_ret = (rets * np.asarray(weights, dtype=float)).sum(axis=-1)
+    return np.cumprod(1.0 + port_ret, axis=-1)
+
 class Strategy:
     name: str = "base"
 
+    @classmethod
+    def from_args(cls, args) -> "Strategy":
+        """
+        Instance from run_strategy CLI / YAML arguments (an argparse
+        namespace). By default the `params` mapping (--param key=value,
+        or `params:` in the config) is passed as keyword arguments.
+        """
+        return cls(**dict(getattr(args, "params", None) or ()))
+
+    def signals(self, level: np.ndarray, index: pd.DatetimeIndex) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The buy rule on synthetic index levels of shape (..., time), e.g.
+        (paths x time): the trigger mask and the cash to spend on each bar
+        (broadcastable to `level`). `index` holds the dates of the time axis.
+        """
+        raise NotImplementedError
+
     def run(
         self,
         prices: pd.DataFrame,
         portfolio_weights: dict[str, float],
     ) -> tuple["BuyOnlyPortfolio", StrategyResult]:
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def restart_bars(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Mask of the bars t from which a run over index[t:] buys exactly as the
+        run over all of `index` does from bar t on. Only the first bar by
+        default: rules that look back (rolling windows, running peaks) see a
+        different history when the data starts later.
+        """
+        mask = np.zeros(len(index), dtype=bool)
+        mask[:1] = True
+        return mask
+
+    def initial_state(self) -> dict:
+        """JSON-serializable signal state before the first bar (see `extend`)."""
+        raise NotImplementedError(f"{type(self).__name__} does not support incremental updates")
+
+    def extend(
+        self,
+        state: dict,
+        prices: pd.DataFrame,
+        portfolio_weights: Weights,
+        level: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray], dict]:
+        """
+        The buy rule on bars that follow `state`: `prices` are the new rows and
+        `level` their synthetic index levels. Returns the trigger mask, the
+        cash per bar, the extra series of `run` (same keys, new rows only) and
+        the state after the last bar. Starting from `initial_state()` and
+        extending in any number of steps gives exactly what `run` gives.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support incremental updates")
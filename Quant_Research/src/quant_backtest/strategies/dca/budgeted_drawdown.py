@@ -0,0 +1,73 @@
+from __future__ import annotations
+import math
+
+import numpy as np
+
+from ...event_engine import EventStrategy, jit
+
+# state slots
+_BUDGET, _PEAK, _LAST_BUY = 0, 1, 2
+
+@jit
+def budgeted_drawdown_kernel(t, level, new_month, value, state, params):
+    monthly_budget, threshold, amount, cooldown, max_position, rollover = (
+        params[0], params[1], params[2], params[3], params[4], params[5]
+    )
+    if new_month:
+        state[_BUDGET] = state[_BUDGET] + monthly_budget if rollover > 0 else monthly_budget
+    if level > state[_PEAK]:
+        state[_PEAK] = level
+    if level / state[_PEAK] - 1.0 > -threshold or t - state[_LAST_BUY] < cooldown:
+        return 0.0
+    cash = min(amount, state[_BUDGET], max_position - value)
+    if cash <= 0:
+        return 0.0
+    state[_BUDGET] -= cash
+    state[_LAST_BUY] = t
+    return cash
+
+class BudgetedDrawdownBuy(EventStrategy):
+    """
+    Drawdown buying out of a monthly cash budget: each month adds
+    `monthly_budget` (carried over when `rollover`, else reset), and while the
+    synthetic index is `threshold` below its running peak a buy of `amount` is
+    made, at most once every `cooldown_days` bars, limited by the remaining
+    budget and by `max_position` (market value of the holdings).
+    """
+    name = "strat4_budgeted_dd"
+    kernel = staticmethod(budgeted_drawdown_kernel)
+
+    def __init__(
+        self,
+        monthly_budget: float = 100.0,
+        threshold: float = 0.05,
+        amount: float = 50.0,
+        cooldown_days: int = 5,
+        max_position: float = math.inf,
+        rollover: bool = True,
+    ):
+        self.monthly_budget = float(monthly_budget)
+        self.threshold = float(threshold)
+        self.amount = float(amount)
+        self.cooldown = int(cooldown_days)
+        self.max_position = float(max_position)
+        self.rollover = bool(rollover)
+
+    @classmethod
+    def from_args(cls, args):
+        # threshold and --fixed (the per-buy amount) are shared with strat3
+        return cls(
+            monthly_budget=args.budget,
+            threshold=args.threshold,
+            amount=args.fixed,
+            cooldown_days=args.cooldown,
+            max_position=args.max_position,
+            rollover=not args.no_rollover,
+        )
+
+    def params(self) -> np.ndarray:
+        return np.array([self.monthly_budget, self.threshold, self.amount, self.cooldown,
+                         self.max_position, float(self.rollover)])
+
+    def state(self) -> np.ndarray:
+        return np.array([0.0, -np.inf, -np.inf])
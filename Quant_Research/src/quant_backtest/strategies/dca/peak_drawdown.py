@@ -1,8 +1,15 @@
 from __future__ import annotations
+import numpy as np
 import pandas as pd
 
 from ...portfolio import BuyOnlyPortfolio
-from ..base import Strategy, StrategyResult
+from ...weights import Weights, weight_tickers
+from ..base import Strategy, StrategyResult, synthetic_index_level
+
+def peak_drawdown(level: np.ndarray) -> np.ndarray:
+    """level / running peak - 1 along the last axis (negative or 0)."""
+    level = np.asarray(level, dtype=float)
+    return level / np.maximum.accumulate(level, axis=-1) - 1.0
 
 class PeakDrawdownBuy(Strategy):
     name = "strat3_peak_dd"
@@ -19,38 +26,57 @@ class PeakDrawdownBuy(Strategy):
         self.fixed_amount = float(fixed_amount)
         self.k = float(k)
 
-    def run(self, prices: pd.DataFrame, portfolio_weights: dict[str, float]):
-        tickers = list(portfolio_weights.keys())
+    @classmethod
+    def from_args(cls, args):
+        return cls(
+            threshold=args.threshold,
+            mode=args.mode,
+            fixed_amount=args.fixed,
+            k=args.k,
+        )
+
+    def signals(self, level: np.ndarray, index: pd.DatetimeIndex):
+        if self.mode not in ("fixed", "proportional"):
+            raise ValueError("mode must be 'fixed' or 'proportional'")
+        dd = peak_drawdown(level)
+        trigger = dd <= -self.threshold
+        if self.mode == "fixed":
+            amount = np.full(dd.shape, self.fixed_amount)
+        else:
+            amount = self.k * (-dd)  # positive magnitude
+        return trigger, amount
+
+    def run(self, prices: pd.DataFrame, portfolio_weights: Weights):
+        if self.mode not in ("fixed", "proportional"):
+            raise ValueError("mode must be 'fixed' or 'proportional'")
+
+        tickers = weight_tickers(portfolio_weights)
         pf = BuyOnlyPortfolio(tickers)
 
         # synthetic index
-        asset_rets = prices.pct_change().fillna(0.0)
-        w = pd.Series(portfolio_weights)
-        port_ret = (asset_rets * w).sum(axis=1)
-        index_level = (1.0 + port_ret).cumprod()
+        index_level = synthetic_index_level(prices, portfolio_weights)
 
-        peak = index_level.cummax()
-        dd = index_level / peak - 1.0  # negative or 0
-        trigger = dd <= -self.threshold
+        dd = pd.Series(peak_drawdown(index_level.to_numpy()), index=index_level.index)  # negative or 0
+        trigger, amount = self.signals(index_level.to_numpy(), prices.index)
 
-        for dt in prices.index:
-            if not bool(trigger.loc[dt]):
-                continue
+        pf.buy_weighted(prices, trigger, amount, portfolio_weights)
 
-            magnitude = float(-dd.loc[dt])  # positive
-            if self.mode == "fixed":
-                amount = self.fixed_amount
-            elif self.mode == "proportional":
-                amount = self.k * magnitude
-            else:
-                raise ValueError("mode must be 'fixed' or 'proportional'")
+        extra = {
+            "peak_to_trough_drawdown": dd,
+            "trigger": pd.Series(trigger.astype(int), index=index_level.index),
+        }
+        return pf, StrategyResult(extra_series=extra)
 
-            for tkr, weight in portfolio_weights.items():
-                px = float(prices.loc[dt, tkr])
-                pf.buy(dt, tkr, cash=amount * weight, price=px)
+    def initial_state(self) -> dict:
+        return {"peak": None}   # running peak of the level
 
+    def extend(self, state, prices, portfolio_weights, level):
+        carried = [] if state["peak"] is None else [state["peak"]]
+        window = np.r_[carried, np.asarray(level, dtype=float)]
+        trigger, amount = self.signals(window, None)
         extra = {
-            "peak_to_trough_drawdown": dd,
-            "trigger": trigger.astype(int),
+            "peak_to_trough_drawdown": peak_drawdown(window)[len(carried):],
+            "trigger": trigger[len(carried):].astype(int),
         }
-        return pf, StrategyResult(extra_series=extra)
\ No newline at end of file
+        peak = float(np.maximum.accumulate(window)[-1]) if len(window) else None
+        return trigger[len(carried):], amount[len(carried):], extra, {"peak": peak}
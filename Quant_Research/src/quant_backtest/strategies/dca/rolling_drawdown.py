@@ -3,7 +3,16 @@ import pandas as pd
 import numpy as np
 
 from ...portfolio import BuyOnlyPortfolio
-from ..base import Strategy, StrategyResult
+from ...weights import Weights, weight_tickers
+from ..base import Strategy, StrategyResult, synthetic_index_level
+
+def rolling_return(level: np.ndarray, window: int) -> np.ndarray:
+    """level[t] / level[t - window] - 1 along the last axis; 0 for the first `window` bars."""
+    level = np.asarray(level, dtype=float)
+    out = np.zeros_like(level)
+    if window < level.shape[-1]:
+        out[..., window:] = level[..., window:] / level[..., : level.shape[-1] - window] - 1.0
+    return np.where(np.isnan(out), 0.0, out)
 
 class RollingDrawdownBuy(Strategy):
     name = "strat2_rolling_dd"
@@ -22,41 +31,59 @@ class RollingDrawdownBuy(Strategy):
         self.fixed_amount = float(fixed_amount)
         self.k = float(k)
 
-    def run(self, prices: pd.DataFrame, portfolio_weights: dict[str, float]):
-        tickers = list(portfolio_weights.keys())
-        pf = BuyOnlyPortfolio(tickers)
+    @classmethod
+    def from_args(cls, args):
+        return cls(
+            window_days=args.window,
+            threshold=args.threshold,
+            mode=args.mode,
+            fixed_amount=args.fixed,
+            k=args.k,
+        )
 
-        # Build synthetic index level from weighted returns
-        asset_rets = prices.pct_change().fillna(0.0)
-        w = pd.Series(portfolio_weights)
-        port_ret = (asset_rets * w).sum(axis=1)
-        index_level = (1.0 + port_ret).cumprod()
+    def signals(self, level: np.ndarray, index: pd.DatetimeIndex):
+        if self.mode not in ("fixed", "proportional"):
+            raise ValueError("mode must be 'fixed' or 'proportional'")
+        roll_ret = rolling_return(level, self.window)
+        trigger = roll_ret <= -self.threshold
+        if self.mode == "fixed":
+            amount = np.full(roll_ret.shape, self.fixed_amount)
+        else:
+            amount = self.k * (-roll_ret)  # positive magnitude
+        return trigger, amount
 
-        # Rolling window return (drawdown over last N days)
-        roll_ret = index_level / index_level.shift(self.window) - 1.0
-        roll_ret = roll_ret.fillna(0.0)
+    def run(self, prices: pd.DataFrame, portfolio_weights: Weights):
+        if self.mode not in ("fixed", "proportional"):
+            raise ValueError("mode must be 'fixed' or 'proportional'")
 
-        # Trigger when rolling return <= -threshold
-        trigger = roll_ret <= -self.threshold
+        tickers = weight_tickers(portfolio_weights)
+        pf = BuyOnlyPortfolio(tickers)
 
-        for dt in prices.index:
-            if not bool(trigger.loc[dt]):
-                continue
+        # Build synthetic index level from weighted returns
+        index_level = synthetic_index_level(prices, portfolio_weights)
 
-            dd = float(-roll_ret.loc[dt])  # positive magnitude
-            if self.mode == "fixed":
-                amount = self.fixed_amount
-            elif self.mode == "proportional":
-                amount = self.k * dd
-            else:
-                raise ValueError("mode must be 'fixed' or 'proportional'")
+        # Rolling window return (drawdown over last N days), trigger when <= -threshold
+        roll_ret = pd.Series(rolling_return(index_level.to_numpy(), self.window), index=index_level.index)
+        trigger, amount = self.signals(index_level.to_numpy(), prices.index)
 
-            for tkr, weight in portfolio_weights.items():
-                px = float(prices.loc[dt, tkr])
-                pf.buy(dt, tkr, cash=amount * weight, price=px)
+        pf.buy_weighted(prices, trigger, amount, portfolio_weights)
 
         extra = {
             f"rolling_return_{self.window}d": roll_ret,
-            "trigger": trigger.astype(int),
+            "trigger": pd.Series(trigger.astype(int), index=index_level.index),
+        }
+        return pf, StrategyResult(extra_series=extra)
+
+    def initial_state(self) -> dict:
+        return {"levels": []}   # the last `window` levels
+
+    def extend(self, state, prices, portfolio_weights, level):
+        carried = len(state["levels"])
+        window = np.r_[np.asarray(state["levels"], dtype=float), np.asarray(level, dtype=float)]
+        trigger, amount = self.signals(window, None)
+        extra = {
+            f"rolling_return_{self.window}d": rolling_return(window, self.window)[carried:],
+            "trigger": trigger[carried:].astype(int),
         }
-        return pf, StrategyResult(extra_series=extra)
\ No newline at end of file
+        keep = window[max(len(window) - self.window, 0):] if self.window > 0 else window[:0]
+        return trigger[carried:], amount[carried:], extra, {"levels": keep.tolist()}
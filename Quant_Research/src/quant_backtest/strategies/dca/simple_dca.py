@@ -1,7 +1,11 @@
 from __future__ import annotations
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 
 from ...portfolio import BuyOnlyPortfolio
+from ...weights import Weights, weight_tickers
 from ..base import Strategy, StrategyResult
 
 def first_trading_day_each_month(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
@@ -9,22 +13,51 @@ def first_trading_day_each_month(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
     firsts = s.groupby([index.year, index.month]).head(1).index
     return pd.DatetimeIndex(firsts).sort_values()
 
+def new_month_flags(index: pd.DatetimeIndex, previous: Optional[str] = None) -> np.ndarray:
+    """
+    index.isin(first_trading_day_each_month(index)) for bars that follow the
+    date `previous` (the last bar already seen, as a string; None for none).
+    """
+    if previous is None:
+        return index.isin(first_trading_day_each_month(index))
+    prev = pd.DatetimeIndex([pd.Timestamp(previous)])
+    if index.tz is not None:
+        prev = prev.tz_convert(index.tz)
+    full = prev.append(index)
+    return full.isin(first_trading_day_each_month(full))[1:]
+
 class MonthlyFixedBuy(Strategy):
     name = "strat1_monthly"
 
     def __init__(self, amount_per_month: float = 100.0):
         self.amount = float(amount_per_month)
 
-    def run(self, prices: pd.DataFrame, portfolio_weights: dict[str, float]):
-        tickers = list(portfolio_weights.keys())
+    @classmethod
+    def from_args(cls, args):
+        return cls(amount_per_month=args.amount)
+
+    def signals(self, level: np.ndarray, index: pd.DatetimeIndex):
+        trigger = np.broadcast_to(index.isin(first_trading_day_each_month(index)), np.shape(level))
+        return trigger, np.full(np.shape(level), self.amount)
+
+    def run(self, prices: pd.DataFrame, portfolio_weights: Weights):
+        tickers = weight_tickers(portfolio_weights)
         pf = BuyOnlyPortfolio(tickers)
 
         dca_dates = first_trading_day_each_month(prices.index)
+        trigger = prices.index.isin(dca_dates)
+
+        pf.buy_weighted(prices, trigger, self.amount, portfolio_weights)
+
+        return pf, StrategyResult(extra_series={})
+
+    def restart_bars(self, index: pd.DatetimeIndex) -> np.ndarray:
+        return index.isin(first_trading_day_each_month(index))
 
-        for dt in dca_dates:
-            for tkr, w in portfolio_weights.items():
-                cash = self.amount * w
-                px = float(prices.loc[dt, tkr])
-                pf.buy(dt, tkr, cash=cash, price=px)
+    def initial_state(self) -> dict:
+        return {"last_date": None}
 
-        return pf, StrategyResult(extra_series={})
\ No newline at end of file
+    def extend(self, state, prices, portfolio_weights, level):
+        trigger = new_month_flags(prices.index, state["last_date"])
+        last = str(prices.index[-1]) if len(prices) else state["last_date"]
+        return trigger, np.full(len(prices), self.amount), {}, {"last_date": last}
@@ -0,0 +1,50 @@
+from __future__ import annotations
+import importlib
+from typing import Dict
+
+# CLI name -> "module:Class". Modules are imported only when their strategy is
+# selected, so listing strategies (e.g. for --help) imports none of them.
+BUILTIN: Dict[str, str] = {
+    "strat1": "quant_backtest.strategies.dca.simple_dca:MonthlyFixedBuy",
+    "strat2": "quant_backtest.strategies.dca.rolling_drawdown:RollingDrawdownBuy",
+    "strat3": "quant_backtest.strategies.dca.peak_drawdown:PeakDrawdownBuy",
+    "strat4": "quant_backtest.strategies.dca.budgeted_drawdown:BudgetedDrawdownBuy",
+}
+
+# Plugins register under this group, e.g. in their pyproject.toml:
+#   [project.entry-points."quant_backtest.strategies"]
+#   mystrat = "my_package.strategies:MyStrategy"
+ENTRY_POINT_GROUP = "quant_backtest.strategies"
+
+_plugins: Dict[str, str] | None = None
+
+
+def _entry_points() -> Dict[str, str]:
+    global _plugins
+    if _plugins is None:
+        from importlib.metadata import entry_points
+        _plugins = {ep.name: ep.value for ep in entry_points(group=ENTRY_POINT_GROUP)}
+    return _plugins
+
+
+def available() -> Dict[str, str]:
+    """Every registered strategy name and its "module:Class" target; built-ins win on clashes."""
+    return {**_entry_points(), **BUILTIN}
+
+
+def names() -> list[str]:
+    return sorted(available())
+
+
+def load(name: str):
+    """Import and return the strategy class registered as `name`."""
+    target = available().get(name)
+    if target is None:
+        raise KeyError(f"unknown strategy {name!r}; available: {names()}")
+    module, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def create(name: str, args):
+    """Strategy instance for CLI / config `args` (see `Strategy.from_args`)."""
+    return load(name).from_args(args)
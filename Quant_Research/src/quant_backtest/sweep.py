@@ -0,0 +1,133 @@
+from __future__ import annotations
+import itertools
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .metrics import compute_metrics
+from .portfolio import weighted_buy_paths
+from .profiling import span
+from .strategies.base import synthetic_index_level
+from .strategies.dca.peak_drawdown import peak_drawdown
+from .strategies.dca.rolling_drawdown import rolling_return
+
+# Defaults mirror the CLI / YAML run config parameter names.
+SWEEP_DEFAULTS = {
+    "strat2": {"window": 5, "threshold": 0.05, "mode": "fixed", "fixed": 50.0, "k": 1000.0},
+    "strat3": {"threshold": 0.05, "mode": "fixed", "fixed": 50.0, "k": 1000.0},
+}
+
+STRATEGY_NAMES = {"strat2": "strat2_rolling_dd", "strat3": "strat3_peak_dd"}
+
+
+def expand_grid(strategy: str, grid: Dict[str, Sequence]) -> pd.DataFrame:
+    """Cartesian product of `grid` over the strategy defaults, one row per combination."""
+    if strategy not in SWEEP_DEFAULTS:
+        raise ValueError(f"sweep supports {sorted(SWEEP_DEFAULTS)}, got {strategy!r}")
+    defaults = SWEEP_DEFAULTS[strategy]
+    unknown = set(grid) - set(defaults)
+    if unknown:
+        raise ValueError(f"unknown {strategy} parameters: {sorted(unknown)}")
+
+    axes = {k: list(grid.get(k, [v])) for k, v in defaults.items()}
+    params = pd.DataFrame(list(itertools.product(*axes.values())), columns=list(axes))
+    bad = set(params["mode"]) - {"fixed", "proportional"}
+    if bad:
+        raise ValueError("mode must be 'fixed' or 'proportional'")
+    return params
+
+
+def _signals(strategy: str, level: np.ndarray, params: pd.DataFrame):
+    """
+    (params x time) trigger mask and drawdown magnitude for every combination,
+    by the strategies' own rules. Rolling returns are computed once per
+    distinct window.
+    """
+    threshold = params["threshold"].to_numpy(dtype=float)[:, None]
+
+    if strategy == "strat2":
+        windows = params["window"].to_numpy(dtype=int)
+        roll = {w: rolling_return(level, w) for w in np.unique(windows)}
+        ret = np.stack([roll[w] for w in windows])
+    else:
+        ret = np.broadcast_to(peak_drawdown(level), (len(params), len(level)))
+
+    return ret <= -threshold, -ret
+
+
+def _batch_metrics(value: np.ndarray, cashflows: np.ndarray, index: pd.DatetimeIndex) -> pd.DataFrame:
+    """`run_backtest` end-of-period metrics for every row of (runs x time) arrays."""
+    m = compute_metrics(value, cashflows)
+    dates = index.strftime("%Y-%m-%d")
+    return pd.DataFrame({
+        "start": str(index.min().date()),
+        "end": str(index.max().date()),
+        "total_contributions": m["total_contributions"],
+        "terminal_value": m["terminal_value"],
+        "simple_return_pct": m["simple_return_pct"],
+        "twr_annualized": m["twr_annualized"],
+        "irr_annualized": m["irr_annualized"],
+        "max_drawdown_pct": m["max_drawdown"] * 100.0,
+        "max_dd_peak": dates[m["max_dd_peak"]],
+        "max_dd_trough": dates[m["max_dd_trough"]],
+        "volatility_annualized": m["volatility_annualized"],
+        "sortino": m["sortino"],
+        "calmar": m["calmar"],
+    })
+
+
+def run_sweep(
+    prices: pd.DataFrame,
+    weights: dict[str, float],
+    strategy: str,
+    grid: Dict[str, Sequence],
+    chunk_size: int = 256,
+    level: np.ndarray | None = None,
+) -> pd.DataFrame:
+    """
+    Evaluate every combination in `grid` for strat2 (RollingDrawdownBuy) or
+    strat3 (PeakDrawdownBuy) in one broadcasted pass over a (params x time)
+    matrix. The synthetic index is built once; combinations are processed in
+    blocks of `chunk_size` rows to bound memory.
+
+    `level` is the synthetic index of `prices` / `weights` when the caller
+    already has it (e.g. memoized by the backtest server).
+
+    Returns one row per combination: the parameters followed by the
+    `run_backtest` metrics.
+    """
+    params = expand_grid(strategy, grid)
+    tickers = list(weights.keys())
+    w = np.array(list(weights.values()), dtype=float)
+
+    if level is None:
+        level = synthetic_index_level(prices, weights).to_numpy(dtype=float)
+    level = np.asarray(level, dtype=float)
+    px = prices.loc[:, tickers].to_numpy(dtype=float)                  # (time, tickers)
+
+    blocks: List[pd.DataFrame] = []
+    for lo in range(0, len(params), chunk_size):
+        block = params.iloc[lo: lo + chunk_size].reset_index(drop=True)
+        with span("sweep.signals"):
+            trigger, magnitude = _signals(strategy, level, block)
+
+            fixed = (block["mode"] == "fixed").to_numpy()[:, None]
+            amount = np.where(
+                fixed,
+                block["fixed"].to_numpy(dtype=float)[:, None],
+                block["k"].to_numpy(dtype=float)[:, None] * magnitude,
+            )
+            spend = np.where(trigger, amount, 0.0)                      # (params, time)
+
+        with span("sweep.buy_paths"):
+            value, cashflows = weighted_buy_paths(px, spend, w)
+
+        with span("sweep.metrics"):
+            metrics = _batch_metrics(value, cashflows, prices.index)
+        metrics["num_trades"] = trigger.sum(axis=1) * len(tickers)
+        blocks.append(pd.concat([block, metrics], axis=1))
+
+    out = pd.concat(blocks, ignore_index=True)
+    out.insert(0, "strategy", STRATEGY_NAMES[strategy])
+    return out
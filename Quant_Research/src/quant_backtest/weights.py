@@ -0,0 +1,134 @@
+from __future__ import annotations
+import os
+from typing import Dict, Iterator, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def _utc_ns(dates) -> np.ndarray:
+    """int64 ns of `dates` as UTC instants (naive dates are taken as UTC)."""
+    di = pd.DatetimeIndex(dates)
+    if di.tz is not None:
+        di = di.tz_convert("UTC").tz_localize(None)
+    return di.as_unit("ns").asi8
+
+
+class WeightSchedule:
+    """
+    Time-varying portfolio weights, e.g. quarterly-rebalanced index weights.
+    Row k of a sparse (rebalances x tickers) CSR matrix applies from
+    `dates[k]` until the next rebalance; dates before the first rebalance use
+    row 0. Only nonzero weights are stored, so memory scales with the number
+    of index members per rebalance, not with dates x universe.
+    """
+
+    def __init__(self, dates, tickers: List[str], matrix):
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = list(tickers)
+        self.matrix = sparse.csr_matrix(matrix, dtype=np.float64)
+        self.matrix.eliminate_zeros()
+        if self.matrix.shape != (len(self.dates), len(self.tickers)):
+            raise ValueError(f"matrix shape {self.matrix.shape} does not match "
+                             f"{len(self.dates)} dates x {len(self.tickers)} tickers")
+        if len(self.dates) == 0:
+            raise ValueError("a weight schedule needs at least one rebalance date")
+        if not self.dates.is_monotonic_increasing or self.dates.has_duplicates:
+            raise ValueError("rebalance dates must be unique and increasing")
+
+    @classmethod
+    def static(cls, weights: Dict[str, float]) -> "WeightSchedule":
+        """One row holding for all time; buys match `buy_weighted` with the dict."""
+        return cls(pd.DatetimeIndex([pd.Timestamp.min]), list(weights),
+                   np.array([list(weights.values())], dtype=float))
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "WeightSchedule":
+        """Dense (rebalance dates x tickers) weights; NaN and 0 mean not held."""
+        frame = frame.sort_index()
+        return cls(frame.index, [str(c) for c in frame.columns], frame.fillna(0.0).to_numpy(dtype=float))
+
+    @classmethod
+    def from_records(cls, records: pd.DataFrame) -> "WeightSchedule":
+        """Long format with date, ticker and weight columns, one row per holding per rebalance."""
+        dates = pd.DatetimeIndex(records["date"])
+        uniq_dates, rows = np.unique(dates.values, return_inverse=True)
+        tickers, cols = np.unique(records["ticker"].astype(str).to_numpy(), return_inverse=True)
+        matrix = sparse.coo_matrix(
+            (records["weight"].to_numpy(dtype=float), (rows, cols)),
+            shape=(len(uniq_dates), len(tickers)),
+        )
+        # np.unique yields naive UTC instants; localize them as such before converting back
+        return cls(pd.DatetimeIndex(uniq_dates).tz_localize("UTC").tz_convert(dates.tz), list(tickers), matrix)
+
+    @classmethod
+    def read(cls, path: str) -> "WeightSchedule":
+        """`from_records` of a .csv or .parquet file."""
+        if os.path.splitext(path)[1].lower() == ".parquet":
+            records = pd.read_parquet(path)
+        else:
+            records = pd.read_csv(path, parse_dates=["date"])
+        return cls.from_records(records)
+
+    @property
+    def nnz(self) -> int:
+        return int(self.matrix.nnz)
+
+    def rows(self, index) -> np.ndarray:
+        """Active schedule row for every date of `index`; both sides are compared as UTC instants."""
+        pos = np.searchsorted(_utc_ns(self.dates), _utc_ns(index), side="right") - 1
+        return np.clip(pos, 0, None)
+
+    def segments(self, index) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray]]:
+        """(start, stop, ticker positions, weights) for each run of `index` under one schedule row."""
+        rows = self.rows(index)
+        if not len(rows):
+            return
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        stops = np.r_[starts[1:], len(rows)]
+        indptr, indices, data = self.matrix.indptr, self.matrix.indices, self.matrix.data
+        for a, b, k in zip(starts, stops, rows[starts]):
+            yield a, b, indices[indptr[k]: indptr[k + 1]], data[indptr[k]: indptr[k + 1]]
+
+    def column_positions(self, columns) -> np.ndarray:
+        """Position of every schedule ticker in `columns`; KeyError for missing tickers."""
+        pos = pd.Index(columns).get_indexer(self.tickers)
+        if (pos < 0).any():
+            missing = [t for t, p in zip(self.tickers, pos) if p < 0]
+            raise KeyError(f"tickers not in prices: {missing[:10]}{'...' if len(missing) > 10 else ''}")
+        return pos
+
+    def weighted_return(self, asset_rets: pd.DataFrame) -> pd.Series:
+        """`weighted_portfolio_return` with the weights active on each date."""
+        rets = asset_rets.to_numpy(dtype=float)
+        pos = self.column_positions(asset_rets.columns)
+        out = np.zeros(len(rets))
+        for a, b, cols, w in self.segments(asset_rets.index):
+            out[a:b] = (rets[a:b][:, pos[cols]] * w).sum(axis=1)
+        return pd.Series(out, index=asset_rets.index)
+
+    def portfolio_return(self, prices: pd.DataFrame) -> pd.Series:
+        """
+        `weighted_return(compute_returns(prices))` computed segment by segment
+        from the member prices only, without a full returns matrix.
+        """
+        px = prices.to_numpy(dtype=float)
+        pos = self.column_positions(prices.columns)
+        out = np.zeros(len(px))
+        for a, b, cols, w in self.segments(prices.index):
+            lo = max(a, 1)
+            if b <= lo:
+                continue
+            seg = px[lo - 1: b][:, pos[cols]]
+            r = seg[1:] / seg[:-1] - 1.0
+            out[lo:b] = (np.where(np.isnan(r), 0.0, r) * w).sum(axis=1)
+        return pd.Series(out, index=prices.index)
+
+
+Weights = Union[Dict[str, float], WeightSchedule]
+
+
+def weight_tickers(weights: Weights) -> List[str]:
+    """Tickers of a weights dict or schedule, in order."""
+    return list(weights.tickers) if isinstance(weights, WeightSchedule) else list(weights.keys())
@@ -1,5 +1,6 @@
 # Imports
 # Standard libraries
+import json
 import os
 import random
 import string
@@ -8,6 +9,120 @@ import click
 import numpy as np
 import pandas as pd
 
+FIELDS = ('open', 'high', 'low', 'close')
+PRICES_FILE = 'prices.npy'
+VOLUME_FILE = 'volume.npy'
+INDEX_FILE = 'index.json'
+
+class GBMPaths:
+    """
+    A batch of simulated OHLCV paths held as NumPy arrays of shape
+    (assets, days); DataFrames are only built on request.
+    """
+    def __init__(self, symbols, dates, open, high, low, close, volume):
+        self.symbols=list(symbols)
+        self.dates=dates
+        self.open=open
+        self.high=high
+        self.low=low
+        self.close=close
+        self.volume=volume
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def frame(self, i):
+        """OHLCV DataFrame of asset `i`, in the per-asset CSV layout."""
+        return pd.DataFrame(
+            {
+            'date':self.dates,
+            'open':self.open[i],
+            'high':self.high[i],
+            'low':self.low[i],
+            'close':self.close[i],
+            'volume':self.volume[i]
+            }
+        )
+
+    def frames(self):
+        for i, symbol in enumerate(self.symbols):
+            yield symbol, self.frame(i)
+
+    def save(self, directory):
+        """
+        Writes the whole batch as one store in `directory`:
+            prices.npy   float64 (4, assets, days), fields open/high/low/close
+            volume.npy   int64 (assets, days)
+            index.json   symbols, dates and field order
+        Prices keep full float64 precision and are memory-mapped on load.
+        """
+        prices, volume = create_store(directory, self.symbols, self.dates)
+        for k, field in enumerate(FIELDS):
+            prices[k] = getattr(self, field)
+        volume[:] = self.volume
+        prices.flush()
+        volume.flush()
+
+def create_store(directory, symbols, dates):
+    """
+    Lays out an empty store (see GBMPaths.save) and returns its writable
+    prices (4, assets, days) and volume (assets, days) memory maps, so large
+    batches can be filled in place chunk by chunk.
+    """
+    os.makedirs(directory, exist_ok=True)
+    shape = (len(symbols), len(dates))
+    prices = np.lib.format.open_memmap(
+        os.path.join(directory, PRICES_FILE),
+        mode='w+',
+        dtype=np.float64,
+        shape=(len(FIELDS),) + shape
+    )
+    volume = np.lib.format.open_memmap(
+        os.path.join(directory, VOLUME_FILE),
+        mode='w+',
+        dtype=np.int64,
+        shape=shape
+    )
+    with open(os.path.join(directory, INDEX_FILE), 'w') as f:
+        json.dump(
+            {
+            'symbols':list(symbols),
+            'dates':[str(d.date()) for d in dates],
+            'fields':list(FIELDS)
+            },
+            f
+        )
+    return prices, volume
+
+def load_paths(directory, symbols=None, sample=None, seed=None):
+    """
+    Opens a store written by GBMPaths.save. With no selection the arrays are
+    read-only memory maps of the files (no copy). `symbols` picks assets by
+    name and `sample` draws that many assets at random (reproducible with
+    `seed`); only the selected rows are then read from disk.
+    """
+    with open(os.path.join(directory, INDEX_FILE), 'r') as f:
+        index = json.load(f)
+    prices = np.load(os.path.join(directory, PRICES_FILE), mmap_mode='r')
+    volume = np.load(os.path.join(directory, VOLUME_FILE), mmap_mode='r')
+    all_symbols = index['symbols']
+    dates = pd.DatetimeIndex(index['dates'])
+
+    rows = None
+    if symbols is not None:
+        position = {s: i for i, s in enumerate(all_symbols)}
+        missing = [s for s in symbols if s not in position]
+        if missing:
+            raise KeyError('Symbols not in store: %s' % missing)
+        rows = np.array([position[s] for s in symbols], dtype=np.int64)
+    if sample is not None:
+        pool = np.arange(len(all_symbols)) if rows is None else rows
+        rows = np.sort(np.random.default_rng(seed).choice(pool, size=min(sample, len(pool)), replace=False))
+
+    if rows is None:
+        return GBMPaths(all_symbols, dates, *prices, volume)
+    return GBMPaths([all_symbols[i] for i in rows], dates, *prices[:, rows], volume[rows])
+
 class GBMAssetSimulator:
     """
     Generates OHLCV with GBM for pricing and Patreo distribution for volatility.
@@ -42,12 +157,15 @@ class GBMAssetSimulator:
             )
         )
     
-    def _create_df(self):
-        dates=pd.date_range(                            # Creates the dataframe based on the time frame and number of intervals
+    def _dates(self):
+        return pd.date_range(                           # Business days between the two inclusive dates
             self.start_date,
             self.end_date,
             freq='B'
         )
+
+    def _create_df(self):
+        dates=self._dates()                             # Creates the dataframe based on the time frame and number of intervals
         zeros = pd.Series(np.zeros(len(dates)))
         return pd.DataFrame(
             {
@@ -98,6 +216,47 @@ class GBMAssetSimulator:
         output_file = os.path.join(self.output_dir, '%s.csv' % symbol)
         data.to_csv(output_file, index=False, float_format='%.2f')
 
+    def _generate_symbols(self, num_assets, rng):
+        if num_assets > 26 ** self.symbol_length:
+            raise ValueError('cannot draw %d unique symbols of length %d' % (num_assets, self.symbol_length))
+        letters = np.array(list(string.ascii_uppercase))
+        symbols = []
+        seen = set()
+        while len(symbols) < num_assets:                # Redraw the (rare) collisions so every symbol is unique
+            draws = rng.integers(0, 26, size=(num_assets - len(symbols), self.symbol_length))
+            for row in letters[draws]:
+                symbol = ''.join(row)
+                if symbol not in seen:
+                    seen.add(symbol)
+                    symbols.append(symbol)
+        return symbols
+
+    def generate_batch(self, num_assets, seed=None):
+        """
+        Generates `num_assets` independent paths in one draw and returns them
+        as a GBMPaths of (assets x days) arrays. The same seed always gives
+        the same symbols, prices and volumes.
+        """
+        rng = np.random.default_rng(seed)
+        dates = self._dates()
+        n = len(dates)
+        T = n/252                                       # Years
+        dt = T/(4*n)                                    # Factor of 4 as there are 4 data points required each day
+        symbols = self._generate_symbols(num_assets, rng)
+
+        log_steps = (self.mu - self.sigma**2/2)*dt + self.sigma*np.sqrt(dt)*rng.standard_normal((num_assets, 4*n))
+        path = self.init_price*np.exp(np.cumsum(log_steps, axis=1)).reshape(num_assets, n, 4)
+        volume = rng.pareto(self.pareto_shape, size=(num_assets, n)).astype(np.int64)
+        return GBMPaths(
+            symbols,
+            dates,
+            path[:, :, 0],                              # Open is the first of the 4 intraday points
+            path.max(axis=2),                           # High / low reduce over the 4 points of each day
+            path.min(axis=2),
+            path[:, :, 3],                              # Close is the last of the 4 points
+            volume
+        )
+
     def __call__(self):
         symbol = self._generate_ticker()
         data = self._create_df()
@@ -106,6 +265,98 @@ class GBMAssetSimulator:
         self._append_volume_data(data)
         self._output_dataframe(symbol,data)
 
+class CorrelatedGBMSimulator(GBMAssetSimulator):
+    """
+    Multi-asset GBM with per-asset drift and volatility and a full correlation
+    matrix across assets, for synthetic universes that co-move like real ones.
+    The correlation matrix is Cholesky-factorized once; each time chunk is one
+    (steps x assets) @ (assets x assets) matmul, so memory is bounded by
+    `chunk_days` rather than the horizon. Volume stays independent Pareto.
+    """
+    def __init__(
+        self,
+        start_date,
+        end_date,
+        output_dir,
+        symbol_length,
+        init_price,
+        mu,
+        sigma,
+        corr,
+        pareto_shape,
+        chunk_days=252
+    ):
+        mu = np.asarray(mu, dtype=float)
+        sigma = np.asarray(sigma, dtype=float)
+        corr = np.asarray(corr, dtype=float)
+        num_assets = len(mu)
+        if sigma.shape != (num_assets,) or corr.shape != (num_assets, num_assets):
+            raise ValueError('mu and sigma need one entry per asset and corr must be (assets x assets)')
+        if not np.allclose(corr, corr.T) or not np.allclose(np.diag(corr), 1.0):
+            raise ValueError('corr must be a symmetric matrix with a unit diagonal')
+        try:
+            self.chol = np.linalg.cholesky(corr)        # Factorized once, reused for every chunk
+        except np.linalg.LinAlgError:
+            raise ValueError('corr must be positive definite')
+        super().__init__(
+            start_date,
+            end_date,
+            output_dir,
+            symbol_length,
+            np.broadcast_to(np.asarray(init_price, dtype=float), (num_assets,)),
+            mu,
+            sigma,
+            pareto_shape
+        )
+        self.corr=corr
+        self.chunk_days=int(chunk_days)
+
+    def generate_batch(self, num_assets=None, seed=None, directory=None):
+        """
+        Generates every asset's correlated path. With `directory` the chunks
+        are written straight into a store (see create_store) and the returned
+        GBMPaths is memory-mapped from it. Prices and volumes use separate
+        child streams of `seed`, so `chunk_days` changes results only by
+        matmul rounding.
+        """
+        if num_assets is not None and num_assets != len(self.mu):
+            raise ValueError('num_assets must match the %d assets in mu/sigma/corr' % len(self.mu))
+        num_assets = len(self.mu)
+        price_rng, volume_rng, symbol_rng = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(3)]
+        dates = self._dates()
+        n = len(dates)
+        dt = 1/(4*252)                                  # 4 data points per business day
+        drift = (self.mu - self.sigma**2/2)*dt
+        vol = self.sigma*np.sqrt(dt)
+        symbols = self._generate_symbols(num_assets, symbol_rng)
+
+        if directory is None:
+            prices = np.empty((len(FIELDS), num_assets, n))
+            volume = np.empty((num_assets, n), dtype=np.int64)
+        else:
+            prices, volume = create_store(directory, symbols, dates)
+
+        log_price = np.log(np.asarray(self.init_price, dtype=float))
+        for d0 in range(0, n, self.chunk_days):
+            k = min(self.chunk_days, n - d0)
+            shocks = price_rng.standard_normal((4*k, num_assets)) @ self.chol.T
+            steps = np.vstack([log_price[None, :], drift + vol*shocks])
+            log_path = np.cumsum(steps, axis=0)[1:]     # Carry the last log price in, so chunking never changes the sums
+            log_price = log_path[-1]
+            path = np.exp(log_path).reshape(k, 4, num_assets)
+            prices[0, :, d0:d0+k] = path[:, 0, :].T     # Open
+            prices[1, :, d0:d0+k] = path.max(axis=1).T  # High
+            prices[2, :, d0:d0+k] = path.min(axis=1).T  # Low
+            prices[3, :, d0:d0+k] = path[:, 3, :].T     # Close
+            volume[:, d0:d0+k] = volume_rng.pareto(self.pareto_shape, size=(k, num_assets)).astype(np.int64).T
+
+        if directory is not None:
+            prices.flush()
+            volume.flush()
+            del prices, volume
+            return load_paths(directory)
+        return GBMPaths(symbols, dates, *prices, volume)
+
 @click.command()
 @click.option('--num-assets', 'num_assets', default='1', help='Number of separate assets to generate files for')
 @click.option('--random-seed', 'random_seed', default='42', help='Random seed to set for both Python and NumPy for reproducibility')
@@ -117,8 +368,9 @@ class GBMAssetSimulator:
 @click.option('--mu', 'mu', default='0.1', help=r"The drift parameter, \mu for the GBM SDE")
 @click.option('--sigma', 'sigma', default='0.3', help=r"The volatility parameter, \sigma for the GBM SDE")
 @click.option('--pareto-shape', 'pareto_shape', default='1.5', help='The shape of the Pareto distribution simulating the trading volume')
+@click.option('--output-format', 'output_format', default='npy', type=click.Choice(['npy', 'csv']), help='npy: one memory-mappable store for all assets; csv: one file per asset')
 
-def cli(num_assets, random_seed, start_date, end_date, output_dir, symbol_length, init_price, mu, sigma, pareto_shape):
+def cli(num_assets, random_seed, start_date, end_date, output_dir, symbol_length, init_price, mu, sigma, pareto_shape, output_format):
     num_assets = int(num_assets)
     random_seed = int(random_seed)
     symbol_length = int(symbol_length)
@@ -141,9 +393,13 @@ def cli(num_assets, random_seed, start_date, end_date, output_dir, symbol_length
         pareto_shape
     )
 
-    for i in range(num_assets):
-        print('Generating asset path %d of %d...' % (i+1, num_assets))
-        gbmas()
+    print('Generating %d asset paths...' % num_assets)
+    paths = gbmas.generate_batch(num_assets, seed=random_seed)
+    if output_format == 'npy':
+        paths.save(output_dir)
+    else:
+        for symbol, data in paths.frames():
+            gbmas._output_dataframe(symbol, data)
 
 if __name__ == "__main__":                              # Allows GBM.py to be both a CLI tool and Library
     cli()                                               # Will not run if added to another notebook or script unless specifically requested in the terminal.
\ No newline at end of file
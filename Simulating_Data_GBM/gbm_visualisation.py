@@ -8,25 +8,16 @@
    "outputs": [],
    "source": [
     "import matplotlib.pyplot as plt\n",
-    "import pandas as pd\n",
-    "import os\n",
+    "\n",
+    "from gbm import load_paths\n",
     "\n",
     "folder = '/Users/thomasfish/Desktop/Quant_Prep/Independent_Projects/GBM_Sim/GBMSimOutput'\n",
-    "tickers = []\n",
-    "for fname in os.listdir(folder):\n",
-    "    if fname.lower().endswith('.csv'):\n",
-    "        ticker, extension = os.path.splitext(fname)\n",
-    "        tickers.append(ticker)\n",
-    "        print(ticker)\n",
-    "        print(tickers)\n",
+    "paths = load_paths(folder, sample=5, seed=0)          # Memory-mapped store; only the sampled assets are read\n",
+    "print(paths.symbols)\n",
     "\n",
     "if __name__ == \"__main__\":\n",
-    "    for i in range(len(tickers)):\n",
-    "        ticker = tickers[i]\n",
-    "        i =+ 1\n",
-    "        df = pd.read_csv(f'/Users/thomasfish/Desktop/Quant_Prep/Independent_Projects/GBM_Sim/GBMSimOutput/{ticker}.csv')\n",
-    "        df['date'] = pd.to_datetime(df['date'], format=\"%Y-%m-%d\")\n",
-    "        ax = df[[\"open\",\"high\",\"low\",\"close\",\"volume\"]].plot(figsize=(15,5), linewidth=1)\n",
+    "    for symbol, df in paths.frames():\n",
+    "        ax = df.set_index(\"date\")[[\"open\",\"high\",\"low\",\"close\",\"volume\"]].plot(figsize=(15,5), linewidth=1, title=symbol)\n",
     "        plt.tight_layout()\n",
     "        plt.show()"
    ]
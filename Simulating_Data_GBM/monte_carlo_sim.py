@@ -1,23 +1,19 @@
+import sys
+
 import matplotlib.pyplot as plt
-import pandas as pd
-import os
+
+from gbm import load_paths
 
 folder = '/Users/thomasfish/Desktop/Quant_Prep/Independent_Projects/GBM_Sim/GBMSimOutput'
-tickers = []
-for fname in os.listdir(folder):
-    if fname.lower().endswith('.csv'):
-        ticker, extension = os.path.splitext(fname)
-        tickers.append(ticker)
 
 if __name__ == "__main__":
+    sample = int(sys.argv[1]) if len(sys.argv) > 1 else None      # Optionally plot a random subset of the paths
+    paths = load_paths(folder, sample=sample, seed=0)
     fig, ax = plt.subplots(figsize=(15,5))
-    for i in range(len(tickers)):
-        ticker = tickers[i]
-        df = pd.read_csv(f'/Users/thomasfish/Desktop/Quant_Prep/Independent_Projects/GBM_Sim/GBMSimOutput/{ticker}.csv')
-        df['date'] = pd.to_datetime(df['date'], format="%Y-%m-%d")
-        df.plot(ax=ax, linewidth=0.2, x='date', y=["open","high","low","close"], legend=False)
+    for field in ["open","high","low","close"]:
+        ax.plot(paths.dates, getattr(paths, field).T, linewidth=0.2)   # One call draws every path of a field
     plt.title("Monte-Carlo Simulation of Feasible Stock Price Paths")
     plt.xlabel("Date")
     plt.ylabel("Price")
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    plt.show()